@@ -0,0 +1,109 @@
+"""
+Statistiques des alertes tenues à jour de façon incrémentale.
+
+Les compteurs par statut et par gravité, ainsi que les fenêtres glissantes
+(1 h, 24 h, 7 j), sont mis à jour à chaque création d'alerte ou changement de
+statut (ou de gravité) ; la lecture ne parcourt jamais l'historique. Les fenêtres reposent sur
+des compteurs par minute (dernière heure) et par heure (7 derniers jours) :
+la fenêtre de 1 h est précise à la minute près, celles de 24 h et 7 j à
+l'heure près.
+"""
+import collections
+import datetime
+import threading
+
+WINDOWS = (('1h', datetime.timedelta(hours=1)),
+           ('24h', datetime.timedelta(days=1)),
+           ('7d', datetime.timedelta(days=7)))
+
+
+def minute_key(when):
+    return when.strftime('%Y-%m-%dT%H:%M')
+
+
+def hour_key(when):
+    return when.strftime('%Y-%m-%dT%H')
+
+
+class AlertStats:
+    """Compteurs d'alertes lus en temps constant par le tableau de bord"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.by_status = collections.Counter()
+        self.by_severity = collections.Counter()
+        # Clés ISO tronquées (triables) -> nombre d'alertes créées
+        self.minute_buckets = collections.OrderedDict()
+        self.hour_buckets = collections.OrderedDict()
+
+    def load(self, store):
+        """Initialiser les compteurs depuis la base (une seule fois, au démarrage)"""
+        now = datetime.datetime.now()
+        with self.lock:
+            self.total = 0
+            self.by_status.clear()
+            self.by_severity.clear()
+            for status, severity, count in store.count_by_status_severity():
+                self.total += count
+                self.by_status[status] += count
+                self.by_severity[severity] += count
+            self.minute_buckets = collections.OrderedDict(
+                store.count_by_period(minute_key(now - datetime.timedelta(hours=1)), 16))
+            self.hour_buckets = collections.OrderedDict(
+                store.count_by_period(hour_key(now - datetime.timedelta(days=7)), 13))
+
+    def record_created(self, alert):
+        when = datetime.datetime.fromisoformat(alert['timestamp'])
+        with self.lock:
+            self.total += 1
+            self.by_status[alert.get('status')] += 1
+            self.by_severity[alert.get('severity')] += 1
+            for buckets, key in ((self.minute_buckets, minute_key(when)),
+                                 (self.hour_buckets, hour_key(when))):
+                buckets[key] = buckets.get(key, 0) + 1
+
+    def record_status_change(self, old_status, new_status):
+        if old_status == new_status:
+            return
+        with self.lock:
+            self.by_status[old_status] -= 1
+            self.by_status[new_status] += 1
+
+    def record_severity_change(self, old_severity, new_severity):
+        if old_severity == new_severity:
+            return
+        with self.lock:
+            self.by_severity[old_severity] -= 1
+            self.by_severity[new_severity] += 1
+
+    def prune(self, now):
+        """Oublier les compteurs sortis des fenêtres.
+
+        Les alertes automatiques sont datées du début de l'événement et peuvent
+        arriver dans le désordre : les clés sont comparées une à une (au plus
+        quelques centaines) plutôt que supposées triées.
+        """
+        for buckets, oldest in ((self.minute_buckets, minute_key(now - datetime.timedelta(hours=1))),
+                                (self.hour_buckets, hour_key(now - datetime.timedelta(days=7)))):
+            for key in [key for key in buckets if key < oldest]:
+                del buckets[key]
+
+    def snapshot(self, now=None):
+        now = now or datetime.datetime.now()
+        with self.lock:
+            self.prune(now)
+            windows = {}
+            for name, span in WINDOWS:
+                if span <= datetime.timedelta(hours=1):
+                    start, buckets = minute_key(now - span), self.minute_buckets
+                else:
+                    start, buckets = hour_key(now - span), self.hour_buckets
+                # Au plus 60 ou 168 compteurs, quel que soit le nombre d'alertes
+                windows[name] = sum(count for key, count in buckets.items() if key > start)
+            return {
+                'total': self.total,
+                'by_status': {key: value for key, value in self.by_status.items() if value},
+                'by_severity': {key: value for key, value in self.by_severity.items() if value},
+                'windows': windows,
+            }
@@ -0,0 +1,468 @@
+"""
+Stockage persistant des alertes citoyennes dans SQLite.
+
+- mode WAL : les lectures ne bloquent pas les écritures ;
+- une connexion par thread (les connexions sqlite3 ne se partagent pas) ;
+- index sur le statut et l'horodatage pour le filtrage et le tri ;
+- index plein texte FTS5 sur la localisation et la description, tenu à jour
+  par des triggers ;
+- pagination par curseur (`before`) plutôt que par décalage, dans l'ordre
+  d'insertion (`seq`), qui est l'ordre chronologique des alertes ;
+- détail des alertes créées par la détection automatique (pistes, historique
+  de confiance) dans `detection_events` ;
+- lien vers la séquence vidéo avant/après l'événement (colonne `clip`) et
+  miniature de la photo jointe (colonne `thumbnail`) ;
+- index spatial R-tree sur les coordonnées (`lat`, `lng`), tenu à jour par
+  des triggers : recherche dans un rectangle ou un rayon, et regroupement
+  par grille pour l'affichage sur une carte, sans parcourir tout l'historique.
+"""
+import contextlib
+import json
+import math
+import sqlite3
+import threading
+import time
+
+ALERT_FIELDS = ('id', 'name', 'location', 'description', 'severity',
+                'status', 'image', 'timestamp', 'coordinates', 'clip', 'thumbnail')
+
+# Colonnes ajoutées après la création du schéma (bases existantes migrées à l'ouverture)
+ADDED_COLUMNS = {'clip': 'TEXT', 'thumbnail': 'TEXT', 'lat': 'REAL', 'lng': 'REAL'}
+
+EARTH_RADIUS_M = 6371008.8
+# Cellules de regroupement par tuile de carte (256 px) : une cellule d'environ 64 px
+CLUSTER_CELLS_PER_TILE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS citizen_alerts (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    location TEXT,
+    description TEXT,
+    severity TEXT,
+    status TEXT NOT NULL,
+    image TEXT,
+    timestamp TEXT NOT NULL,
+    coordinates TEXT,
+    clip TEXT,
+    thumbnail TEXT,
+    lat REAL,
+    lng REAL
+);
+CREATE INDEX IF NOT EXISTS idx_citizen_alerts_timestamp ON citizen_alerts (timestamp);
+CREATE INDEX IF NOT EXISTS idx_citizen_alerts_status ON citizen_alerts (status);
+CREATE TABLE IF NOT EXISTS detection_events (
+    alert_id TEXT PRIMARY KEY,
+    camera_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    max_confidence REAL,
+    frames INTEGER,
+    details TEXT
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS citizen_alerts_fts USING fts5(
+    location, description, content='citizen_alerts', content_rowid='seq'{tokenizer}
+);
+CREATE TRIGGER IF NOT EXISTS citizen_alerts_ai AFTER INSERT ON citizen_alerts BEGIN
+    INSERT INTO citizen_alerts_fts (rowid, location, description)
+    VALUES (new.seq, new.location, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS citizen_alerts_ad AFTER DELETE ON citizen_alerts BEGIN
+    INSERT INTO citizen_alerts_fts (citizen_alerts_fts, rowid, location, description)
+    VALUES ('delete', old.seq, old.location, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS citizen_alerts_au AFTER UPDATE OF location, description ON citizen_alerts BEGIN
+    INSERT INTO citizen_alerts_fts (citizen_alerts_fts, rowid, location, description)
+    VALUES ('delete', old.seq, old.location, old.description);
+    INSERT INTO citizen_alerts_fts (rowid, location, description)
+    VALUES (new.seq, new.location, new.description);
+END;
+"""
+
+
+GEO_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS citizen_alerts_geo USING rtree(seq, min_lat, max_lat, min_lng, max_lng);
+CREATE TRIGGER IF NOT EXISTS citizen_alerts_geo_ai AFTER INSERT ON citizen_alerts
+WHEN new.lat IS NOT NULL BEGIN
+    INSERT INTO citizen_alerts_geo VALUES (new.seq, new.lat, new.lat, new.lng, new.lng);
+END;
+CREATE TRIGGER IF NOT EXISTS citizen_alerts_geo_au AFTER UPDATE OF lat, lng ON citizen_alerts BEGIN
+    DELETE FROM citizen_alerts_geo WHERE seq = old.seq;
+    INSERT INTO citizen_alerts_geo SELECT new.seq, new.lat, new.lat, new.lng, new.lng WHERE new.lat IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS citizen_alerts_geo_ad AFTER DELETE ON citizen_alerts BEGIN
+    DELETE FROM citizen_alerts_geo WHERE seq = old.seq;
+END;
+"""
+
+
+def point(coordinates):
+    """(lat, lng) de coordonnées {'lat', 'lng'} ou [lat, lng] ; (None, None) sinon"""
+    if isinstance(coordinates, dict):
+        coordinates = (coordinates.get('lat'), coordinates.get('lng'))
+    if not coordinates or len(coordinates) != 2 or None in coordinates:
+        return None, None
+    lat, lng = float(coordinates[0]), float(coordinates[1])
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("Coordonnées hors limites")
+    return lat, lng
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Distance (haversine) en mètres ; fonction SQL `distance_m`"""
+    if None in (lat1, lng1, lat2, lng2):
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+def bbox_around(lat, lng, radius_m):
+    """Rectangle (ouest, sud, est, nord) contenant le cercle de rayon `radius_m`"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return (max(-180.0, lng - dlng), max(-90.0, lat - dlat), min(180.0, lng + dlng), min(90.0, lat + dlat))
+
+
+class AlertStore:
+    """Accès aux alertes citoyennes (une connexion SQLite par thread)"""
+
+    def __init__(self, path='alerts.db'):
+        self.path = path
+        self.local = threading.local()
+        self.fts_enabled = False
+        # Recherche par sous-chaîne (tokenizer trigram, SQLite >= 3.34)
+        self.fts_substring = False
+        # Index R-tree (module rtree de SQLite, présent dans la plupart des versions)
+        self.geo_enabled = False
+        # Appelé avec (opération, durée en secondes) après chaque requête (métriques)
+        self.query_observer = None
+        self.init_schema()
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.create_function('distance_m', 4, distance_m, deterministic=True)
+            self.local.conn = conn
+        return conn
+
+    def init_schema(self):
+        conn = self.connection()
+        with conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(citizen_alerts)')}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE citizen_alerts ADD COLUMN {column} {column_type}')
+            if 'lat' not in columns:
+                # Coordonnées déjà enregistrées (JSON) : remplir les colonnes indexées
+                for row in conn.execute('SELECT seq, coordinates FROM citizen_alerts '
+                                        'WHERE coordinates IS NOT NULL').fetchall():
+                    try:
+                        lat, lng = point(json.loads(row['coordinates']))
+                    except (TypeError, ValueError):
+                        continue
+                    conn.execute('UPDATE citizen_alerts SET lat = ?, lng = ? WHERE seq = ?',
+                                 (lat, lng, row['seq']))
+        self.init_geo_index(conn)
+        for tokenizer, substring in ((", tokenize='trigram'", True), ('', False)):
+            try:
+                with conn:
+                    conn.executescript(FTS_SCHEMA.format(tokenizer=tokenizer))
+                self.fts_enabled = True
+                self.fts_substring = substring
+                break
+            except sqlite3.OperationalError as e:
+                print(f"Index plein texte ({tokenizer or 'unicode61'}) indisponible: {e}")
+        if self.fts_enabled:
+            # Table virtuelle existante : vérifier le tokenizer réellement utilisé
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'citizen_alerts_fts'").fetchone()
+            self.fts_substring = row is not None and 'trigram' in row['sql']
+
+    def init_geo_index(self, conn):
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'citizen_alerts_geo'").fetchone() is not None
+        try:
+            with conn:
+                conn.executescript(GEO_SCHEMA)
+                if not exists:
+                    conn.execute('INSERT INTO citizen_alerts_geo SELECT seq, lat, lat, lng, lng '
+                                 'FROM citizen_alerts WHERE lat IS NOT NULL')
+            self.geo_enabled = True
+        except sqlite3.OperationalError as e:
+            # Sans R-tree : index B-tree sur la latitude (bande de latitude puis filtre)
+            print(f"Index spatial R-tree indisponible: {e}")
+            with conn:
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_citizen_alerts_lat '
+                             'ON citizen_alerts (lat) WHERE lat IS NOT NULL')
+
+    @contextlib.contextmanager
+    def timed(self, operation):
+        if self.query_observer is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.query_observer(operation, time.perf_counter() - start)
+
+    @staticmethod
+    def row_to_alert(row):
+        alert = {field: row[field] for field in ALERT_FIELDS}
+        if alert['coordinates']:
+            alert['coordinates'] = json.loads(alert['coordinates'])
+        if 'distance' in row.keys() and row['distance'] is not None:
+            alert['distance_km'] = round(row['distance'] / 1000, 3)
+        return alert
+
+    def create(self, alert):
+        """Insérer une alerte (une seule écriture indexée)"""
+        values = dict(alert)
+        values['lat'], values['lng'] = point(values.get('coordinates'))
+        if values.get('coordinates') is not None:
+            values['coordinates'] = json.dumps(values['coordinates'])
+        fields = ALERT_FIELDS + ('lat', 'lng')
+        conn = self.connection()
+        with self.timed('create'), conn:
+            conn.execute(
+                f"INSERT INTO citizen_alerts ({', '.join(fields)}) "
+                f"VALUES ({', '.join(':' + field for field in fields)})",
+                {field: values.get(field) for field in fields})
+        return alert
+
+    def get(self, alert_id):
+        with self.timed('get'):
+            row = self.connection().execute(
+                'SELECT * FROM citizen_alerts WHERE id = ?', (alert_id,)).fetchone()
+        return self.row_to_alert(row) if row is not None else None
+
+    def update_status(self, alert_id, status):
+        """Changer le statut d'une alerte.
+
+        Renvoie l'ancien statut, ou None si l'alerte n'existe pas.
+        """
+        conn = self.connection()
+        with self.timed('update_status'), conn:
+            # Transaction immédiate : lecture de l'ancien statut et écriture atomiques
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT status FROM citizen_alerts WHERE id = ?', (alert_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE citizen_alerts SET status = ? WHERE id = ?', (status, alert_id))
+        return row['status']
+
+    def update(self, alert_id, **fields):
+        """Modifier des champs d'une alerte (hors statut) ; False si l'alerte n'existe pas"""
+        # Le statut passe par update_status (transaction et statistiques)
+        unknown = set(fields) - (set(ALERT_FIELDS) - {'id', 'status'})
+        if unknown:
+            raise ValueError(f"Champs non modifiables: {', '.join(sorted(unknown))}")
+        if 'coordinates' in fields:
+            fields['lat'], fields['lng'] = point(fields['coordinates'])
+            if fields['coordinates'] is not None:
+                fields['coordinates'] = json.dumps(fields['coordinates'])
+        conn = self.connection()
+        with self.timed('update'), conn:
+            cursor = conn.execute(
+                f"UPDATE citizen_alerts SET {', '.join(f'{field} = :{field}' for field in fields)} "
+                f"WHERE id = :alert_id", dict(fields, alert_id=alert_id))
+        return cursor.rowcount > 0
+
+    def set_clip(self, alert_id, clip):
+        """Associer une séquence vidéo à une alerte ; False si l'alerte n'existe pas"""
+        return self.update(alert_id, clip=clip)
+
+    def fts_query(self, search):
+        """Requête FTS5 pour le paramètre `search`, ou None s'il faut passer par LIKE"""
+        if not self.fts_enabled:
+            return None
+        if self.fts_substring:
+            # Le tokenizer trigram exige au moins 3 caractères
+            if len(search) < 3:
+                return None
+            return '"' + search.replace('"', '""') + '"'
+        # Sans trigram : recherche par préfixe sur chaque mot
+        return ' '.join('"' + word.replace('"', '""') + '"*' for word in search.split())
+
+    def geo_conditions(self, bbox, near, conditions, params):
+        """Conditions exactes d'un rectangle (ouest, sud, est, nord) et d'un rayon
+        (lat, lng, mètres) ; renvoie le rectangle à chercher dans l'index"""
+        if near is not None:
+            lat, lng, radius = near
+            around = bbox_around(lat, lng, radius)
+            bbox = around if bbox is None else (max(bbox[0], around[0]), max(bbox[1], around[1]),
+                                                min(bbox[2], around[2]), min(bbox[3], around[3]))
+        if bbox is None:
+            return None
+        west, south, east, north = bbox
+        conditions.append('a.lat BETWEEN ? AND ? AND a.lng BETWEEN ? AND ?')
+        params.extend([south, north, west, east])
+        if near is not None:
+            conditions.append('distance_m(a.lat, a.lng, ?, ?) <= ?')
+            params.extend([lat, lng, radius])
+        return bbox
+
+    def list(self, status=None, search=None, limit=100, before=None, bbox=None, near=None):
+        """Alertes les plus récentes d'abord.
+
+        `status` : un statut ou une liste de statuts ; `bbox` : (ouest, sud, est,
+        nord) en degrés ; `near` : (lat, lng, rayon en mètres), chaque alerte
+        est alors complétée de `distance_km`.
+
+        Renvoie (alertes, curseur) ; le curseur est à passer dans `before` pour
+        obtenir la page suivante (None s'il n'y en a plus).
+        """
+        conditions, params = [], []
+        source, order = 'citizen_alerts a', 'a.seq'
+        search = (search or '').strip()
+        if search:
+            query = self.fts_query(search)
+            if query is not None:
+                # CROSS JOIN : parcourir l'index plein texte du plus récent au plus ancien
+                # et s'arrêter à `limit`, au lieu de partir de l'index sur le statut
+                source = 'citizen_alerts_fts f CROSS JOIN citizen_alerts a ON a.seq = f.rowid'
+                order = 'f.rowid'
+                conditions.append('citizen_alerts_fts MATCH ?')
+                params.append(query)
+            else:
+                pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                conditions.append("(a.location LIKE ? ESCAPE '\\' OR a.description LIKE ? ESCAPE '\\')")
+                params.extend([pattern, pattern])
+        area = self.geo_conditions(bbox, near, conditions, params)
+        if area is not None and self.geo_enabled:
+            west, south, east, north = area
+            if order == 'a.seq':
+                # CROSS JOIN : l'index R-tree fournit directement les alertes de la zone
+                source = 'citizen_alerts_geo g CROSS JOIN citizen_alerts a ON a.seq = g.seq'
+                order = 'g.seq'
+                conditions.append('g.max_lat >= ? AND g.min_lat <= ? AND g.max_lng >= ? AND g.min_lng <= ?')
+            else:
+                conditions.append('a.seq IN (SELECT seq FROM citizen_alerts_geo WHERE '
+                                  'max_lat >= ? AND min_lat <= ? AND max_lng >= ? AND min_lng <= ?)')
+            params.extend([south, north, west, east])
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            conditions.append(f"a.status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if before:
+            if not str(before).isdigit():
+                raise ValueError("Curseur de pagination invalide")
+            conditions.append(f'{order} < ?')
+            params.append(int(before))
+
+        columns, select_params = 'a.*', []
+        if near is not None:
+            columns += ', distance_m(a.lat, a.lng, ?, ?) AS distance'
+            select_params = [near[0], near[1]]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        operation = 'search' if search else 'geo' if area is not None else 'list'
+        with self.timed(operation):
+            rows = self.connection().execute(
+                f'SELECT {columns} FROM {source} {where} ORDER BY {order} DESC LIMIT ?',
+                select_params + params + [limit + 1]).fetchall()
+
+        alerts = [self.row_to_alert(row) for row in rows[:limit]]
+        cursor = str(rows[limit - 1]['seq']) if len(rows) > limit else None
+        return alerts, cursor
+
+    def cluster(self, zoom, bbox=None, status=None):
+        """Regroupement des alertes géolocalisées en cellules de grille, pour une carte.
+
+        La taille des cellules suit le niveau de zoom (0-22, tuiles de carte
+        web) ; une cellule ne contenant qu'une alerte renvoie son `alert_id`.
+        """
+        zoom = int(zoom)
+        if not 0 <= zoom <= 22:
+            raise ValueError("Le niveau de zoom doit être compris entre 0 et 22")
+        cell = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+        conditions, params = ['a.lat IS NOT NULL'], []
+        source = 'citizen_alerts a'
+        if bbox is not None:
+            self.geo_conditions(bbox, None, conditions, params)
+            if self.geo_enabled:
+                west, south, east, north = bbox
+                source = 'citizen_alerts_geo g CROSS JOIN citizen_alerts a ON a.seq = g.seq'
+                conditions.append('g.max_lat >= ? AND g.min_lat <= ? AND g.max_lng >= ? AND g.min_lng <= ?')
+                params.extend([south, north, west, east])
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            conditions.append(f"a.status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        with self.timed('cluster'):
+            rows = self.connection().execute(
+                # Coordonnées décalées (toujours positives) : CAST tronque comme floor
+                f"SELECT CAST((a.lat + 90) / ? AS INTEGER) AS cell_lat, "
+                f"CAST((a.lng + 180) / ? AS INTEGER) AS cell_lng, "
+                f"COUNT(*) AS count, AVG(a.lat) AS lat, AVG(a.lng) AS lng, "
+                f"SUM(a.severity = 'high') AS high, MAX(a.id) AS alert_id, "
+                f"MAX(a.timestamp) AS latest "
+                f"FROM {source} WHERE {' AND '.join(conditions)} GROUP BY cell_lat, cell_lng",
+                [cell, cell] + params).fetchall()
+        return [{
+            'lat': round(row['lat'], 6),
+            'lng': round(row['lng'], 6),
+            'count': row['count'],
+            'high_severity': row['high'],
+            'latest': row['latest'],
+            'alert_id': row['alert_id'] if row['count'] == 1 else None,
+        } for row in rows]
+
+    def count(self, status=None, since=None):
+        conditions, params = [], []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if since:
+            conditions.append('timestamp >= ?')
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self.timed('count'):
+            return self.connection().execute(
+                f'SELECT COUNT(*) FROM citizen_alerts {where}', params).fetchone()[0]
+
+    def count_by_status_severity(self):
+        """[(statut, gravité, nombre)] sur toutes les alertes"""
+        return [tuple(row) for row in self.connection().execute(
+            'SELECT status, severity, COUNT(*) FROM citizen_alerts GROUP BY status, severity')]
+
+    def count_by_period(self, since, prefix_length):
+        """[(période, nombre)] : alertes regroupées par préfixe d'horodatage ISO
+        (13 caractères = heure, 16 = minute), à partir de `since`"""
+        return [tuple(row) for row in self.connection().execute(
+            'SELECT substr(timestamp, 1, ?) AS period, COUNT(*) FROM citizen_alerts '
+            'WHERE timestamp >= ? GROUP BY period ORDER BY period',
+            (prefix_length, since))]
+
+    def save_detection_event(self, alert_id, event):
+        """Créer ou mettre à jour le détail d'un événement de détection automatique"""
+        conn = self.connection()
+        with self.timed('save_detection_event'), conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO detection_events '
+                '(alert_id, camera_id, started_at, ended_at, max_confidence, frames, details) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (alert_id, event['camera_id'], event['started_at'], event.get('ended_at'),
+                 event['max_confidence'], event['frames'], json.dumps(event)))
+
+    def get_detection_event(self, alert_id):
+        row = self.connection().execute(
+            'SELECT details FROM detection_events WHERE alert_id = ?', (alert_id,)).fetchone()
+        return json.loads(row['details']) if row is not None else None
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
@@ -0,0 +1,88 @@
+"""
+Benchmark du stockage des alertes : requêtes de /api/alerts sur une base
+SQLite temporaire remplie de N alertes synthétiques.
+
+Usage :
+    python benchmarks/bench_alert_store.py [--alerts 300000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_store import ALERT_FIELDS, AlertStore  # noqa: E402
+
+PLACES = ['Forêt de Fontainebleau', 'Massif des Maures', 'Landes de Gascogne',
+          'Forêt de Brocéliande', 'Parc du Mercantour', 'Vallée de la Roya']
+WORDS = ['fumée', 'flammes', 'odeur', 'brûlé', 'chaleur', 'cendres', 'route',
+         'village', 'colline', 'pins', 'vent', 'nuit', 'randonneur']
+
+
+def fill(store, count, rng):
+    start = datetime.datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'name': 'Anonyme',
+            'location': f"{rng.choice(PLACES)} secteur {rng.randrange(1000)}",
+            'description': ' '.join(rng.choice(WORDS) for _ in range(12)),
+            'severity': rng.choice(['low', 'medium', 'high']),
+            'status': rng.choice(['new', 'in_progress', 'resolved', 'resolved', 'resolved']),
+            'image': None,
+            'timestamp': (start + datetime.timedelta(seconds=60 * i)).isoformat(),
+            'coordinates': None,
+        })
+    conn = store.connection()
+    with conn:
+        conn.executemany(
+            f"INSERT INTO citizen_alerts ({', '.join(ALERT_FIELDS)}) "
+            f"VALUES ({', '.join(':' + field for field in ALERT_FIELDS)})", rows)
+    return rows
+
+
+def timed(label, func, repeat=20):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    print(f"  {label:<46} médiane {times[len(times) // 2] * 1000:7.2f} ms   max {times[-1] * 1000:7.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=300_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        rows = fill(store, args.alerts, rng)
+        print(f"{args.alerts} alertes insérées en {time.perf_counter() - start:.1f} s "
+              f"(FTS5: {store.fts_enabled}, sous-chaîne: {store.fts_substring})")
+
+        _, cursor = timed("liste (100 plus récentes)", lambda: store.list(limit=100))
+        timed("page suivante (curseur)", lambda: store.list(limit=100, before=cursor))
+        timed("statut = new", lambda: store.list(status='new', limit=100))
+        timed("recherche 'brocéliande'", lambda: store.list(search='brocéliande', limit=100))
+        timed("recherche 'secteur 42' + statut", lambda: store.list(status='new', search='secteur 42', limit=100))
+        timed("recherche courte 'pi'", lambda: store.list(search='pi', limit=100))
+        timed("comptage des dernières 24 h", lambda: store.count(since=rows[-1440]['timestamp']))
+        target = rows[len(rows) // 2]['id']
+        timed("mise à jour du statut", lambda: store.update_status(target, 'resolved'))
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Microbenchmark : analyseur MJPEG à tampon réutilisable vs boucle historique
+(`bytes_data += chunk` puis `find` depuis le début à chaque chunk).
+
+Usage :
+    python benchmarks/bench_mjpeg_parser.py [--frames 100] [--chunk 8192]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mjpeg_parser import MJPEGStreamParser  # noqa: E402
+
+
+def fake_jpeg(size, rng):
+    """Charge utile ressemblant à un JPEG : SOI, octets sans 0xFF, EOI"""
+    body = bytes(rng.randrange(0, 255) for _ in range(min(size, 4096)))
+    body = (body * (size // len(body) + 1))[:size]
+    return b'\xff\xd8' + body + b'\xff\xd9'
+
+
+def build_stream(frame_sizes, content_length, rng):
+    parts = []
+    for size in frame_sizes:
+        jpg = fake_jpeg(size, rng)
+        headers = b'--frame\r\nContent-Type: image/jpeg\r\n'
+        if content_length:
+            headers += b'Content-Length: ' + str(len(jpg)).encode() + b'\r\n'
+        parts.append(headers + b'\r\n' + jpg + b'\r\n')
+    return b''.join(parts)
+
+
+def chunks(data, chunk_size):
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+def legacy_parse(stream_chunks):
+    """Boucle de VideoCamera.update avant l'analyseur incrémental"""
+    frames = 0
+    total = 0
+    bytes_data = bytes()
+    for chunk in stream_chunks:
+        bytes_data += chunk
+        a = bytes_data.find(b'\xff\xd8')
+        b = bytes_data.find(b'\xff\xd9')
+        if a != -1 and b != -1:
+            jpg = bytes_data[a:b+2]
+            bytes_data = bytes_data[b+2:]
+            frames += 1
+            total += len(jpg)
+    return frames, total
+
+
+def parser_parse(stream_chunks, boundary):
+    frames = 0
+    total = 0
+    parser = MJPEGStreamParser(boundary)
+    for chunk in stream_chunks:
+        for jpg in parser.feed(chunk):
+            frames += 1
+            total += len(jpg)
+    return frames, total
+
+
+def bench(label, func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    frames = result[0]
+    print(f"  {label:<34} {best * 1000:9.1f} ms  {frames / best:10.0f} trames/s  ({frames} trames)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--chunk', type=int, default=8192)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for frame_size in (50_000, 200_000, 1_000_000):
+        sizes = [frame_size + rng.randrange(-frame_size // 10, frame_size // 10) for _ in range(args.frames)]
+        print(f"Trames de ~{frame_size // 1000} Ko, chunks de {args.chunk} octets")
+        for content_length in (False, True):
+            data = build_stream(sizes, content_length, rng)
+            stream_chunks = chunks(data, args.chunk)
+            suffix = "avec Content-Length" if content_length else "sans Content-Length"
+            # La boucle historique ne rend qu'une trame par chunk : même total attendu ici
+            # car chaque trame dépasse la taille d'un chunk.
+            legacy = bench(f"boucle historique ({suffix})", legacy_parse, stream_chunks)
+            current = bench(f"MJPEGStreamParser ({suffix})", parser_parse, stream_chunks, 'frame')
+            if legacy != current:
+                print(f"  ATTENTION : résultats différents {legacy} != {current}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
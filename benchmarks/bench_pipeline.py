@@ -0,0 +1,198 @@
+"""
+Benchmark de bout en bout du pipeline vidéo, sans caméra réelle : le serveur
+de remplacement rejoue des images en MJPEG, le serveur les capture, décode,
+analyse (modèle factice par défaut) et les encode pour des spectateurs
+simulés. Rapport : latence p50/p95/p99 par étape, images perdues, temps CPU
+et mémoire maximale.
+
+Usage :
+    python benchmarks/bench_pipeline.py [--source DOSSIER|VIDEO] [--fps 25]
+        [--duration 30] [--cameras 1] [--viewers 2] [--model last.pt]
+        [--json rapport.json] [--baseline reference.json]
+
+Avec `--baseline`, le code de sortie vaut 1 si le débit baisse ou si un p95
+augmente de plus de `--tolerance` (20 % par défaut) par rapport à la référence.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mjpeg_replay_server import ReplayServer, load_frames  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+
+
+def cpu_seconds():
+    if resource is None:
+        return time.process_time()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kio sous Linux, octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Viewer(threading.Thread):
+    """Spectateur de /video_feed : consomme le générateur MJPEG du serveur"""
+
+    def __init__(self, server, camera_id):
+        super().__init__(daemon=True)
+        self.frames = server.generate_frames(camera_id)
+        self.received = 0
+        self.stopped = False
+
+    def run(self):
+        for _ in self.frames:
+            if self.stopped:
+                break
+            self.received += 1
+
+
+def collect(server, replay, viewers, duration, cpu_used):
+    cameras = server.camera_manager.statuses()
+    stages = {}
+    drops = {'network_or_parse': replay.frames_sent - sum(c['pipeline']['source']['count'] for c in cameras),
+             'inference_scheduler': server.inference_scheduler.get_stats()['dropped']}
+    for camera in cameras:
+        pipeline = camera['pipeline']
+        prefix = f"{camera['id']}." if len(cameras) > 1 else ''
+        stages[prefix + 'capture_decode'] = pipeline['source']
+        for name, stats in pipeline['stages'].items():
+            stages[prefix + name] = stats
+        stages[prefix + 'jpeg_encode'] = camera['jpeg_encode']
+        stages[prefix + 'detection'] = camera['detection_latency']
+        stages[prefix + 'end_to_end'] = pipeline['end_to_end']
+        for name, queue in pipeline['queues'].items():
+            drops[f"{prefix}queue_{name}"] = queue['dropped']
+
+    published = sum(c['frames_received'] for c in cameras)
+    return {
+        'duration_s': duration,
+        'cameras': len(cameras),
+        'frames_sent': replay.frames_sent,
+        'frames_published': published,
+        'published_fps': round(published / duration, 2),
+        'viewer_fps': round(sum(v.received for v in viewers) / duration / max(1, len(viewers)), 2),
+        'detections_per_sec': round(server.inference_scheduler.frames / duration, 2),
+        'stages': stages,
+        'dropped': drops,
+        'cpu_seconds': round(cpu_used, 2),
+        'cpu_percent': round(100 * cpu_used / duration, 1),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def print_report(report):
+    print(f"\n{report['cameras']} caméra(s), {report['duration_s']:.0f} s : "
+          f"{report['frames_sent']} images envoyées, {report['frames_published']} publiées "
+          f"({report['published_fps']} images/s), {report['detections_per_sec']} détections/s, "
+          f"spectateurs {report['viewer_fps']} images/s")
+    print(f"\n  {'étape':<28}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report['stages'].items():
+        print(f"  {name:<28}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+    print("\n  images perdues : " + ', '.join(f"{name} {count}" for name, count in report['dropped'].items()))
+    print(f"  CPU : {report['cpu_seconds']} s ({report['cpu_percent']} % d'un cœur), "
+          f"mémoire max : {report['peak_rss_mb']} Mo")
+
+
+def compare(report, baseline, tolerance):
+    """Régressions par rapport à un rapport de référence"""
+    regressions = []
+    if report['published_fps'] < baseline['published_fps'] * (1 - tolerance):
+        regressions.append(f"débit {report['published_fps']} < {baseline['published_fps']} images/s")
+    for name, stats in report['stages'].items():
+        reference = baseline['stages'].get(name)
+        # Marge absolue d'1 ms : les étapes très rapides sont dominées par le bruit
+        if reference and stats['p95_ms'] > reference['p95_ms'] * (1 + tolerance) + 1.0:
+            regressions.append(f"{name} p95 {stats['p95_ms']} ms > {reference['p95_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', help="Dossier d'images JPEG ou fichier vidéo (défaut : images synthétiques)")
+    parser.add_argument('--fps', type=float, default=25.0)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--cameras', type=int, default=1)
+    parser.add_argument('--viewers', type=int, default=2, help="Spectateurs simulés par caméra")
+    parser.add_argument('--model', help="Modèle YOLO réel (défaut : modèle factice)")
+    parser.add_argument('--stub-batch-latency', type=float, default=0.01)
+    parser.add_argument('--stub-frame-latency', type=float, default=0.02)
+    parser.add_argument('--fire-every', type=int, default=0, help="Détection factice toutes les N images")
+    parser.add_argument('--json', help="Écrire le rapport JSON dans ce fichier")
+    parser.add_argument('--baseline', help="Rapport JSON de référence")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_pipeline_')
+    # Alertes automatiques éventuelles dans une base temporaire
+    os.environ['ALERTS_DB_PATH'] = os.path.join(tmp, 'alerts.db')
+
+    replay = ReplayServer(load_frames(args.source), args.fps).start()
+    import forest_protection_server as server
+    server.app.config['UPLOAD_FOLDER'] = tmp
+    if args.model:
+        server.MODEL_PATH = args.model
+    else:
+        server.shared_model = StubModel(args.stub_batch_latency, args.stub_frame_latency, args.fire_every)
+    server.create_app()
+    # Mesurer le régime établi : attendre la fin du chargement et du préchauffage
+    while server.model_state['status'] in ('loading', 'warming_up'):
+        time.sleep(0.1)
+
+    cpu_start = cpu_seconds()
+    start = time.time()
+    viewers = []
+    for i in range(args.cameras):
+        camera_id = f"bench-{i}"
+        if not args.model:
+            # Le modèle factice fournit déjà ses identifiants de piste : pas de ByteTrack
+            server.inference_scheduler.trackers[camera_id] = None
+        server.camera_manager.add(replay.url, camera_id)
+        for _ in range(args.viewers):
+            viewer = Viewer(server, camera_id)
+            viewer.start()
+            viewers.append(viewer)
+
+    time.sleep(args.duration)
+    duration = time.time() - start
+    report = collect(server, replay, viewers, duration, cpu_seconds() - cpu_start)
+
+    for viewer in viewers:
+        viewer.stopped = True
+    server.camera_manager.stop_all()
+    replay.stop()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"  RÉGRESSION : {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
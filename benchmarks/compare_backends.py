@@ -0,0 +1,171 @@
+"""
+Comparaison des moteurs d'inférence (latence et qualité de détection) sur un
+dossier d'images, pour choisir le plus rapide qui conserve la qualité.
+
+Usage :
+    python benchmarks/compare_backends.py --model last.pt --images DOSSIER
+        [--labels DOSSIER] [--backends torch,onnx,onnx-int8,openvino,openvino-int8]
+        [--batch 1] [--threads 0] [--max-drop 0.02]
+
+Avec `--labels` (annotations YOLO : `classe cx cy w h` normalisés, un .txt par
+image), la qualité est mesurée par rapport à la vérité terrain ; sinon par
+rapport aux détections du modèle PyTorch d'origine.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_backends import load_backend  # noqa: E402
+
+IOU_THRESHOLD = 0.5
+
+
+def load_images(folder, limit):
+    names = sorted(name for name in os.listdir(folder)
+                   if name.lower().endswith(('.jpg', '.jpeg', '.png')))[:limit]
+    return names, [cv2.imread(os.path.join(folder, name)) for name in names]
+
+
+def load_labels(folder, names, images):
+    """Boîtes de vérité terrain [(classe, x1, y1, x2, y2)] par image"""
+    labels = []
+    for name, image in zip(names, images):
+        height, width = image.shape[:2]
+        boxes = []
+        path = os.path.join(folder, os.path.splitext(name)[0] + '.txt')
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) < 5:
+                        continue
+                    cls, cx, cy, w, h = int(parts[0]), *(float(v) for v in parts[1:5])
+                    boxes.append((cls, (cx - w / 2) * width, (cy - h / 2) * height,
+                                  (cx + w / 2) * width, (cy + h / 2) * height))
+        labels.append(boxes)
+    return labels
+
+
+def result_boxes(result):
+    if result.boxes is None or len(result.boxes) == 0:
+        return []
+    return [(cls, *xyxy) for xyxy, cls in zip(result.boxes.xyxy.tolist(), result.boxes.cls.int().tolist())]
+
+
+def iou(a, b):
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    inter = width * height
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def match(predictions, references):
+    """Vrais positifs, faux positifs, faux négatifs (même classe, IoU >= 0.5)"""
+    tp = fp = fn = 0
+    for predicted, expected in zip(predictions, references):
+        unmatched = list(expected)
+        for cls, *box in predicted:
+            best = max(((iou(box, ref[1:]), ref) for ref in unmatched if ref[0] == cls),
+                       default=(0.0, None), key=lambda item: item[0])
+            if best[0] >= IOU_THRESHOLD:
+                unmatched.remove(best[1])
+                tp += 1
+            else:
+                fp += 1
+        fn += len(unmatched)
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def run_backend(backend, images, batch_size, repeat, predict_kwargs):
+    """Détections par image et temps par image (ms) de chaque lot"""
+    batches = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+    # Préchauffage (allocations, compilation des noyaux)
+    for _ in range(3):
+        backend.predict(source=batches[0], verbose=False, **predict_kwargs)
+    timings = []
+    predictions = []
+    for iteration in range(repeat):
+        for batch in batches:
+            start = time.perf_counter()
+            results = backend.predict(source=batch, verbose=False, **predict_kwargs)
+            timings.append((time.perf_counter() - start) * 1000 / len(batch))
+            if iteration == 0:
+                predictions.extend(result_boxes(result) for result in results)
+    timings.sort()
+    return predictions, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default='last.pt')
+    parser.add_argument('--images', required=True)
+    parser.add_argument('--labels')
+    parser.add_argument('--backends', default='torch,onnx,onnx-int8,openvino,openvino-int8')
+    parser.add_argument('--limit', type=int, default=200, help="Nombre maximal d'images")
+    parser.add_argument('--batch', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--conf', type=float, default=0.6)
+    parser.add_argument('--threads', type=int, default=0, help="Threads intra-opération (0 : défaut)")
+    parser.add_argument('--inter-threads', type=int, default=0)
+    parser.add_argument('--cache-dir', default='.model_cache')
+    parser.add_argument('--int8-data', help="Jeu de calibration YOLO pour OpenVINO INT8")
+    parser.add_argument('--max-drop', type=float, default=0.02, help="Perte de F1 tolérée")
+    args = parser.parse_args()
+
+    names, images = load_images(args.images, args.limit)
+    if not images:
+        sys.exit(f"Aucune image dans {args.images}")
+    references = load_labels(args.labels, names, images) if args.labels else None
+    predict_kwargs = {'conf': args.conf, 'imgsz': args.imgsz}
+
+    rows = []
+    for spec in args.backends.split(','):
+        backend_name, _, variant = spec.strip().partition('-')
+        try:
+            backend = load_backend(args.model, backend_name, int8=variant == 'int8', imgsz=args.imgsz,
+                                   intra_threads=args.threads, inter_threads=args.inter_threads,
+                                   cache_dir=args.cache_dir, int8_data=args.int8_data)
+            predictions, timings = run_backend(backend, images, args.batch, args.repeat, predict_kwargs)
+        except Exception as e:
+            print(f"  {spec}: indisponible ({e})")
+            continue
+        if references is None:
+            # Sans annotations : le premier moteur (PyTorch par défaut) sert de référence
+            references = predictions
+        precision, recall, f1 = match(predictions, references)
+        rows.append({
+            'backend': spec,
+            'p50_ms': timings[len(timings) // 2],
+            'p95_ms': timings[min(len(timings) - 1, len(timings) * 95 // 100)],
+            'fps': 1000 / (sum(timings) / len(timings)),
+            'precision': precision, 'recall': recall, 'f1': f1,
+        })
+
+    reference = 'annotations' if args.labels else 'premier moteur'
+    print(f"\n{len(images)} images, lots de {args.batch}, qualité mesurée par rapport à : {reference}\n")
+    print(f"  {'moteur':<16}{'p50 ms':>9}{'p95 ms':>9}{'img/s':>9}{'précision':>11}{'rappel':>9}{'F1':>7}")
+    for row in rows:
+        print(f"  {row['backend']:<16}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['fps']:>9.1f}"
+              f"{row['precision']:>11.3f}{row['recall']:>9.3f}{row['f1']:>7.3f}")
+    if rows:
+        best_f1 = max(row['f1'] for row in rows)
+        candidates = [row for row in rows if row['f1'] >= best_f1 - args.max_drop]
+        fastest = min(candidates, key=lambda row: row['p50_ms'])
+        backend_name, _, variant = fastest['backend'].partition('-')
+        print(f"\nRecommandé : {fastest['backend']} "
+              f"(INFERENCE_BACKEND={backend_name}{' INFERENCE_INT8=1' if variant == 'int8' else ''})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Serveur MJPEG de remplacement : rejoue un dossier d'images JPEG ou un fichier
+vidéo à une cadence donnée, comme la caméra de `CAMERA_URL`.
+
+Usage :
+    python benchmarks/mjpeg_replay_server.py [SOURCE] [--fps 25] [--port 8081]
+
+Sans SOURCE, des images synthétiques (640x480) sont générées.
+"""
+import argparse
+import os
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_broadcaster import BOUNDARY, multipart_chunk  # noqa: E402
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+
+
+def synthetic_frames(count=100, size=(640, 480)):
+    """Images JPEG générées : fond bruité et disque mobile (un peu de mouvement)"""
+    width, height = size
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        center = (int(width * (0.2 + 0.6 * i / count)), height // 2)
+        cv2.circle(frame, center, 40, (0, 80, 255), -1)
+        frames.append(cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])[1].tobytes())
+    return frames
+
+
+def load_frames(source=None, max_frames=1000):
+    """Octets JPEG de chaque image de la source (dossier, vidéo, ou synthétique)"""
+    if source is None:
+        return synthetic_frames()
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith(IMAGE_EXTENSIONS))
+        frames = []
+        for name in names[:max_frames]:
+            with open(os.path.join(source, name), 'rb') as f:
+                frames.append(f.read())
+    else:
+        # Vidéo : décodée et réencodée une seule fois, avant la diffusion
+        video = cv2.VideoCapture(source)
+        frames = []
+        while len(frames) < max_frames:
+            success, frame = video.read()
+            if not success:
+                break
+            frames.append(cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])[1].tobytes())
+        video.release()
+    if not frames:
+        raise ValueError(f"Aucune image lisible dans {source}")
+    return frames
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ReplayServer:
+    """Diffuse en boucle des images JPEG en multipart/x-mixed-replace"""
+
+    def __init__(self, frames, fps=25.0, host='127.0.0.1', port=0):
+        self.chunks = [multipart_chunk(jpeg) for jpeg in frames]
+        self.fps = fps
+        self.frames_sent = 0
+        self.clients = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', f"multipart/x-mixed-replace; boundary={BOUNDARY.decode()}")
+                self.end_headers()
+                server.stream(self.wfile)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def stream(self, wfile):
+        self.clients += 1
+        interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        next_time = time.perf_counter()
+        index = 0
+        try:
+            while True:
+                wfile.write(self.chunks[index % len(self.chunks)])
+                self.frames_sent += 1
+                index += 1
+                # Cadence fixe, sans dérive (rattrapage si l'écriture a pris du retard)
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            self.clients -= 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mjpeg-replay", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', help="Dossier d'images JPEG ou fichier vidéo")
+    parser.add_argument('--fps', type=float, default=25.0)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--max-frames', type=int, default=1000)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.max_frames)
+    server = ReplayServer(frames, args.fps, args.host, args.port)
+    print(f"{len(frames)} images rejouées à {args.fps} images/s sur {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
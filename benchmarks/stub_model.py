@@ -0,0 +1,68 @@
+"""
+Modèle factice compatible avec l'interface YOLO utilisée par le serveur
+(`predict`, `result.boxes`, `result.names`, `result.plot`), pour mesurer le
+pipeline sans `last.pt` ni GPU (machines d'intégration continue).
+
+Le coût d'inférence est simulé par une attente configurable : un coût fixe
+par lot plus un coût par image, comme un vrai modèle exécuté par lots.
+"""
+import time
+
+import cv2
+
+
+class Values(list):
+    """Liste imitant les méthodes des tenseurs utilisées par le serveur"""
+
+    def tolist(self):
+        return list(self)
+
+    def int(self):
+        return Values(int(value) for value in self)
+
+
+class StubBoxes:
+    def __init__(self, detections):
+        self.xyxy = Values(box for box, _, _ in detections)
+        self.conf = Values(conf for _, conf, _ in detections)
+        self.cls = Values(0 for _ in detections)
+        self.id = Values(track_id for _, _, track_id in detections) if detections else None
+
+    def __len__(self):
+        return len(self.xyxy)
+
+
+class StubResult:
+    names = {0: 'fire'}
+
+    def __init__(self, detections):
+        self.boxes = StubBoxes(detections)
+
+    def plot(self, img=None):
+        for x1, y1, x2, y2 in self.boxes.xyxy:
+            cv2.rectangle(img, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 2)
+        return img
+
+
+class StubModel:
+    """Remplace YOLO : latence simulée et détection « feu » toutes les `fire_every` images"""
+
+    def __init__(self, batch_latency=0.01, frame_latency=0.02, fire_every=0):
+        self.batch_latency = batch_latency
+        self.frame_latency = frame_latency
+        self.fire_every = fire_every
+        self.frames = 0
+
+    def predict(self, source, verbose=False, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        time.sleep(self.batch_latency + self.frame_latency * len(frames))
+        results = []
+        for frame in frames:
+            self.frames += 1
+            detections = []
+            if self.fire_every and self.frames % self.fire_every == 0:
+                height, width = frame.shape[:2]
+                box = [width * 0.4, height * 0.4, width * 0.6, height * 0.6]
+                detections.append((box, 0.9, 1))
+            results.append(StubResult(detections))
+        return results
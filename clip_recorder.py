@@ -0,0 +1,245 @@
+"""
+Enregistrement de séquences avant/après un événement (détection de feu ou
+déclenchement manuel).
+
+Chaque caméra alimente un tampon circulaire d'images JPEG déjà encodées
+(celles du diffuseur : pas de second encodage si un spectateur regarde),
+borné en durée et en mémoire. Un déclenchement copie le tampon (pré-roll),
+continue d'ajouter les images pendant le post-roll, puis confie la séquence
+à un thread d'écriture. La capture et l'inférence ne sont jamais bloquées :
+la lecture des images se fait dans le thread de l'enregistreur, l'écriture
+sur disque dans un autre.
+
+Formats : `mjpeg` (parties multipart horodatées, rejouées à la bonne cadence
+par le serveur) ou `mp4` (OpenCV VideoWriter, lisible dans `<video>`).
+"""
+import collections
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_broadcaster import BOUNDARY
+
+
+class FrameRingBuffer:
+    """Dernières images JPEG d'une caméra, bornées en durée et en octets"""
+
+    def __init__(self, duration=10.0, max_bytes=32 * 1024 * 1024):
+        self.duration = duration
+        self.max_bytes = max_bytes
+        self.frames = collections.deque()
+        self.bytes = 0
+        self.evicted = 0
+
+    def append(self, timestamp, jpeg):
+        self.frames.append((timestamp, jpeg))
+        self.bytes += len(jpeg)
+        while self.frames and (self.bytes > self.max_bytes or timestamp - self.frames[0][0] > self.duration):
+            _, old = self.frames.popleft()
+            self.bytes -= len(old)
+            self.evicted += 1
+
+    def snapshot(self):
+        return list(self.frames)
+
+
+class Recording:
+    """Séquence en cours : pré-roll copié au déclenchement, puis post-roll"""
+
+    def __init__(self, clip_id, camera_id, frames, ends_at, max_bytes, reason):
+        self.clip_id = clip_id
+        self.camera_id = camera_id
+        self.frames = frames
+        self.bytes = sum(len(jpeg) for _, jpeg in frames)
+        self.ends_at = ends_at
+        self.max_bytes = max_bytes
+        self.reason = reason
+
+    def append(self, timestamp, jpeg):
+        # Plafond mémoire : les images au-delà sont ignorées (séquence tronquée)
+        if self.bytes + len(jpeg) <= self.max_bytes:
+            self.frames.append((timestamp, jpeg))
+            self.bytes += len(jpeg)
+
+
+class ClipRecorder:
+    """Tampons des caméras, déclenchements et écriture des séquences"""
+
+    def __init__(self, output_dir, fps=5.0, pre_roll=10.0, post_roll=10.0,
+                 max_bytes=32 * 1024 * 1024, clip_format='mjpeg'):
+        self.output_dir = output_dir
+        self.fps = fps
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_bytes = max_bytes
+        self.clip_format = clip_format
+        self.lock = threading.Lock()
+        # camera_id -> (source des images, tampon, dernière séquence lue)
+        self.cameras = {}
+        self.recordings = []
+        self.write_queue = queue.Queue()
+        self.stopped = False
+        self.threads = []
+        # Statistiques
+        self.clips_written = 0
+        self.write_errors = 0
+
+    def start(self):
+        if not self.threads:
+            self.stopped = False
+            for target, name in ((self.run, 'clip-recorder'), (self.run_writer, 'clip-writer')):
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stopped = True
+        self.write_queue.put(None)
+
+    def add_camera(self, camera_id, frame_source):
+        """`frame_source()` renvoie (séquence, octets JPEG) de la dernière image, ou None"""
+        with self.lock:
+            self.cameras[camera_id] = [frame_source, FrameRingBuffer(self.pre_roll, self.max_bytes), 0]
+
+    def remove_camera(self, camera_id):
+        """Caméra arrêtée : terminer ses séquences en cours avec les images déjà reçues"""
+        with self.lock:
+            self.cameras.pop(camera_id, None)
+            finished = [r for r in self.recordings if r.camera_id == camera_id]
+            self.recordings = [r for r in self.recordings if r.camera_id != camera_id]
+        for recording in finished:
+            self.write_queue.put(recording)
+
+    def trigger(self, camera_id, clip_id, reason='manual'):
+        """Démarrer une séquence (pré-roll + post-roll) ; False si la caméra est inconnue"""
+        with self.lock:
+            entry = self.cameras.get(camera_id)
+            if entry is None:
+                return False
+            if any(r.clip_id == clip_id for r in self.recordings):
+                return True
+            self.recordings.append(Recording(clip_id, camera_id, entry[1].snapshot(),
+                                             time.time() + self.post_roll, self.max_bytes, reason))
+        return True
+
+    def path(self, clip_id):
+        extension = 'mp4' if self.clip_format == 'mp4' else 'mjpeg'
+        return os.path.join(self.output_dir, f"{clip_id}.{extension}")
+
+    def is_recording(self, clip_id):
+        with self.lock:
+            return any(r.clip_id == clip_id for r in self.recordings)
+
+    def run(self):
+        interval = 1.0 / self.fps
+        while not self.stopped:
+            started = time.time()
+            with self.lock:
+                cameras = list(self.cameras.items())
+            for camera_id, entry in cameras:
+                frame_source, ring, last_sequence = entry
+                try:
+                    latest = frame_source()
+                except Exception as e:
+                    print(f"[{camera_id}] Erreur de lecture pour l'enregistrement: {e}")
+                    continue
+                if latest is None or latest[0] == last_sequence:
+                    continue
+                entry[2] = latest[0]
+                with self.lock:
+                    ring.append(started, latest[1])
+                    for recording in self.recordings:
+                        if recording.camera_id == camera_id:
+                            recording.append(started, latest[1])
+
+            # Séquences dont le post-roll est terminé : au thread d'écriture
+            with self.lock:
+                finished = [r for r in self.recordings if r.ends_at <= started]
+                self.recordings = [r for r in self.recordings if r.ends_at > started]
+            for recording in finished:
+                self.write_queue.put(recording)
+            time.sleep(max(0.0, interval - (time.time() - started)))
+
+    def run_writer(self):
+        while True:
+            recording = self.write_queue.get()
+            if recording is None:
+                break
+            try:
+                self.write(recording)
+                self.clips_written += 1
+            except Exception as e:
+                self.write_errors += 1
+                print(f"[{recording.camera_id}] Erreur d'écriture de la séquence {recording.clip_id}: {e}")
+
+    def write(self, recording):
+        if not recording.frames:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = self.path(recording.clip_id)
+        temporary = path + '.tmp'
+        if self.clip_format == 'mp4':
+            self.write_mp4(recording, temporary)
+        else:
+            with open(temporary, 'wb') as f:
+                for timestamp, jpeg in recording.frames:
+                    f.write(b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n'
+                            b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n'
+                            b'X-Timestamp: ' + f"{timestamp:.3f}".encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+        # Renommage atomique : le fichier n'est servi qu'une fois complet
+        os.replace(temporary, path)
+        duration = recording.frames[-1][0] - recording.frames[0][0]
+        print(f"[{recording.camera_id}] Séquence {recording.clip_id} enregistrée "
+              f"({len(recording.frames)} images, {duration:.1f} s)")
+
+    def write_mp4(self, recording, path):
+        first = cv2.imdecode(np.frombuffer(recording.frames[0][1], dtype=np.uint8), cv2.IMREAD_COLOR)
+        height, width = first.shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (width, height))
+        try:
+            for _, jpeg in recording.frames:
+                frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    continue
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height))
+                writer.write(frame)
+        finally:
+            writer.release()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'cameras': len(self.cameras),
+                'buffered_bytes': sum(entry[1].bytes for entry in self.cameras.values()),
+                'recording': len(self.recordings),
+                'pending_writes': self.write_queue.qsize(),
+                'clips_written': self.clips_written,
+                'write_errors': self.write_errors,
+            }
+
+
+def read_mjpeg_clip(path):
+    """Images (horodatage, JPEG) d'une séquence enregistrée au format mjpeg"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    frames = []
+    position = 0
+    while True:
+        header_end = data.find(b'\r\n\r\n', position)
+        if header_end == -1:
+            break
+        headers = {}
+        for line in data[position:header_end].split(b'\r\n')[1:]:
+            key, _, value = line.partition(b':')
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get(b'content-length', 0))
+        start = header_end + 4
+        frames.append((float(headers.get(b'x-timestamp', 0)), data[start:start + length]))
+        position = start + length + 2
+    return frames
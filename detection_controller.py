@@ -0,0 +1,106 @@
+"""
+Choix adaptatif des images envoyées au modèle, caméra par caméra.
+
+L'intervalle entre deux détections dépend :
+- du coût mesuré d'une inférence et du budget CPU réservé à la détection,
+  partagé entre les caméras actives (intervalle minimal) ;
+- d'un score de mouvement calculé avec NumPy sur une version réduite en
+  niveaux de gris : une scène forestière immobile est analysée rarement, une
+  scène qui change l'est aussi souvent que le budget le permet ;
+- d'un plafond : aucune caméra ne reste plus de `max_interval` secondes sans
+  détection, pour garantir un délai maximal de détection d'un départ de feu.
+"""
+import numpy as np
+
+
+def motion_signature(frame, size=(80, 60)):
+    """Image réduite (par sous-échantillonnage) en niveaux de gris, en float32"""
+    height, width = frame.shape[:2]
+    step_y = max(1, height // size[1])
+    step_x = max(1, width // size[0])
+    small = frame[::step_y, ::step_x]
+    if small.ndim == 3:
+        small = small.mean(axis=2, dtype=np.float32)
+    return small.astype(np.float32, copy=False)
+
+
+class AdaptiveDetectionController:
+    """Décide, pour chaque image d'une caméra, s'il faut lancer une détection"""
+
+    def __init__(self, min_interval=0.1, max_interval=2.0, cpu_budget=0.8,
+                 motion_low=0.01, motion_high=0.05, detection_hold=10.0,
+                 cost_getter=None, cameras_getter=None):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.cpu_budget = cpu_budget
+        self.motion_low = motion_low
+        self.motion_high = motion_high
+        # Après une détection positive, échantillonner au maximum pendant ce délai
+        self.detection_hold = detection_hold
+        # Coût d'inférence par image (s) et nombre de caméras actives
+        self.cost_getter = cost_getter or (lambda: 0.0)
+        self.cameras_getter = cameras_getter or (lambda: 1)
+        self.reference = None
+        self.last_detection_time = None
+        self.last_positive_time = None
+        self.motion = 0.0
+        self.interval = min_interval
+        # True si la dernière image retenue l'a été seulement au titre de l'intervalle
+        # maximal (scène immobile) : elle doit vraiment passer par le modèle
+        self.forced = False
+        self.frames_seen = 0
+        self.frames_selected = 0
+
+    def budget_interval(self):
+        """Intervalle minimal permis par le budget CPU partagé entre les caméras"""
+        cameras = max(1, self.cameras_getter())
+        cost = max(0.0, self.cost_getter())
+        if self.cpu_budget <= 0:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, cost * cameras / self.cpu_budget))
+
+    def target_interval(self, now):
+        fastest = self.budget_interval()
+        if self.last_positive_time is not None and now - self.last_positive_time < self.detection_hold:
+            return fastest
+        if self.motion >= self.motion_high:
+            return fastest
+        if self.motion <= self.motion_low:
+            return self.max_interval
+        # Interpolation géométrique entre l'intervalle le plus court et le plafond
+        ratio = (self.motion - self.motion_low) / (self.motion_high - self.motion_low)
+        return self.max_interval * (fastest / self.max_interval) ** ratio
+
+    def should_detect(self, frame, now):
+        """Appelé pour chaque image : True si elle doit être envoyée au modèle"""
+        self.frames_seen += 1
+        signature = motion_signature(frame)
+        if self.reference is None or self.reference.shape != signature.shape:
+            self.motion = 1.0
+        else:
+            # Changement depuis la dernière image analysée
+            self.motion = float(np.abs(signature - self.reference).mean()) / 255.0
+
+        self.interval = self.target_interval(now)
+        if self.last_detection_time is not None and now - self.last_detection_time < self.interval:
+            return False
+
+        self.reference = signature
+        self.last_detection_time = now
+        self.forced = self.interval >= self.max_interval
+        self.frames_selected += 1
+        return True
+
+    def record_result(self, detections, now):
+        """Nombre d'objets (feu/fumée) détectés dans la dernière image analysée"""
+        if detections:
+            self.last_positive_time = now
+
+    def get_stats(self):
+        return {
+            'interval_s': round(self.interval, 3),
+            'motion': round(self.motion, 4),
+            'frames_seen': self.frames_seen,
+            'frames_selected': self.frames_selected,
+            'frames_skipped': self.frames_seen - self.frames_selected,
+        }
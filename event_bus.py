@@ -0,0 +1,129 @@
+"""
+Bus d'événements diffusés aux navigateurs en Server-Sent Events (SSE).
+
+Les événements (nouvelle alerte, changement de statut, détection YOLO...) sont
+numérotés et conservés dans un historique borné. Chaque client suit sa
+position dans cet historique : un client lent ou reconnecté (en-tête
+`Last-Event-ID`) reçoit les événements manqués, ou un événement `resync`
+s'ils ne sont plus dans l'historique et qu'il doit recharger ses données.
+
+En mode production (plusieurs processus), le processus de capture numérote
+tous les événements et les recopie dans un journal partagé (`listener`) ; les
+processus web lui transmettent les leurs (`forward`) et reçoivent ceux du
+journal avec leurs identifiants d'origine (`ingest`).
+"""
+import collections
+import itertools
+import json
+import threading
+import time
+
+
+class EventBus:
+    """Historique borné d'événements et diffusion aux abonnés SSE"""
+
+    def __init__(self, history_size=1000, keepalive=15.0):
+        self.history = collections.deque(maxlen=history_size)
+        self.condition = threading.Condition()
+        self.last_id = 0
+        self.keepalive = keepalive
+        self.subscribers = 0
+        # listener(id, type, données) : appelé dans l'ordre des ids, sous le verrou
+        self.listener = None
+        # forward(type, données) : publication déléguée à un autre processus
+        self.forward = None
+
+    def publish(self, event_type, data):
+        """Publier un événement (appel non bloquant, depuis n'importe quel thread)"""
+        if self.forward is not None:
+            self.forward(event_type, data)
+            return None
+        with self.condition:
+            self.last_id += 1
+            self.history.append((self.last_id, event_type, data))
+            if self.listener is not None:
+                self.listener(self.last_id, event_type, data)
+            self.condition.notify_all()
+            return self.last_id
+
+    def ingest(self, event_id, event_type, data):
+        """Ajouter un événement déjà numéroté par un autre processus"""
+        with self.condition:
+            if event_id <= self.last_id:
+                return
+            if event_id != self.last_id + 1:
+                # Événements manqués : les clients en retard devront se resynchroniser
+                self.history.clear()
+            self.last_id = event_id
+            self.history.append((event_id, event_type, data))
+            self.condition.notify_all()
+
+    def events_after(self, cursor):
+        """Événements d'id > cursor ; None si certains ont quitté l'historique"""
+        if not self.history or cursor >= self.last_id:
+            return []
+        first_id = self.history[0][0]
+        if cursor < first_id - 1:
+            return None
+        # Les ids sont consécutifs : position dans l'historique
+        return list(itertools.islice(self.history, cursor - first_id + 1, None))
+
+    @staticmethod
+    def format_event(event_id, event_type, data):
+        return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+    def stream(self, last_event_id=None, types=None):
+        """Générateur SSE pour un client ; `types` limite les types d'événements envoyés"""
+        with self.condition:
+            self.subscribers += 1
+            cursor = self.last_id if last_event_id is None else last_event_id
+            # Id inconnu (serveur redémarré depuis) : repartir de l'état courant
+            stale = cursor > self.last_id
+            if stale:
+                cursor = self.last_id
+        try:
+            # Délai de reconnexion conseillé au navigateur
+            yield "retry: 3000\n\n"
+            if stale:
+                yield self.format_event(cursor, 'resync', {})
+            while True:
+                with self.condition:
+                    if cursor >= self.last_id:
+                        self.condition.wait(self.keepalive)
+                    events = self.events_after(cursor)
+                    last_id = self.last_id
+
+                if events is None:
+                    # Trop en retard : le client doit recharger l'état complet
+                    cursor = last_id
+                    yield self.format_event(last_id, 'resync', {})
+                    continue
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+
+                chunks = []
+                for event_id, event_type, data in events:
+                    if types is None or event_type in types:
+                        chunks.append(self.format_event(event_id, event_type, data))
+                    cursor = event_id
+                if chunks:
+                    yield ''.join(chunks)
+        finally:
+            with self.condition:
+                self.subscribers -= 1
+
+
+class Throttle:
+    """Limiter la fréquence d'un événement par clé (ex. détections par caméra)"""
+
+    def __init__(self, min_interval=0.5):
+        self.min_interval = min_interval
+        self.last_sent = {}
+
+    def allow(self, key, now=None):
+        now = now if now is not None else time.time()
+        if now - self.last_sent.get(key, 0) < self.min_interval:
+            return False
+        self.last_sent[key] = now
+        return True
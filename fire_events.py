@@ -0,0 +1,256 @@
+"""
+Extraction d'événements « départ de feu » à partir des détections YOLO.
+
+Une détection isolée ne suffit pas à lever une alerte : il faut qu'au moins
+`min_hits` des `window` dernières images analysées d'une caméra contiennent
+un feu (ou de la fumée) au-dessus du seuil de confiance. Un feu qui dure
+reste un seul événement : les détections sont rattachées à l'événement
+ouvert par leur identifiant de suivi (ByteTrack), ou à défaut par
+recouvrement des boîtes, et l'événement se ferme après `close_after`
+secondes sans détection. Un résultat repris du cache d'images (image figée
+ou quasi identique, `reused`) n'est pas une nouvelle observation : il
+prolonge les événements ouverts mais ne compte pas dans l'anti-rebond, sans
+quoi une seule inférence sur une image figée suffirait à lever une alerte.
+Un résumé de l'événement ouvert (boîte, confiance)
+est transmis toutes les `update_interval` secondes (corrélation en incidents).
+
+Le suivi se fait dans le thread d'inférence en quelques microsecondes ;
+l'encodage de l'image, l'écriture des fichiers et de la base sont confiés à
+un thread d'écriture pour ne jamais ralentir l'inférence.
+"""
+import collections
+import queue
+import threading
+import uuid
+
+
+def box_overlap(a, b):
+    """Intersection / plus petite des deux aires (1.0 si une boîte contient l'autre)"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    smallest = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return width * height / smallest if smallest > 0 else 0.0
+
+
+def union_box(boxes):
+    return [min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes)]
+
+
+class FireEvent:
+    """Un feu suivi dans le temps sur une caméra (une alerte)"""
+
+    def __init__(self, camera_id, now, history_size):
+        self.id = str(uuid.uuid4())
+        self.camera_id = camera_id
+        self.started_at = now
+        self.last_seen = now
+        self.ended_at = None
+        self.tracks = set()
+        self.labels = collections.Counter()
+        self.bbox = None
+        # (largeur, hauteur) de l'image analysée : position de la boîte dans le champ
+        self.frame_size = None
+        self.max_confidence = 0.0
+        self.confidence = 0.0
+        self.frames = 0
+        self.last_update = now
+        # (horodatage, confiance max de l'image) ; les plus anciennes valeurs sont oubliées
+        self.history = collections.deque(maxlen=history_size)
+
+    def add(self, detections, now):
+        confidence = max(d['confidence'] for d in detections)
+        self.last_seen = now
+        self.frames += 1
+        self.max_confidence = max(self.max_confidence, confidence)
+        self.confidence = confidence
+        self.bbox = union_box([d['bbox'] for d in detections])
+        self.history.append((round(now, 3), confidence))
+        for d in detections:
+            self.labels[d['label']] += 1
+            if d.get('track_id') is not None:
+                self.tracks.add(d['track_id'])
+
+    def matches(self, detection, min_overlap):
+        if detection.get('track_id') is not None and detection['track_id'] in self.tracks:
+            return True
+        return self.bbox is not None and box_overlap(self.bbox, detection['bbox']) >= min_overlap
+
+    def summary(self):
+        """État courant, sans l'historique (mises à jour périodiques)"""
+        return {
+            'id': self.id,
+            'camera_id': self.camera_id,
+            'last_seen': self.last_seen,
+            'bbox': self.bbox,
+            'frame_size': self.frame_size,
+            'confidence': round(self.confidence, 3),
+            'max_confidence': round(self.max_confidence, 3),
+        }
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'camera_id': self.camera_id,
+            'started_at': self.started_at,
+            'last_seen': self.last_seen,
+            'ended_at': self.ended_at,
+            'tracks': sorted(self.tracks),
+            'labels': dict(self.labels),
+            'bbox': self.bbox,
+            'frame_size': self.frame_size,
+            'confidence': round(self.confidence, 3),
+            'max_confidence': round(self.max_confidence, 3),
+            'frames': self.frames,
+            'history': list(self.history),
+        }
+
+
+class FireEventTracker:
+    """Anti-rebond N images sur M et fusion des détections en événements, par caméra"""
+
+    def __init__(self, on_open=None, on_close=None, on_update=None, window=10, min_hits=6,
+                 min_confidence=0.6, close_after=60.0, min_overlap=0.3,
+                 labels=None, history_size=500, update_interval=5.0):
+        self.window = window
+        self.min_hits = min(min_hits, window)
+        self.min_confidence = min_confidence
+        self.close_after = close_after
+        self.min_overlap = min_overlap
+        # Classes retenues (None : toutes les classes du modèle feu/fumée)
+        self.labels = set(labels) if labels else None
+        self.history_size = history_size
+        self.on_open = on_open
+        self.on_close = on_close
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.lock = threading.Lock()
+        # camera_id -> fenêtre glissante (True si l'image contenait un feu)
+        self.hits = {}
+        # camera_id -> événements ouverts
+        self.open_events = {}
+        self.events_opened = 0
+        self.events_closed = 0
+        self.frames_observed = 0
+        self.frames_reused = 0
+        # Écritures (image, alerte, base) hors du thread d'inférence
+        self.actions = queue.Queue()
+        self.writer = None
+        self.writer_errors = 0
+
+    def start(self):
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.run_writer, name="fire-events", daemon=True)
+            self.writer.start()
+        return self
+
+    def stop(self):
+        with self.lock:
+            for camera_id in list(self.open_events):
+                self.close_camera(camera_id, None)
+        if self.writer is not None:
+            self.actions.put(None)
+            self.writer.join(timeout=5.0)
+            self.writer = None
+
+    def relevant(self, detections):
+        return [d for d in detections
+                if d['confidence'] >= self.min_confidence
+                and (self.labels is None or d['label'] in self.labels)]
+
+    def observe(self, camera_id, frame, detections, now, reused=False):
+        """Appelé pour chaque image analysée (thread d'inférence) ; ne bloque jamais.
+
+        `reused` : détections reprises du cache, sans nouvelle inférence.
+        """
+        detections = self.relevant(detections)
+        with self.lock:
+            self.frames_observed += 1
+            hits = self.hits.get(camera_id)
+            if hits is None:
+                hits = self.hits[camera_id] = collections.deque(maxlen=self.window)
+            if reused:
+                self.frames_reused += 1
+            else:
+                hits.append(bool(detections))
+            events = self.open_events.setdefault(camera_id, [])
+
+            # Rattacher chaque détection à un événement ouvert (même piste ou même zone)
+            matched = collections.defaultdict(list)
+            unmatched = []
+            for detection in detections:
+                event = next((e for e in events if e.matches(detection, self.min_overlap)), None)
+                if event is not None:
+                    matched[event].append(detection)
+                else:
+                    unmatched.append(detection)
+            frame_size = (frame.shape[1], frame.shape[0]) if frame is not None else None
+            for event, event_detections in matched.items():
+                event.add(event_detections, now)
+                event.frame_size = frame_size or event.frame_size
+                if self.on_update is not None and now - event.last_update >= self.update_interval:
+                    event.last_update = now
+                    self.actions.put(('update', event.summary(), None))
+
+            # Nouveau feu confirmé par l'anti-rebond : un seul événement pour l'image
+            if unmatched and not reused and sum(hits) >= self.min_hits:
+                event = FireEvent(camera_id, now, self.history_size)
+                event.add(unmatched, now)
+                event.frame_size = frame_size
+                events.append(event)
+                self.events_opened += 1
+                # Copie de l'image uniquement à l'ouverture (rare)
+                self.actions.put(('open', event.to_dict(), frame.copy() if frame is not None else None))
+
+            # Fermer les événements sans détection depuis `close_after` secondes
+            for event in [e for e in events if now - e.last_seen > self.close_after]:
+                self.close_event(events, event, now)
+
+    def close_event(self, events, event, now):
+        events.remove(event)
+        event.ended_at = event.last_seen if now is None else min(now, event.last_seen + self.close_after)
+        self.events_closed += 1
+        self.actions.put(('close', event.to_dict(), None))
+
+    def close_camera(self, camera_id, now):
+        events = self.open_events.pop(camera_id, [])
+        for event in list(events):
+            self.close_event(events, event, now)
+
+    def forget(self, camera_id):
+        """Caméra arrêtée : clôturer ses événements et oublier son état"""
+        with self.lock:
+            self.close_camera(camera_id, None)
+            self.hits.pop(camera_id, None)
+
+    def run_writer(self):
+        while True:
+            action = self.actions.get()
+            if action is None:
+                break
+            kind, event, frame = action
+            handler = {'open': self.on_open, 'close': self.on_close, 'update': self.on_update}[kind]
+            if handler is None:
+                continue
+            try:
+                if kind == 'open':
+                    handler(event, frame)
+                else:
+                    handler(event)
+            except Exception as e:
+                self.writer_errors += 1
+                print(f"Erreur d'enregistrement de l'événement {event['id']}: {e}")
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'frames_observed': self.frames_observed,
+                'frames_reused': self.frames_reused,
+                'open_events': sum(len(events) for events in self.open_events.values()),
+                'events_opened': self.events_opened,
+                'events_closed': self.events_closed,
+                'pending_writes': self.actions.qsize(),
+                'writer_errors': self.writer_errors,
+            }
@@ -1,45 +1,121 @@
 import os
+import importlib.util
+import signal
 import cv2
 import time
 import threading
 import numpy as np
 import datetime
 import json
+import math
 import base64
+import tempfile
 import uuid
-from flask import Flask, render_template, Response, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, Response, request, jsonify, redirect, url_for, flash, session, g, send_file, send_from_directory
 from werkzeug.utils import secure_filename
-import torch
-
-# Importation de YOLO
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-    print("Module YOLOv8 trouvé et chargé avec succès")
-except ImportError:
-    YOLO_AVAILABLE = False
+from inference_backends import load_backend, make_result, result_to_array
+from inference_scheduler import InferenceScheduler
+from mjpeg_parser import MJPEGStreamParser
+from frame_broadcaster import FrameBroadcaster, multipart_chunk
+from frame_pipeline import FramePipeline, FramePacket, StageStats
+from detection_controller import AdaptiveDetectionController
+from alert_store import AlertStore
+from alert_stats import AlertStats
+from event_bus import EventBus, Throttle
+from fire_events import FireEventTracker
+from frame_cache import FrameCache, jpeg_digest, perceptual_hash
+from incidents import IncidentCorrelator, validate_position
+from roi_tiling import TiledDetector, validate_config as validate_tiling_config
+from image_ingest import ImageIngestor
+from clip_recorder import ClipRecorder, read_mjpeg_clip
+from shared_state import (ControlClient, ControlServer, FrameExporter, RemoteBroadcaster,
+                          RemoteService, SeqlockSlot, SharedEventFollower, SharedEventLog)
+from stream_supervisor import Backoff, StreamStalled, get_http_session, open_capture
+import metrics
+
+# YOLO (ultralytics/torch) n'est importé qu'au chargement du modèle, en arrière-plan
+YOLO_AVAILABLE = importlib.util.find_spec('ultralytics') is not None
+if not YOLO_AVAILABLE:
     print("Module YOLOv8 non disponible. La détection d'incendies sera désactivée.")
-    # Tentative d'installation automatique de YOLOv8
-    try:
-        import subprocess
-        print("Tentative d'installation de YOLOv8...")
-        subprocess.check_call(["pip", "install", "ultralytics"])
-        from ultralytics import YOLO
-        YOLO_AVAILABLE = True
-        print("Module YOLOv8 installé et chargé avec succès")
-    except Exception as e:
-        print(f"Échec de l'installation automatique: {e}")
 
 # Configuration
 CAMERA_URL = "http://172.22.2.17:5000"  # URL du flux vidéo
 MODEL_PATH = "last.pt"  # Chemin vers le modèle YOLOv8 entraîné pour la détection d'incendies
 USE_DETECTION = YOLO_AVAILABLE  # Utiliser la détection si disponible
+# Inférence groupée entre caméras : taille max d'un lot et délai max d'attente (secondes)
+INFERENCE_BATCH_SIZE = int(os.environ.get("INFERENCE_BATCH_SIZE", 8))
+INFERENCE_MAX_WAIT = float(os.environ.get("INFERENCE_MAX_WAIT", 0.02))
+# Fréquence de détection adaptative par caméra (secondes entre deux détections)
+DETECTION_MIN_INTERVAL = float(os.environ.get("DETECTION_MIN_INTERVAL", 0.1))
+DETECTION_MAX_INTERVAL = float(os.environ.get("DETECTION_MAX_INTERVAL", 2.0))  # Délai max de détection d'un feu
+INFERENCE_CPU_BUDGET = float(os.environ.get("INFERENCE_CPU_BUDGET", 0.8))  # Part du temps réservée à l'inférence
+# Images identiques ou quasi identiques : détections réutilisées sans inférence
+FRAME_CACHE_SIZE = int(os.environ.get("FRAME_CACHE_SIZE", 8))  # Résultats gardés par caméra (0 : désactivé)
+FRAME_CACHE_MAX_DISTANCE = int(os.environ.get("FRAME_CACHE_MAX_DISTANCE", 2))  # Bits différents tolérés (dHash 64 bits)
+# Au-delà, l'image est réanalysée (s) ; jamais plus que DETECTION_MAX_INTERVAL, le délai garanti de détection
+FRAME_CACHE_MAX_AGE = min(float(os.environ.get("FRAME_CACHE_MAX_AGE", DETECTION_MAX_INTERVAL)), DETECTION_MAX_INTERVAL)
+# Moteur d'inférence : torch (PyTorch), onnx (ONNX Runtime, CPU) ou openvino
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+INFERENCE_INT8 = os.environ.get("INFERENCE_INT8", "0") == "1"  # Variante quantifiée INT8 (onnx/openvino)
+INFERENCE_INT8_DATA = os.environ.get("INFERENCE_INT8_DATA")  # Jeu de calibration YOLO (openvino INT8)
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", 0))  # Threads intra-opération (0 : défaut)
+INFERENCE_INTER_THREADS = int(os.environ.get("INFERENCE_INTER_THREADS", 0))  # Threads inter-opérations
+INFERENCE_IMGSZ = 640  # Taille d'inférence optimale
+MODEL_CACHE_DIR = os.environ.get("MODEL_CACHE_DIR", ".model_cache")  # Exports ONNX/OpenVINO
+# Alertes automatiques : feu présent sur au moins MIN_HITS des WINDOW dernières images analysées
+FIRE_EVENT_WINDOW = int(os.environ.get("FIRE_EVENT_WINDOW", 10))
+FIRE_EVENT_MIN_HITS = int(os.environ.get("FIRE_EVENT_MIN_HITS", 6))
+FIRE_EVENT_MIN_CONFIDENCE = float(os.environ.get("FIRE_EVENT_MIN_CONFIDENCE", 0.6))
+# Détection par tuiles à la résolution native (caméras haute résolution, fumées lointaines)
+TILE_SIZE = int(os.environ.get("TILE_SIZE", 640))
+TILE_OVERLAP = float(os.environ.get("TILE_OVERLAP", 0.2))  # Chevauchement entre tuiles voisines
+TILE_CHANGE_THRESHOLD = float(os.environ.get("TILE_CHANGE_THRESHOLD", 0.02))  # Changement min pour réanalyser une tuile
+TILE_REFRESH_INTERVAL = float(os.environ.get("TILE_REFRESH_INTERVAL", 10))  # Réanalyse forcée d'une tuile (s)
+TILING_CONFIG_PATH = os.environ.get("TILING_CONFIG_PATH", "camera_tiling.json")  # Zones et tuilage par caméra
+# Corrélation des détections et des alertes en incidents (positions et caps des caméras)
+CAMERA_POSITIONS_PATH = os.environ.get("CAMERA_POSITIONS_PATH", "camera_positions.json")
+INCIDENT_MATCH_RADIUS_M = float(os.environ.get("INCIDENT_MATCH_RADIUS_M", 2000))  # Distance max d'une observation à un incident
+INCIDENT_ANGLE_TOLERANCE = float(os.environ.get("INCIDENT_ANGLE_TOLERANCE", 5))  # Écart max de relèvement (degrés)
+INCIDENT_EXPIRE_AFTER = float(os.environ.get("INCIDENT_EXPIRE_AFTER", 1800))  # Clôture sans observation (s)
+# Reconnexion automatique des caméras
+STREAM_CONNECT_TIMEOUT = float(os.environ.get("STREAM_CONNECT_TIMEOUT", 5))  # Ouverture du flux (s)
+STREAM_STALL_TIMEOUT = float(os.environ.get("STREAM_STALL_TIMEOUT", 10))  # Sans image : flux considéré bloqué (s)
+STREAM_BACKOFF_INITIAL = float(os.environ.get("STREAM_BACKOFF_INITIAL", 0.5))  # Premier délai de reconnexion (s)
+STREAM_BACKOFF_MAX = float(os.environ.get("STREAM_BACKOFF_MAX", 30))  # Délai de reconnexion maximal (s)
+STREAM_STABLE_AFTER = 10  # Secondes d'images reçues avant de revenir au premier délai
+FIRE_EVENT_CLOSE_AFTER = float(os.environ.get("FIRE_EVENT_CLOSE_AFTER", 60))  # Secondes sans détection avant clôture
+# Séquences vidéo avant/après un événement
+CLIP_PRE_SECONDS = float(os.environ.get("CLIP_PRE_SECONDS", 10))  # Durée conservée avant le déclenchement
+CLIP_POST_SECONDS = float(os.environ.get("CLIP_POST_SECONDS", 10))  # Durée enregistrée après
+CLIP_FPS = float(os.environ.get("CLIP_FPS", 5))  # Images par seconde enregistrées
+CLIP_BUFFER_MAX_MB = float(os.environ.get("CLIP_BUFFER_MAX_MB", 32))  # Mémoire max par caméra (et par séquence)
+CLIP_FORMAT = os.environ.get("CLIP_FORMAT", "mjpeg")  # mjpeg ou mp4
 
 # Vérifier l'existence du modèle
 if not os.path.exists(MODEL_PATH):
     print(f"Modèle {MODEL_PATH} non trouvé. Vérifiez le chemin du modèle.")
+# Production (production_server.py) : un processus `capture` (caméras, modèle) et des
+# processus `web` ; `standalone` : tout dans un seul processus (développement)
+SERVER_ROLE = os.environ.get("SERVER_ROLE", "standalone")
+SHARED_STATE_PREFIX = os.environ.get("SHARED_STATE_PREFIX", "forest")  # Noms des segments de mémoire partagée
+CONTROL_ADDRESS = ('127.0.0.1', int(os.environ.get("CONTROL_PORT", 5001)))  # Commandes web -> capture
+CONTROL_AUTHKEY = os.environ.get("CONTROL_AUTHKEY", "").encode()
+SHARED_FRAME_MAX_BYTES = 4 * 1024 * 1024  # Taille max d'une image JPEG partagée
+FRAME_LEASE_SECONDS = 10  # Export des images d'une caméra tant qu'un processus web la regarde
+
 UPLOAD_FOLDER = 'static/uploads'
+ALERTS_DB_PATH = os.environ.get("ALERTS_DB_PATH", "alerts.db")  # Base SQLite des alertes citoyennes
+ALERTS_PAGE_SIZE = 100  # Nombre d'alertes par page de /api/alerts
+ALERTS_MAX_PAGE_SIZE = 1000
+# Recherche autour d'un point (?near=lat,lng&radius_km=…)
+ALERTS_DEFAULT_RADIUS_KM = float(os.environ.get("ALERTS_DEFAULT_RADIUS_KM", 5))
+ALERTS_MAX_RADIUS_KM = float(os.environ.get("ALERTS_MAX_RADIUS_KM", 500))
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+# Photos des alertes : traitées en arrière-plan (miniature, version web, sans EXIF)
+INGEST_INCOMING_FOLDER = os.environ.get("INGEST_INCOMING_FOLDER", "uploads_incoming")  # Envois non traités (non publiés)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 2))
+INGEST_SCORE_SEVERITY = os.environ.get("INGEST_SCORE_SEVERITY", "1") == "1"  # Gravité estimée par le modèle
+ALERT_IMAGE_MAX_AGE = 365 * 24 * 3600  # Images traitées immuables : cache navigateur d'un an
 
 # Créer l'application Flask
 app = Flask(__name__)
@@ -47,14 +123,123 @@ app.secret_key = os.environ.get("SECRET_KEY", "green_sentinel_secret_key")
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload
 
-# Variables globales
-camera = None
-is_streaming = False
-output_frame = None
-lock = threading.Lock()
+# Modèle YOLO partagé entre toutes les caméras (chargé une seule fois, en arrière-plan)
+shared_model = None
+model_load_lock = threading.Lock()
+# État du chargement : idle, loading, warming_up, ready, unavailable ou error
+model_state = {'status': 'idle', 'backend': None, 'error': None,
+               'load_seconds': None, 'warmup_seconds': None}
+started_at = time.time()
+
+def get_shared_model():
+    """Modèle partagé s'il est prêt, sans jamais bloquer ; sinon lancer son chargement"""
+    if shared_model is not None:
+        # Déjà chargé (ou fourni, ex. modèle factice des benchmarks) : pas de verrou
+        return shared_model
+    start_model_loading()
+    return None
+
+def start_model_loading():
+    """Charger et préchauffer le modèle dans un thread (une seule fois)"""
+    if model_state['status'] != 'idle':
+        return
+    with model_load_lock:
+        if shared_model is not None or model_state['status'] != 'idle':
+            return
+        if not YOLO_AVAILABLE or not os.path.exists(MODEL_PATH):
+            model_state['status'] = 'unavailable'
+            return
+        model_state['status'] = 'loading'
+    threading.Thread(target=load_shared_model, name="model-loader", daemon=True).start()
+
+def load_shared_model():
+    """Import de torch/ultralytics, chargement du moteur puis passe à vide 640x640"""
+    global shared_model
+    start = time.time()
+    backends = [INFERENCE_BACKEND] if INFERENCE_BACKEND == 'torch' else [INFERENCE_BACKEND, 'torch']
+    model = None
+    for backend in backends:
+        try:
+            model = load_backend(
+                MODEL_PATH,
+                backend=backend,
+                int8=INFERENCE_INT8,
+                imgsz=INFERENCE_IMGSZ,
+                intra_threads=INFERENCE_THREADS,
+                inter_threads=INFERENCE_INTER_THREADS,
+                cache_dir=MODEL_CACHE_DIR,
+                int8_data=INFERENCE_INT8_DATA
+            )
+            model_state['backend'] = backend
+            break
+        except Exception as e:
+            # Moteur exporté indisponible : repli sur PyTorch
+            print(f"Erreur chargement YOLOv8 (moteur {backend}): {e}")
+            model_state['error'] = str(e)
+    if model is None:
+        model_state['status'] = 'error'
+        return
+    model_state['load_seconds'] = round(time.time() - start, 2)
+
+    # Préchauffage : la première vraie image ne paie ni l'allocation ni l'initialisation
+    model_state['status'] = 'warming_up'
+    start = time.time()
+    try:
+        model.predict(source=[np.zeros((INFERENCE_IMGSZ, INFERENCE_IMGSZ, 3), dtype=np.uint8)],
+                      verbose=False, conf=0.6, imgsz=INFERENCE_IMGSZ)
+    except Exception as e:
+        print(f"Erreur de préchauffage du modèle: {e}")
+    model_state['warmup_seconds'] = round(time.time() - start, 2)
+    model_state['error'] = None
+    shared_model = model
+    model_state['status'] = 'ready'
+    print(f"Modèle YOLOv8 partagé prêt (moteur {model_state['backend']}"
+          f"{', INT8' if INFERENCE_INT8 and model_state['backend'] != 'torch' else ''}) "
+          f"en {model_state['load_seconds'] + model_state['warmup_seconds']:.1f} s")
+
+def describe_detections(result):
+    """Liste compacte (JSON) des objets détectés dans un résultat YOLO"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    names = result.names or {}
+    ids = boxes.id.int().tolist() if boxes.id is not None else [None] * len(boxes)
+    detections = []
+    for xyxy, conf, cls, track_id in zip(boxes.xyxy.tolist(), boxes.conf.tolist(), boxes.cls.int().tolist(), ids):
+        detections.append({
+            'label': names.get(cls, str(cls)),
+            'confidence': round(conf, 3),
+            'bbox': [round(v, 1) for v in xyxy],
+            'track_id': track_id,
+        })
+    return detections
+
+# Événements poussés aux navigateurs (SSE) : alertes et détections
+event_bus = EventBus()
+# Au plus 2 événements de détection par seconde et par caméra
+detection_event_throttle = Throttle(min_interval=0.5)
+
+# Métriques exposées sur /metrics (format Prometheus)
+metrics_registry = metrics.Registry()
+metric_decode_seconds = metrics_registry.histogram(
+    'forest_camera_decode_seconds', "Durée de décodage d'une image", ['camera'])
+metric_inference_seconds = metrics_registry.histogram(
+    'forest_camera_inference_seconds', "Délai entre l'envoi d'une image au modèle et son résultat", ['camera'])
+metric_encode_seconds = metrics_registry.histogram(
+    'forest_camera_jpeg_encode_seconds', "Durée d'encodage JPEG d'une image diffusée", ['camera'])
+# Séries propres au processus qui répond : étiquette `worker` (pid), sinon les compteurs de
+# plusieurs processus web se succèdent d'une collecte à l'autre et semblent repartir de zéro
+metric_request_seconds = metrics_registry.histogram(
+    'forest_http_request_seconds', "Durée de traitement des requêtes HTTP (jusqu'au début de la réponse)",
+    ['route', 'method', 'worker'])
+metric_requests = metrics_registry.counter(
+    'forest_http_requests', "Requêtes HTTP traitées", ['route', 'method', 'status', 'worker'])
+metric_alert_query_seconds = metrics_registry.histogram(
+    'forest_alert_store_query_seconds', "Durée des requêtes SQLite sur les alertes", ['operation', 'worker'])
 
 class VideoCamera:
-    def __init__(self, source=0):
+    def __init__(self, source=0, camera_id='default'):
+        self.camera_id = camera_id
         self.source = source
         self.video = None
         self.stopped = False
@@ -62,140 +247,362 @@ class VideoCamera:
         self.is_http_stream = str(source).startswith('http')
         self.frame = None
         self.lock = threading.Lock()
+        # Encodage JPEG unique partagé par tous les spectateurs de /video_feed
+        self.broadcaster = FrameBroadcaster(jpeg_quality=60)
+        # Dernier résultat YOLO renvoyé par l'ordonnanceur d'inférence
+        self.last_result = None
+        # Résultats réutilisés pour les images identiques ou quasi identiques
+        self.frame_cache = FrameCache(FRAME_CACHE_SIZE, FRAME_CACHE_MAX_DISTANCE, FRAME_CACHE_MAX_AGE)
+        # Dernier JPEG décodé (empreinte, image) et dernière annotation (empreinte, résultat, image)
+        self.last_decoded = (None, None)
+        self.last_annotation = (None, None, None)
+        # Pipeline par étapes (capture, prétraitement, inférence, diffusion)
+        self.frame_index = 0
+        self.detection_enabled = False
+        # Fréquence de détection adaptée au coût d'inférence et au mouvement dans la scène
+        self.detection_controller = AdaptiveDetectionController(
+            min_interval=DETECTION_MIN_INTERVAL,
+            max_interval=DETECTION_MAX_INTERVAL,
+            cpu_budget=INFERENCE_CPU_BUDGET,
+            # Coût d'une détection : une image, ou toutes les tuiles analysées en mode tuilé
+            cost_getter=lambda: inference_scheduler.frame_cost * self.images_per_detection(),
+            cameras_getter=lambda: len(camera_manager.cameras)
+        )
+        self.resize_to = (640, 480) if self.is_http_stream else None  # Taille fixe pour la détection
+        # Mode tuilé (zones d'intérêt) : analyse à la résolution native, sans redimensionnement
+        self.tiler = None
+        self.detection_latency = StageStats()
+        self.pipeline = self.build_pipeline()
+        # Statut exposé par l'API
+        self.status = 'starting'
+        self.error = None
+        self.started_at = datetime.datetime.now().isoformat()
+        self.frames_received = 0
+        self.last_frame_time = None
+        self.connects = 0
+        self.reconnects = 0
+        self.stop_event = threading.Event()
+        self.backoff = Backoff(initial=STREAM_BACKOFF_INITIAL, maximum=STREAM_BACKOFF_MAX)
+        self.parser = None
+        self.capture_interval = None
+        self.last_capture_time = None
+        # Séries de métriques de la caméra (résolues une seule fois)
+        self.decode_metric = metric_decode_seconds.labels(camera_id)
+        self.inference_metric = metric_inference_seconds.labels(camera_id)
+        self.broadcaster.encode_observer = metric_encode_seconds.labels(camera_id).observe
+        # Processus de capture : images encodées exportées vers les processus web
+        self.frame_segment = f"{SHARED_STATE_PREFIX}-{uuid.uuid4().hex[:12]}" if SERVER_ROLE == 'capture' else None
+        self.exporter = None
         
     def start(self):
-        # Vérifier si c'est un flux HTTP ou une caméra locale
+        # La source est ouverte par le thread de capture (HTTP comme RTSP ou caméra locale) :
+        # une source hors ligne au démarrage est réessayée avec les mêmes délais croissants
+        # qu'une coupure, sans redémarrer le serveur
         if self.is_http_stream:
-            print(f"Connexion au flux HTTP: {self.source}")
+            print(f"[{self.camera_id}] Connexion au flux HTTP: {self.source}")
         else:
-            # Essayer d'ouvrir la caméra locale
-            try:
-                self.video = cv2.VideoCapture(int(self.source) if self.source.isdigit() else self.source)
-                if not self.video.isOpened():
-                    raise ValueError(f"Impossible d'ouvrir la source vidéo: {self.source}")
-                print(f"Connexion à la caméra réussie: {self.source}")
-            except Exception as e:
-                print(f"Erreur d'ouverture de la caméra: {e}")
-                return None
+            print(f"[{self.camera_id}] Ouverture de la caméra: {self.source}")
         
-        # Démarrer un thread pour lire les frames
-        threading.Thread(target=self.update, daemon=True).start()
+        # Démarrer les étapes du pipeline puis le thread de capture (un par caméra)
+        self.pipeline.start()
+        # Tampon de pré-roll alimenté par l'encodage JPEG du diffuseur (thread de l'enregistreur)
+        clip_recorder.add_camera(self.camera_id, self.broadcaster.latest_jpeg)
+        if self.frame_segment:
+            self.exporter = FrameExporter(
+                self.broadcaster, SeqlockSlot(self.frame_segment, SHARED_FRAME_MAX_BYTES, create=True),
+                is_watched=lambda: frame_leases.get(self.camera_id, 0) > time.time()
+            ).start(f"export-{self.camera_id}")
+        threading.Thread(target=self.update, name=f"camera-{self.camera_id}", daemon=True).start()
         return self
     
-    def update(self):
-        import requests
-        import numpy as np
+    def on_result(self, result):
+        """Appelé par l'ordonnanceur (thread d'inférence) : stocker le résultat seulement"""
+        if result is not None:
+            self.last_result = result
+    
+    def build_pipeline(self):
+        """Étapes capture/décodage -> prétraitement -> (inférence) -> annotation/diffusion.
+        
+        La capture tourne dans le thread `update` ; l'inférence est une branche :
+        l'affichage ne l'attend jamais et dessine les dernières détections connues.
+        """
+        pipeline = FramePipeline(f"camera-{self.camera_id}")
+        # Files bornées : l'image la plus ancienne est jetée si l'étape suivante est en retard
+        pipeline.add_queue('preprocess', maxsize=1)
+        pipeline.add_queue('infer', maxsize=1)
+        pipeline.add_queue('publish', maxsize=1)
+        pipeline.add_stage('preprocess', self.preprocess, 'preprocess',
+                           outputs=['publish', ('infer', lambda packet: packet.detect)])
+        pipeline.add_stage('infer', self.infer, 'infer')
+        pipeline.add_stage('publish', self.publish, 'publish')
+        return pipeline
+    
+    def preprocess(self, packet):
+        """Étape de prétraitement : redimensionnement et choix des images à analyser"""
+        if self.resize_to is not None and self.tiler is None:
+            # Redimensionner l'image pour accélérer le traitement
+            packet.frame = cv2.resize(packet.frame, self.resize_to)
+        # La détection démarre dès que le modèle partagé est prêt (chargé en arrière-plan)
+        self.detection_enabled = get_shared_model() is not None
+        packet.detect = (self.detection_enabled and
+                         self.detection_controller.should_detect(packet.frame, packet.captured_at))
+        packet.forced = packet.detect and self.detection_controller.forced
+        return packet
+    
+    def infer(self, packet):
+        """Étape d'inférence : attendre le résultat du lot qui contient cette image"""
+        done = threading.Event()
+        results = []
+        
+        def on_result(result):
+            results.append(result)
+            done.set()
         
-        # Variables pour le contrôle du FPS
-        frame_count = 0
-        detection_interval = 3  # Faire une détection toutes les 3 images (10 FPS pour la détection)
-        last_detection = time.time()
+        submitted_at = time.time()
+        phash = cached = None
+        if self.tiler is not None:
+            # Mode tuilé : les tuiles inchangées sont déjà sautées par le détecteur
+            result = self.infer_tiles(packet)
+        else:
+            phash = perceptual_hash(packet.frame)
+            # Détection imposée (scène immobile) : seule une image identique évite le modèle
+            cached = self.frame_cache.lookup(packet.digest, phash, submitted_at, similar=not packet.forced)
+            if cached is not None:
+                result, detections = cached
+            else:
+                inference_scheduler.submit(self.camera_id, packet.frame, on_result)
+                result = results[0] if done.wait(timeout=10.0) else None
+        if result is None:
+            return None
+        if cached is None:
+            self.inference_metric.observe(time.time() - submitted_at)
+            detections = describe_detections(result)
+            if phash is not None:
+                self.frame_cache.store(packet.digest, phash, (result, detections), submitted_at)
+        self.on_result(result)
+        self.detection_controller.record_result(len(result.boxes) if result.boxes is not None else 0, time.time())
+        if detections and detection_event_throttle.allow(self.camera_id):
+            event_bus.publish('detection', {
+                'camera_id': self.camera_id,
+                'timestamp': datetime.datetime.now().isoformat(),
+                'detections': detections,
+            })
+        # Anti-rebond et regroupement en événements (les écritures sont différées) ;
+        # un résultat du cache ne compte pas comme une nouvelle observation
+        fire_event_tracker.observe(self.camera_id, packet.frame, detections, time.time(),
+                                   reused=cached is not None)
+        self.detection_latency.record(time.time() - packet.captured_at)
+        return None
+    
+    def infer_tiles(self, packet):
+        """Mode tuilé : analyser les tuiles modifiées (en un ou plusieurs lots), puis
+        fusionner les détections de toutes les tuiles et les suivre comme une image"""
+        tiler = self.tiler
+        now = time.time()
+        tiles = tiler.plan(packet.frame, now)
+        if tiles:
+            done = threading.Event()
+            tile_results = {}
+            
+            def make_callback(index):
+                def on_tile_result(result):
+                    tile_results[index] = result
+                    if len(tile_results) == len(tiles):
+                        done.set()
+                return on_tile_result
+            
+            for index, crop in tiles:
+                inference_scheduler.submit(f"{self.camera_id}/{index}", crop, make_callback(index), track=False)
+            done.wait(timeout=10.0)
+            for index, result in list(tile_results.items()):
+                if result is not None:
+                    tiler.update(index, result_to_array(result), now)
+        
+        model = get_shared_model()
+        if model is None:
+            return None
+        result = make_result(packet.frame, model.names, tiler.merged())
+        return inference_scheduler.track(self.camera_id, result, packet.frame)
+    
+    def images_per_detection(self):
+        tiler = self.tiler
+        if tiler is None or not tiler.tiles:
+            return 1
+        # Tuiles inchangées sautées : coût moyen mesuré
+        return max(1.0, tiler.get_stats()['tiles_per_pass'] or len(tiler.tiles))
+    
+    def configure_tiling(self, config):
+        """Activer (config dict) ou désactiver (None) le mode tuilé de la caméra"""
+        if not config or not config.get('enabled', True):
+            self.tiler = None
+            return
+        self.tiler = TiledDetector(
+            tile_size=int(config.get('tile_size', TILE_SIZE)),
+            overlap=float(config.get('overlap', TILE_OVERLAP)),
+            roi=config.get('roi') or [],
+            change_threshold=float(config.get('change_threshold', TILE_CHANGE_THRESHOLD)),
+            refresh_interval=float(config.get('refresh_interval', TILE_REFRESH_INTERVAL))
+        )
+    
+    def publish(self, packet):
+        """Étape de diffusion : dessiner les dernières détections et publier l'image"""
+        self.set_frame(self.annotate(packet.frame, packet.digest) if self.detection_enabled else packet.frame)
+        self.pipeline.end_to_end.record(time.time() - packet.captured_at)
+        return None
+    
+    def push_frame(self, frame, captured_at, decode_seconds, digest=None):
+        """Étape de capture : déposer l'image décodée la plus récente dans le pipeline"""
+        self.frame_index += 1
+        self.decode_metric.observe(decode_seconds)
+        if self.last_capture_time is not None:
+            # Intervalle moyen (glissant) entre deux images reçues
+            interval = captured_at - self.last_capture_time
+            self.capture_interval = interval if self.capture_interval is None else \
+                self.capture_interval + 0.1 * (interval - self.capture_interval)
+        self.last_capture_time = captured_at
+        self.pipeline.push('preprocess', FramePacket(self.frame_index, frame, captured_at, digest), decode_seconds)
+    
+    def annotate(self, frame, digest=None):
+        """Dessiner les dernières détections connues sur l'image courante"""
+        result = self.last_result
+        if result is None:
+            return frame
+        # Même JPEG et mêmes détections que l'image précédente : annotation déjà faite
+        last_digest, last_result, annotated = self.last_annotation
+        if digest is not None and digest == last_digest and result is last_result:
+            self.frame_cache.annotations_reused += 1
+            return annotated
+        try:
+            annotated = result.plot(img=frame)
+        except Exception as e:
+            print(f"[{self.camera_id}] Erreur d'annotation: {e}")
+            return frame
+        self.last_annotation = (digest, result, annotated)
+        return annotated
+    
+    def set_frame(self, frame):
+        with self.lock:
+            self.frame = frame
+        self.broadcaster.publish(frame)
+        self.frames_received += 1
+        self.last_frame_time = time.time()
+        self.status = 'running'
+    
+    def update(self):
+        """Thread de capture : lit la source et la rouvre automatiquement si elle
+        s'interrompt, avec des délais croissants ; le pipeline et le modèle
+        restent actifs pendant la reconnexion."""
+        # Modèle YOLO partagé entre les caméras (inférence groupée par l'ordonnanceur)
+        start_model_loading()
         
-        # Charger le modèle YOLO une seule fois
-        model = None
-        if YOLO_AVAILABLE:
+        while not self.stopped:
+            connected_at = time.time()
+            frames_before = self.frame_index
             try:
-                model = YOLO(MODEL_PATH)
-                model.conf = 0.6  # Seuil de confiance optimal
-                print("Modèle YOLOv8 chargé avec détection optimisée")
-                
-                # Optimiser pour la vitesse
-                model.amp = True  # Mixed precision
-                model.fuse()      # Fusionner les couches pour la vitesse
-                
-                # Désactiver les gradients pour l'inférence
-                model.eval()
+                if self.is_http_stream:
+                    self.read_http_stream()
+                else:
+                    self.read_capture()
+                reason = "fin du flux"
             except Exception as e:
-                print(f"Erreur chargement YOLOv8: {e}")
-                model = None
-
-        if self.is_http_stream:
-            # Pour les flux HTTP/MJPEG
-            try:
-                stream = requests.get(self.source, stream=True, timeout=5)  # Timeout plus court
-                if stream.status_code != 200:
-                    print(f"Erreur de connexion au flux HTTP: {stream.status_code}")
-                    self.stopped = True
+                reason = str(e) or type(e).__name__
+            if self.stopped:
+                break
+            
+            # Connexion restée stable : la prochaine coupure repart du premier délai
+            if self.frame_index > frames_before and time.time() - connected_at >= STREAM_STABLE_AFTER:
+                self.backoff.reset()
+            delay = self.backoff.next_delay()
+            self.status = 'reconnecting'
+            self.error = reason
+            self.reconnects += 1
+            print(f"[{self.camera_id}] Flux interrompu ({reason}), reconnexion dans {delay:.1f} s")
+            event_bus.publish('camera_reconnecting', {'id': self.camera_id, 'reason': reason,
+                                                      'delay': round(delay, 1)})
+            # Attente interrompue immédiatement par stop()
+            if self.stop_event.wait(delay):
+                break
+            self.release_capture()
+        
+        # Libérer la source dans le thread qui la lit (jamais pendant un read())
+        self.release_capture()
+    
+    def check_stall(self, last_frame_at):
+        """Chien de garde : connexion ouverte mais plus aucune image"""
+        if time.time() - last_frame_at > STREAM_STALL_TIMEOUT:
+            raise StreamStalled(f"aucune image depuis {STREAM_STALL_TIMEOUT:.0f} s")
+    
+    def read_http_stream(self):
+        """Flux HTTP/MJPEG : une connexion, jusqu'à sa fin ou son blocage"""
+        # Session partagée : connexions TCP réutilisées d'une reconnexion à l'autre
+        # (lecture bloquée plus de STREAM_STALL_TIMEOUT secondes : exception)
+        with get_http_session().get(self.source, stream=True,
+                                    timeout=(STREAM_CONNECT_TIMEOUT, STREAM_STALL_TIMEOUT)) as stream:
+            if stream.status_code != 200:
+                raise ConnectionError(f"HTTP {stream.status_code}")
+            print(f"[{self.camera_id}] Connexion au flux HTTP réussie: {self.source}")
+            self.connects += 1
+            
+            # Analyseur MJPEG incrémental (tampon réutilisé, frontière multipart si annoncée)
+            boundary = MJPEGStreamParser.boundary_from_content_type(stream.headers.get('Content-Type'))
+            if self.parser is None:
+                self.parser = MJPEGStreamParser(boundary)
+            else:
+                self.parser.set_boundary(boundary)
+                self.parser.reset()
+            
+            last_frame_at = time.time()
+            for chunk in stream.iter_content(chunk_size=8192):  # Taille de chunk augmentée
+                if self.stopped:
                     return
                 
-                bytes_data = bytes()
-                last_detection = time.time()
-                
-                for chunk in stream.iter_content(chunk_size=8192):  # Taille de chunk augmentée
-                    if self.stopped:
-                        break
-                    
-                    bytes_data += chunk
-                    a = bytes_data.find(b'\xff\xd8')
-                    b = bytes_data.find(b'\xff\xd9')
-                    
-                    if a != -1 and b != -1:
-                        jpg = bytes_data[a:b+2]
-                        bytes_data = bytes_data[b+2:]
-                        
-                        # Décoder l'image JPEG
-                        frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
-                        
-                        if frame is not None:
-                            # Redimensionner l'image pour accélérer le traitement
-                            frame = cv2.resize(frame, (640, 480))  # Taille fixe pour la détection
-                            
-                            # Faire la détection à 10 FPS (toutes les 3 images)
-                            frame_count += 1
-                            if model is not None and frame_count % detection_interval == 0:
-                                try:
-                                    # Détection optimisée
-                                    with torch.no_grad():  # Désactive le calcul des gradients
-                                        results = model.track(
-                                            source=frame,
-                                            conf=0.6,
-                                            verbose=False,
-                                            persist=True,
-                                            imgsz=640,  # Taille d'inférence optimale
-                                            device='0' if torch.cuda.is_available() else 'cpu'
-                                        )
-                                    if results and len(results) > 0:
-                                        frame = results[0].plot()
-                                        last_detection = time.time()
-                                except Exception as e:
-                                    print(f"Erreur détection YOLO: {e}")
-                            # Si pas de détection sur ce frame, utiliser le dernier frame traité
-                            elif model is not None and 'last_processed_frame' in locals():
-                                frame = last_processed_frame
-                            
-                            # Sauvegarder le dernier frame traité
-                            last_processed_frame = frame.copy()
-                            
-                            # Mettre à jour le frame avec ou sans détection
-                            with self.lock:
-                                self.frame = frame.copy()
-                                
-            except Exception as e:
-                print(f"Erreur avec le flux HTTP: {str(e)}")
-                self.stopped = True
-        else:
-            # Pour les caméras locales et flux RTSP
-            while not self.stopped:
-                if self.video and self.video.isOpened():
-                    success, frame = self.video.read()
-                    if success:
-                        if model is not None:
-                            try:
-                                results = model.predict(source=frame, conf=0.5, verbose=False)
-                                annotated = results[0].plot()
-                            except Exception as e:
-                                print(f"Erreur détection YOLO: {e}")
-                                annotated = frame
-                            with self.lock:
-                                self.frame = annotated.copy()
-                        else:
-                            with self.lock:
-                                self.frame = frame.copy()
+                for jpg in self.parser.feed(chunk):
+                    captured_at = time.time()
+                    digest = jpeg_digest(jpg)
+                    if digest == self.last_decoded[0]:
+                        # JPEG identique au précédent (capteur figé) : image déjà décodée
+                        frame = self.last_decoded[1]
+                        self.frame_cache.decodes_skipped += 1
                     else:
-                        print("Erreur de lecture du flux vidéo")
-                        time.sleep(0.1)
-                else:
-                    time.sleep(0.1)
+                        # Décoder l'image JPEG directement depuis le tampon de l'analyseur
+                        frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                        self.last_decoded = (digest, frame) if frame is not None else (None, None)
+                    
+                    if frame is not None:
+                        last_frame_at = captured_at
+                        self.push_frame(frame, captured_at, time.time() - captured_at, digest)
+                # Des octets arrivent mais aucune image complète (flux corrompu)
+                self.check_stall(last_frame_at)
+    
+    def read_capture(self):
+        """Caméra locale, flux RTSP ou fichier : lire jusqu'à l'échec ou au blocage"""
+        if self.video is None:
+            self.video = open_capture(self.source, STREAM_CONNECT_TIMEOUT, STREAM_STALL_TIMEOUT)
+            print(f"[{self.camera_id}] {'Reconnexion' if self.connects else 'Connexion'} "
+                  f"à la caméra réussie: {self.source}")
+            self.connects += 1
+        
+        last_frame_at = time.time()
+        failures = 0
+        while not self.stopped:
+            captured_at = time.time()
+            success, frame = self.video.read()
+            if success:
+                failures = 0
+                last_frame_at = captured_at
+                self.push_frame(frame, captured_at, time.time() - captured_at)
+                continue
+            failures += 1
+            # Plusieurs échecs consécutifs : source coupée ou fin de fichier
+            if failures >= 5:
+                raise ConnectionError("erreur de lecture du flux vidéo")
+            self.check_stall(last_frame_at)
+            time.sleep(0.1)
+    
+    def release_capture(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
     
     def get_frame(self):
         with self.lock:
@@ -203,140 +610,302 @@ class VideoCamera:
                 return None
             return self.frame.copy()
     
+    def get_status(self):
+        """Statut de la caméra pour l'API"""
+        return {
+            'id': self.camera_id,
+            'source': str(self.source),
+            'status': 'stopped' if self.stopped and self.status != 'error' else self.status,
+            'error': self.error,
+            'started_at': self.started_at,
+            'frames_received': self.frames_received,
+            'last_frame_time': self.last_frame_time,
+            'viewers': self.broadcaster.viewers,
+            'jpeg_encodes': self.broadcaster.encodes,
+            'jpeg_encode': self.broadcaster.encode_stats.get_stats(),
+            'capture_fps': self.capture_fps(),
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'detection_latency': self.detection_latency.get_stats(),
+            'detection_rate': self.detection_controller.get_stats(),
+            'frame_cache': self.frame_cache.get_stats(),
+            'pipeline': self.pipeline.get_stats(),
+            'tiling': dict(self.tiler.get_config(), **self.tiler.get_stats()) if self.tiler else None,
+            'frame_segment': self.frame_segment,
+        }
+    
+    def capture_fps(self):
+        if not self.capture_interval:
+            return 0.0
+        return round(1.0 / self.capture_interval, 2)
+    
     def stop(self):
         self.stopped = True
-        if self.video and self.video.isOpened():
-            self.video.release()
-        print("Flux vidéo arrêté")
+        self.stop_event.set()
+        self.pipeline.stop()
+        fire_event_tracker.forget(self.camera_id)
+        clip_recorder.remove_camera(self.camera_id)
+        if self.exporter is not None:
+            # Le thread d'export supprime le segment une fois réveillé par close()
+            self.exporter.stop()
+        self.broadcaster.close()
+        self.release()
+        print(f"[{self.camera_id}] Flux vidéo arrêté")
+    
+    def release(self):
+        """Oublier la caméra dans l'ordonnanceur et retirer ses séries de métriques"""
+        inference_scheduler.forget(self.camera_id)
+        for metric in (metric_decode_seconds, metric_inference_seconds, metric_encode_seconds):
+            metric.remove(self.camera_id)
+
+def load_camera_configs(path):
+    """Configurations enregistrées par caméra ({camera_id: config}) : tuilage, position"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Configuration des caméras illisible ({path}): {e}")
+        return {}
+
+def save_camera_config(path, camera_id, config):
+    """Enregistrer (ou retirer si None) la configuration d'une caméra"""
+    configs = load_camera_configs(path)
+    if config is None:
+        configs.pop(camera_id, None)
+    else:
+        configs[camera_id] = config
+    # Écriture atomique : fichier temporaire propre à cet appel (plusieurs processus web
+    # peuvent écrire en même temps) puis renommage
+    with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(path)),
+                                     prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                     delete=False) as f:
+        json.dump(configs, f, indent=2)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+class CameraManager:
+    """Registre des caméras actives : une instance VideoCamera par identifiant"""
+    
+    def __init__(self):
+        self.cameras = {}
+        self.lock = threading.Lock()
+    
+    def add(self, source, camera_id=None, tiling=None):
+        """Démarrer une nouvelle caméra. Lève ValueError si l'id est déjà utilisé.
         
-        if self.is_http_stream:
-            # Pour les flux HTTP/MJPEG d'un autre serveur Flask
-            try:
-                stream = requests.get(self.source, stream=True, timeout=10)
-                if stream.status_code != 200:
-                    print(f"Erreur de connexion au flux HTTP: {stream.status_code}")
-                    self.stopped = True
-                    return
-                    
-                # Variables pour le parsing du stream MJPEG
-                bytes_data = bytes()
-                
-                for chunk in stream.iter_content(chunk_size=1024):
-                    if self.stopped:
-                        break
-                    
-                    bytes_data += chunk
-                    a = bytes_data.find(b'\xff\xd8')  # Début d'une image JPEG
-                    b = bytes_data.find(b'\xff\xd9')  # Fin d'une image JPEG
-                    
-                    if a != -1 and b != -1:
-                        jpg = bytes_data[a:b+2]
-                        bytes_data = bytes_data[b+2:]
-                        
-                        # Décoder l'image JPEG
-                        frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
-                        if frame is not None:
-                            # Traiter et mettre à jour l'affichage
-                            processed_frame = process_frame(frame)
-                            with lock:
-                                output_frame = processed_frame.copy()
-                        
-                        # Pause courte pour contrôler la vitesse de traitement
-                        time.sleep(0.01)
-                        
-            except Exception as e:
-                print(f"Erreur avec le flux HTTP: {str(e)}")
-                self.stopped = True
-        else:
-            # Pour les caméras locales et flux RTSP
-            while not self.stopped:
-                if self.video and self.video.isOpened():
-                    success, frame = self.video.read()
-                    if not success:
-                        print("Erreur de lecture du frame")
-                        # Tentative de reconnexion
-                        self.video.release()
-                        time.sleep(2)
-                        self.video = cv2.VideoCapture(self.source)
-                        continue
-                    
-                    # Traiter le frame et mettre à jour
-                    processed_frame = process_frame(frame)
-                    with lock:
-                        output_frame = processed_frame.copy()
-                else:
-                    print("Flux vidéo fermé ou non disponible")
-                    self.stopped = True
-                    break
-                
-                # Limiter les FPS
-                time.sleep(0.03)  # ~30 FPS
+        `tiling` : configuration du mode tuilé (par défaut, celle enregistrée pour cet id).
+        """
+        camera_id = camera_id or uuid.uuid4().hex[:8]
+        with self.lock:
+            existing = self.cameras.get(camera_id)
+            # Une caméra arrêtée (erreur de flux) peut être remplacée
+            if existing is not None and not existing.stopped:
+                raise ValueError(f"La caméra '{camera_id}' est déjà active")
+            camera = VideoCamera(source, camera_id=camera_id)
+            camera.configure_tiling(tiling if tiling is not None else load_camera_configs(TILING_CONFIG_PATH).get(camera_id))
+            # Réserver l'id avant de démarrer pour éviter les doublons concurrents
+            self.cameras[camera_id] = camera
+        
+        try:
+            camera.start()
+        except Exception:
+            with self.lock:
+                self.cameras.pop(camera_id, None)
+            # Pas de séries de métriques ni d'état de suivi orphelins pour une caméra jamais démarrée
+            camera.release()
+            raise
+        event_bus.publish('camera_started', {'id': camera_id, 'source': str(source)})
+        return camera
     
-    def stop(self):
-        self.stopped = True
-        if self.video and self.video.isOpened():
-            self.video.release()
-            self.video = None
-        print("Flux vidéo arrêté")
+    def get(self, camera_id):
+        with self.lock:
+            return self.cameras.get(camera_id)
+    
+    def default(self):
+        """Première caméra enregistrée (pour les routes sans identifiant)"""
+        with self.lock:
+            return next(iter(self.cameras.values()), None)
+    
+    def remove(self, camera_id):
+        with self.lock:
+            camera = self.cameras.pop(camera_id, None)
+        if camera is not None:
+            camera.stop()
+            event_bus.publish('camera_stopped', {'id': camera_id})
+        return camera is not None
+    
+    def stop_all(self):
+        with self.lock:
+            cameras = list(self.cameras.values())
+            self.cameras.clear()
+        for camera in cameras:
+            camera.stop()
+            event_bus.publish('camera_stopped', {'id': camera.camera_id})
+    
+    def statuses(self):
+        with self.lock:
+            cameras = list(self.cameras.values())
+        return [camera.get_status() for camera in cameras]
+    
+    def is_streaming(self):
+        with self.lock:
+            return any(not camera.stopped for camera in self.cameras.values())
 
-def generate_frames():
-    global camera, lock
-    print("Démarrage du générateur de frames optimisé")
+class RemoteCamera:
+    """Caméra du processus de capture vue d'un processus web (statut et images partagées)"""
     
-    # Paramètres optimisés
-    jpeg_quality = 60  # Bon équilibre qualité/performance
-    target_fps = 30
-    frame_time = 1.0 / target_fps
-    last_frame_time = time.time()
+    def __init__(self, client, status):
+        self.client = client
+        self.camera_id = status['id']
+        self.status = status
+        self.frame_segment = status['frame_segment']
+        self.broadcaster = RemoteBroadcaster(self.frame_segment,
+                                             renew_lease=lambda: client.call('watch', self.camera_id))
     
-    # Initialiser le codec vidéo
-    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+    @property
+    def stopped(self):
+        return self.status['status'] in ('stopped', 'error')
     
-    while True:
-        try:
-            if camera is None or camera.stopped:
-                # Si pas de caméra, envoyer une image vide
-                dummy_frame = np.zeros((target_height, target_width, 3), dtype=np.uint8)
-                dummy_frame = cv2.putText(dummy_frame, 'En attente de flux vidéo...', (50, 240), 
-                                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1)
-                _, buffer = cv2.imencode('.jpg', dummy_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
-                yield (b'--frame\r\n'
-                      b'Content-Type: image/jpeg\r\n\r\n' + 
-                      buffer.tobytes() + b'\r\n')
-                time.sleep(1)
-                continue
+    def get_status(self):
+        return self.status
+    
+    def configure_tiling(self, config):
+        self.status = self.client.call('configure_tiling', self.camera_id, config)
+    
+    def close(self):
+        self.broadcaster.close()
+
+class RemoteCameraManager:
+    """Même interface que CameraManager, pour un processus web : commandes envoyées au
+    processus de capture, statuts relus au plus une fois par seconde"""
+    
+    def __init__(self, client, max_age=1.0):
+        self.client = client
+        self.max_age = max_age
+        self.cameras = {}
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+    
+    def refresh(self, force=False):
+        with self.lock:
+            if not force and time.time() - self.refreshed_at < self.max_age:
+                return
+            cameras = {}
+            for status in self.client.call('cameras'):
+                camera = self.cameras.get(status['id'])
+                # Caméra redémarrée : nouveau segment d'images
+                if camera is None or camera.frame_segment != status['frame_segment']:
+                    camera = RemoteCamera(self.client, status)
+                camera.status = status
+                cameras[camera.camera_id] = camera
+            for camera_id, camera in self.cameras.items():
+                if cameras.get(camera_id) is not camera:
+                    camera.close()
+            self.cameras = cameras
+            self.refreshed_at = time.time()
+    
+    def add(self, source, camera_id=None, tiling=None):
+        status = self.client.call('add_camera', source, camera_id, tiling)
+        if status is None:
+            return None
+        self.refresh(force=True)
+        return self.cameras.get(status['id']) or RemoteCamera(self.client, status)
+    
+    def get(self, camera_id):
+        self.refresh()
+        return self.cameras.get(camera_id)
+    
+    def default(self):
+        self.refresh()
+        return next(iter(self.cameras.values()), None)
+    
+    def remove(self, camera_id):
+        removed = self.client.call('remove_camera', camera_id)
+        self.refresh(force=True)
+        return removed
+    
+    def stop_all(self):
+        self.client.call('stop_all')
+        self.refresh(force=True)
+    
+    def statuses(self):
+        self.refresh()
+        return [camera.status for camera in self.cameras.values()]
+    
+    def is_streaming(self):
+        self.refresh()
+        return any(not camera.stopped for camera in self.cameras.values())
+
+camera_manager = CameraManager()
+# Processus de capture : camera_id -> fin du bail des spectateurs des processus web
+frame_leases = {}
+
+# Un seul thread d'inférence pour toutes les caméras
+inference_scheduler = InferenceScheduler(
+    get_shared_model,
+    batch_size=INFERENCE_BATCH_SIZE,
+    max_wait=INFERENCE_MAX_WAIT,
+    conf=0.6,  # Seuil de confiance optimal
+    imgsz=INFERENCE_IMGSZ
+)
+
+# Image d'attente encodée une seule fois pour tous les spectateurs
+placeholder_chunk = None
+
+def get_placeholder_chunk():
+    global placeholder_chunk
+    if placeholder_chunk is None:
+        dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        dummy_frame = cv2.putText(dummy_frame, 'En attente de flux vidéo...', (50, 240), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1)
+        _, buffer = cv2.imencode('.jpg', dummy_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+        placeholder_chunk = multipart_chunk(buffer.tobytes())
+    return placeholder_chunk
+
+def generate_frames(camera_id=None):
+    """Générateur MJPEG d'un spectateur : sert les images encodées par le diffuseur de la caméra"""
+    print(f"Démarrage du générateur de frames ({camera_id or 'défaut'})")
+    
+    broadcaster = None
+    sequence = 0
+    
+    try:
+        while True:
+            try:
+                camera = camera_manager.get(camera_id) if camera_id else camera_manager.default()
+                if camera is None or camera.stopped:
+                    # Si pas de caméra, envoyer une image d'attente
+                    yield get_placeholder_chunk()
+                    time.sleep(1)
+                    continue
                 
-            frame = camera.get_frame()
-            if frame is None:
-                time.sleep(0.01)
-                continue
+                # Nouvelle caméra (ou caméra redémarrée) : s'abonner à son diffuseur
+                if camera.broadcaster is not broadcaster:
+                    if broadcaster is not None:
+                        broadcaster.unsubscribe()
+                    broadcaster = camera.broadcaster
+                    broadcaster.subscribe()
+                    sequence = 0
                 
-            # Encoder en JPEG avec optimisation
-            success, buffer = cv2.imencode('.jpg', frame, [
-                int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality,
-                int(cv2.IMWRITE_JPEG_OPTIMIZE), 1
-            ])
-            
-            if not success:
-                continue
+                # Toujours l'image la plus récente : un spectateur lent saute les images intermédiaires
+                sequence, chunk = broadcaster.wait_for_frame(sequence, timeout=1.0)
+                if chunk is None:
+                    continue
                 
-            # Contrôle de la vitesse pour maintenir le FPS cible
-            current_time = time.time()
-            elapsed = current_time - last_frame_time
-            if elapsed < frame_time:
-                time.sleep(max(0, frame_time - elapsed - 0.001))  # Réduire légèrement le sleep
-            last_frame_time = time.time()
-            
-            # Envoyer le frame
-            yield (b'--frame\r\n'
-                  b'Content-Type: image/jpeg\r\n\r\n' + 
-                  buffer.tobytes() + b'\r\n')
-            
-            # Pas besoin de sleep ici, le GIL fera le travail
-            
-        except Exception as e:
-            print(f"Erreur dans generate_frames: {str(e)}")
-            time.sleep(1)
+                yield chunk
+                
+            except Exception as e:
+                print(f"Erreur dans generate_frames: {str(e)}")
+                time.sleep(1)
+    finally:
+        # Déconnexion du spectateur
+        if broadcaster is not None:
+            broadcaster.unsubscribe()
 
 # Définition de la mission et citation inspirante
 MISSION = "Notre mission est de protéger les écosystèmes forestiers en utilisant des technologies avancées pour la détection précoce des incendies et la coordination rapide des interventions."
@@ -353,15 +922,20 @@ def index():
 @app.route('/dashboard')
 def dashboard():
     """Page de tableau de bord avec présentation du projet"""
-    # Statistiques pour le tableau de bord
-    now = datetime.datetime.now()
-    today_alerts = [a for a in alerts_db.values() 
-                   if (now - datetime.datetime.fromisoformat(a['timestamp'])).days < 1]
+    # Statistiques pour le tableau de bord ; processus de capture injoignable (rôle web) :
+    # comptage direct dans la base
+    try:
+        alerts = alert_stats.snapshot()
+        alerts_today, total_alerts = alerts['windows']['24h'], alerts['total']
+    except CONTROL_ERRORS as e:
+        print(f"Statistiques d'alertes indisponibles, comptage dans la base: {e}")
+        since = (datetime.datetime.now() - datetime.timedelta(days=1)).isoformat()
+        alerts_today, total_alerts = alert_store.count(since=since), alert_store.count()
     
     stats = {
         'forests_monitored': 3,
-        'alerts_today': len(today_alerts),
-        'total_alerts': len(alerts_db),
+        'alerts_today': alerts_today,
+        'total_alerts': total_alerts,
         'detection_accuracy': 94.5
     }
     
@@ -371,76 +945,234 @@ def dashboard():
                          quote=QUOTE,
                          stats=stats)
 
+@app.route('/api/stats')
+def api_stats():
+    """Statistiques des alertes (compteurs incrémentaux, sans parcours de la base)"""
+    return jsonify(alert_stats.snapshot())
+
+@app.route('/api/events')
+def api_events():
+    """Flux Server-Sent Events : alertes, changements de statut, détections, caméras"""
+    types = request.args.get('types')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    return Response(event_bus.stream(last_event_id, set(types.split(',')) if types else None),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/monitoring')
 def monitoring():
     """Page de surveillance vidéo avec détection d'incendies"""
-    global camera, is_streaming
     return render_template('monitoring.html', 
                          active_page='monitoring', 
                          yolo_available=YOLO_AVAILABLE)
 
 @app.route('/video_feed')
 def video_feed():
-    """Flux vidéo pour la page web"""
+    """Flux vidéo pour la page web (première caméra active)"""
     return Response(generate_frames(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/video_feed/<camera_id>')
+def camera_video_feed(camera_id):
+    """Flux vidéo d'une caméra donnée"""
+    if camera_manager.get(camera_id) is None:
+        return jsonify({'status': 'error', 'message': 'Caméra non trouvée'}), 404
+    return Response(generate_frames(camera_id),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
 @app.route('/api/start_stream', methods=['POST'])
 def start_stream():
     """API pour démarrer le flux vidéo"""
-    global camera, is_streaming, output_frame
+    data = request.get_json(silent=True) or {}
+    camera_id = data.get('camera_id', 'default')
     
-    if is_streaming:
-        return jsonify({"status": "already_running", "message": "Le streaming est déjà actif"})
+    existing = camera_manager.get(camera_id)
+    if existing is not None and not existing.stopped:
+        return jsonify({"status": "already_running", "message": "Le streaming est déjà actif", "camera_id": camera_id})
     
     try:
         # Récupérer la source depuis le JSON ou utiliser la valeur par défaut
-        camera_source = request.json.get('source', CAMERA_URL) if request.json else CAMERA_URL
-        print(f"Démarrage du flux vidéo depuis {camera_source}")
+        camera_source = data.get('source', CAMERA_URL)
+        print(f"Démarrage du flux vidéo [{camera_id}] depuis {camera_source}")
         
         # Initialiser la caméra
-        camera = VideoCamera(camera_source)
-        result = camera.start()
+        camera = camera_manager.add(camera_source, camera_id)
         
-        if result is None:
+        if camera is None:
             return jsonify({"status": "error", "message": "Impossible de démarrer le flux vidéo"})
         
-        is_streaming = True
         print("Flux vidéo démarré avec succès")
-        
-        # Initialiser le frame de sortie avec un message
-        dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        dummy_frame = cv2.putText(dummy_frame, 'Connexion...', (220, 240), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        with lock:
-            output_frame = dummy_frame
-        
-        return jsonify({"status": "success", "message": "Flux vidéo démarré avec succès"})
+        return jsonify({"status": "success", "message": "Flux vidéo démarré avec succès", "camera_id": camera_id})
+    except ValueError:
+        return jsonify({"status": "already_running", "message": "Le streaming est déjà actif", "camera_id": camera_id})
     except Exception as e:
         print(f"Erreur lors du démarrage du flux: {str(e)}")
         return jsonify({"status": "error", "message": f"Erreur: {str(e)}"})
 
 @app.route('/api/stop_stream', methods=['POST'])
 def stop_stream():
-    """API pour arrêter le flux vidéo"""
-    global camera, is_streaming
+    """API pour arrêter le flux vidéo (une caméra, ou toutes si aucun id n'est fourni)"""
+    data = request.get_json(silent=True) or {}
+    camera_id = data.get('camera_id')
     
-    if not is_streaming:
+    if not camera_manager.is_streaming():
         return jsonify({"status": "not_running", "message": "Le streaming n'est pas actif"})
     
     try:
-        if camera:
-            camera.stop()
-            camera = None
-        is_streaming = False
+        if camera_id:
+            if not camera_manager.remove(camera_id):
+                return jsonify({"status": "not_running", "message": "Caméra non trouvée"})
+        else:
+            camera_manager.stop_all()
         return jsonify({"status": "success", "message": "Flux vidéo arrêté avec succès"})
     except Exception as e:
         return jsonify({"status": "error", "message": f"Erreur: {str(e)}"})
 
+def runtime_status():
+    """État des caméras et des services de détection (processus qui les exécute)"""
+    return {"is_streaming": camera_manager.is_streaming(),
+            "cameras": camera_manager.statuses(),
+            "inference": dict(inference_scheduler.get_stats(),
+                              backend=getattr(shared_model, 'name', None)),
+            "model": model_state,
+            "fire_events": fire_event_tracker.get_stats(),
+            "incidents": incident_correlator.get_stats(),
+            "clips": clip_recorder.get_stats(),
+            "image_ingest": image_ingestor.get_stats()}
+
 @app.route('/api/status')
 def status():
     """API pour vérifier l'état du flux vidéo"""
-    return jsonify({"is_streaming": is_streaming})
+    if SERVER_ROLE == 'web':
+        try:
+            return jsonify(control_client.call('runtime_status'))
+        except CONTROL_ERRORS as e:
+            # Processus de capture arrêté ou en cours de redémarrage
+            return jsonify({'status': 'error', 'message': f"Processus de capture indisponible: {e}"}), 503
+    return jsonify(runtime_status())
+
+@app.route('/api/cameras', methods=['GET', 'POST'])
+def api_cameras():
+    """Lister les caméras ou en ajouter une nouvelle"""
+    if request.method == 'GET':
+        return jsonify(camera_manager.statuses())
+    
+    data = request.get_json(silent=True) or {}
+    source = data.get('source')
+    if not source:
+        return jsonify({'status': 'error', 'message': 'Source manquante'}), 400
+    
+    tiling = data.get('tiling')
+    if tiling is not None:
+        try:
+            tiling = validate_tiling_config(tiling)
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    try:
+        camera = camera_manager.add(source, data.get('id'), tiling=tiling)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    if camera is not None and tiling is not None:
+        save_camera_config(TILING_CONFIG_PATH, camera.camera_id, tiling)
+    
+    if camera is None:
+        return jsonify({'status': 'error', 'message': 'Impossible de démarrer le flux vidéo'}), 502
+    return jsonify({'status': 'success', 'camera': camera.get_status(),
+                    'video_feed': url_for('camera_video_feed', camera_id=camera.camera_id)}), 201
+
+@app.route('/api/cameras/<camera_id>', methods=['GET', 'DELETE'])
+def api_camera(camera_id):
+    """Statut ou arrêt d'une caméra"""
+    if request.method == 'DELETE':
+        if not camera_manager.remove(camera_id):
+            return jsonify({'status': 'error', 'message': 'Caméra non trouvée'}), 404
+        return jsonify({'status': 'success', 'message': 'Caméra arrêtée'})
+    
+    camera = camera_manager.get(camera_id)
+    if camera is None:
+        return jsonify({'status': 'error', 'message': 'Caméra non trouvée'}), 404
+    return jsonify(camera.get_status())
+
+@app.route('/api/cameras/<camera_id>/tiling', methods=['PUT'])
+def api_camera_tiling(camera_id):
+    """Définir les zones d'intérêt et le mode tuilé d'une caméra ({"enabled": false} pour le désactiver)"""
+    camera = camera_manager.get(camera_id)
+    if camera is None:
+        return jsonify({'status': 'error', 'message': 'Caméra non trouvée'}), 404
+    try:
+        config = validate_tiling_config(request.get_json(silent=True))
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    camera.configure_tiling(config)
+    save_camera_config(TILING_CONFIG_PATH, camera_id, config)
+    return jsonify({'status': 'success', 'tiling': camera.get_status()['tiling']})
+
+@app.route('/api/cameras/<camera_id>/position', methods=['GET', 'PUT', 'DELETE'])
+def api_camera_position(camera_id):
+    """Position et orientation d'une caméra, pour situer ses détections (corrélation en incidents)"""
+    if request.method == 'GET':
+        position = incident_correlator.camera_position(camera_id)
+        if position is None:
+            return jsonify({'status': 'error', 'message': 'Position non définie'}), 404
+        return jsonify(position)
+    position = None
+    if request.method == 'PUT':
+        try:
+            position = validate_position(request.get_json(silent=True))
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': f"Position invalide: {e}"}), 400
+    incident_correlator.set_camera_position(camera_id, position)
+    save_camera_config(CAMERA_POSITIONS_PATH, camera_id, position)
+    return jsonify({'status': 'success', 'position': position})
+
+@app.route('/api/cameras/<camera_id>/clip', methods=['POST'])
+def api_camera_clip(camera_id):
+    """Déclenchement manuel d'une séquence, éventuellement rattachée à une alerte"""
+    data = request.get_json(silent=True) or {}
+    alert_id = data.get('alert_id')
+    if alert_id and alert_store.get(alert_id) is None:
+        return jsonify({'status': 'error', 'message': 'Alerte non trouvée'}), 404
+    clip_id = alert_id or str(uuid.uuid4())
+    if not clip_recorder.trigger(camera_id, clip_id, 'manual'):
+        return jsonify({'status': 'error', 'message': 'Caméra non trouvée'}), 404
+    url = clip_url(clip_id)
+    if alert_id:
+        alert_store.set_clip(alert_id, url)
+        event_bus.publish('alert_updated', {'id': alert_id, 'clip': url})
+    return jsonify({'status': 'success', 'clip_id': clip_id, 'url': url,
+                    'ready_in': clip_recorder.post_roll})
+
+def replay_clip(path):
+    """Rejouer une séquence MJPEG à sa cadence d'enregistrement"""
+    previous = None
+    for timestamp, jpeg in read_mjpeg_clip(path):
+        if previous is not None:
+            time.sleep(min(max(timestamp - previous, 0.0), 1.0))
+        previous = timestamp
+        yield multipart_chunk(jpeg)
+
+@app.route('/api/clips/<filename>')
+def api_clip(filename):
+    """Séquence enregistrée : MP4, ou MJPEG rejoué (`?download=1` pour le fichier brut)"""
+    filename = secure_filename(filename)
+    clip_id = filename.rsplit('.', 1)[0]
+    path = clip_recorder.path(clip_id)
+    if filename != os.path.basename(path) or not os.path.exists(path):
+        if clip_recorder.is_recording(clip_id):
+            return jsonify({'status': 'error', 'message': "Séquence en cours d'enregistrement"}), 202
+        return jsonify({'status': 'error', 'message': 'Séquence non trouvée'}), 404
+    if path.endswith('.mp4'):
+        # Requêtes partielles (Range) pour la lecture dans <video>
+        return send_file(os.path.abspath(path), mimetype='video/mp4', conditional=True)
+    if request.args.get('download'):
+        return send_file(os.path.abspath(path), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=filename)
+    return Response(replay_clip(path), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/alerts', endpoint='alerts')
 def submit_alert():
@@ -452,8 +1184,96 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Dictionnaire pour stocker les alertes (à remplacer par une base de données en production)
-alerts_db = {}
+# Stockage persistant des alertes (SQLite, une connexion par thread), ouvert par create_app
+alert_store = None
+# Statistiques tenues à jour à chaque création / changement de statut
+alert_stats = AlertStats()
+
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+def severity_for_confidence(confidence):
+    return 'high' if confidence >= 0.85 else 'medium'
+
+def save_fire_snapshot(event, frame):
+    """Image JPEG de l'alerte, avec les boîtes de l'événement (thread d'écriture)"""
+    if frame is None:
+        return None
+    x1, y1, x2, y2 = (int(v) for v in event['bbox'])
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+    cv2.putText(frame, f"{event['max_confidence']:.0%}", (x1, max(15, y1 - 5)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+    folder = os.path.join(app.config['UPLOAD_FOLDER'], 'detections')
+    os.makedirs(folder, exist_ok=True)
+    filename = f"{event['id']}.jpg"
+    cv2.imwrite(os.path.join(folder, filename), frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return f"/static/uploads/detections/{filename}"
+
+def open_fire_alert(event, frame):
+    """Nouvel événement confirmé : créer l'alerte correspondante"""
+    labels = ', '.join(event['labels']) or 'feu'
+    alert = {
+        'id': event['id'],
+        'name': 'Détection automatique',
+        'location': f"Caméra {event['camera_id']}",
+        'description': f"Détection automatique ({labels}), confiance {event['max_confidence']:.0%}",
+        'severity': severity_for_confidence(event['max_confidence']),
+        'status': 'new',
+        'image': save_fire_snapshot(event, frame),
+        'timestamp': datetime.datetime.fromtimestamp(event['started_at']).isoformat(),
+        'coordinates': None,
+        # Pré-roll déjà en mémoire, post-roll enregistré pendant CLIP_POST_SECONDS
+        'clip': clip_url(event['id']) if clip_recorder.trigger(event['camera_id'], event['id'], 'detection') else None
+    }
+    alert_store.create(alert)
+    alert_store.save_detection_event(alert['id'], event)
+    alert_stats.record_created(alert)
+    event_bus.publish('alert_created', alert)
+    incident_correlator.observe_detection(event)
+    print(f"[{event['camera_id']}] Alerte automatique {alert['id']} ({labels})")
+
+def close_fire_event(event):
+    """Événement terminé : enregistrer sa durée et son historique de confiance"""
+    alert_store.save_detection_event(event['id'], event)
+    event_bus.publish('fire_event_closed', {
+        'alert_id': event['id'],
+        'camera_id': event['camera_id'],
+        'duration': round(event['ended_at'] - event['started_at'], 1),
+        'max_confidence': event['max_confidence'],
+        'frames': event['frames'],
+    })
+
+# Séquences avant/après les événements (mémoire bornée, écriture en arrière-plan)
+clip_recorder = ClipRecorder(
+    output_dir=os.path.join(UPLOAD_FOLDER, 'clips'),
+    fps=CLIP_FPS,
+    pre_roll=CLIP_PRE_SECONDS,
+    post_roll=CLIP_POST_SECONDS,
+    max_bytes=int(CLIP_BUFFER_MAX_MB * 1024 * 1024),
+    clip_format=CLIP_FORMAT
+)
+
+def clip_url(clip_id):
+    return f"/api/clips/{os.path.basename(clip_recorder.path(clip_id))}"
+
+# Incidents : détections de plusieurs caméras et alertes citoyennes d'un même feu
+incident_correlator = IncidentCorrelator(
+    on_change=event_bus.publish,
+    match_radius=INCIDENT_MATCH_RADIUS_M,
+    angle_tolerance=INCIDENT_ANGLE_TOLERANCE,
+    expire_after=INCIDENT_EXPIRE_AFTER
+)
+
+# Événements de détection : anti-rebond, fusion par piste, création d'alertes
+fire_event_tracker = FireEventTracker(
+    on_open=open_fire_alert,
+    on_close=close_fire_event,
+    # Boîte et confiance courantes d'un feu suivi : position et tendance de l'incident
+    on_update=incident_correlator.observe_detection,
+    window=FIRE_EVENT_WINDOW,
+    min_hits=FIRE_EVENT_MIN_HITS,
+    min_confidence=FIRE_EVENT_MIN_CONFIDENCE,
+    close_after=FIRE_EVENT_CLOSE_AFTER
+)
 
 @app.route('/admin/alerts')
 def manage_alerts():
@@ -461,33 +1281,134 @@ def manage_alerts():
     # Vérifier l'authentification ici (à implémenter)
     return render_template('admin/alerts.html', active_page='admin_alerts')
 
+def score_upload(alert_id, image):
+    """Confiance max de feu sur la photo d'une alerte (thread du pool d'ingestion)"""
+    if not INGEST_SCORE_SEVERITY or get_shared_model() is None:
+        return None
+    done = threading.Event()
+    results = []
+    
+    def on_result(result):
+        results.append(result)
+        done.set()
+    
+    # Même ordonnanceur que les caméras : une seule passe du modèle à la fois
+    inference_scheduler.submit(f"upload/{alert_id}", image, on_result, track=False)
+    if not done.wait(30) or results[0] is None:
+        return None
+    detections = result_to_array(results[0])
+    return float(detections[:, 4].max()) if len(detections) else 0.0
+
+def on_image_processed(alert_id, processed):
+    """Photo traitée : publier les images et relever la gravité si le modèle voit un feu"""
+    fields = {'image': processed['image'], 'thumbnail': processed['thumbnail']}
+    alert = alert_store.get(alert_id)
+    if alert is None:
+        return
+    score = processed['score']
+    if score is not None and score >= FIRE_EVENT_MIN_CONFIDENCE:
+        severity = severity_for_confidence(score)
+        # La gravité déclarée par le citoyen n'est jamais abaissée
+        if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(alert['severity'], 0):
+            fields['severity'] = severity
+            alert_stats.record_severity_change(alert['severity'], severity)
+    alert_store.update(alert_id, **fields)
+    event_bus.publish('alert_updated', dict(fields, id=alert_id, fire_score=score))
+
+# Pool de traitement des photos jointes aux alertes (démarré par create_app)
+image_ingestor = ImageIngestor(
+    incoming_dir=INGEST_INCOMING_FOLDER,
+    output_dir=os.path.join(UPLOAD_FOLDER, 'alerts'),
+    url_prefix='/media/alerts',
+    workers=INGEST_WORKERS,
+    scorer=score_upload,
+    on_processed=on_image_processed
+)
+
+@app.route('/media/alerts/<filename>')
+def alert_media(filename):
+    """Images traitées des alertes (miniature, version web) : noms uniques, jamais réécrits"""
+    response = send_from_directory(os.path.abspath(image_ingestor.output_dir), filename,
+                                   max_age=ALERT_IMAGE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={ALERT_IMAGE_MAX_AGE}, immutable'
+    return response
+
+def parse_floats(value, count, name):
+    try:
+        values = [float(v) for v in value.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != count or not all(math.isfinite(v) for v in values):
+        raise ValueError(f"Paramètre {name} invalide")
+    return values
+
+def parse_geo_args(args):
+    """Zone de recherche d'après ?bbox=ouest,sud,est,nord et ?near=lat,lng&radius_km=…"""
+    bbox = near = None
+    if args.get('bbox'):
+        west, south, east, north = parse_floats(args['bbox'], 4, 'bbox')
+        if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+            raise ValueError("bbox doit être ouest,sud,est,nord (ouest ≤ est, sans traverser l'antiméridien)")
+        bbox = (west, south, east, north)
+    if args.get('near'):
+        lat, lng = parse_floats(args['near'], 2, 'near')
+        radius_km, = parse_floats(args.get('radius_km', str(ALERTS_DEFAULT_RADIUS_KM)), 1, 'radius_km')
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180) or not 0 < radius_km <= ALERTS_MAX_RADIUS_KM:
+            raise ValueError(f"near doit être lat,lng et radius_km compris entre 0 et {ALERTS_MAX_RADIUS_KM}")
+        near = (lat, lng, radius_km * 1000)
+    return bbox, near
+
+def form_coordinates(data):
+    """Coordonnées facultatives du formulaire (géolocalisation du navigateur)"""
+    if not data.get('latitude') or not data.get('longitude'):
+        return None
+    try:
+        lat, lng = float(data['latitude']), float(data['longitude'])
+    except ValueError:
+        raise ValueError("Coordonnées invalides")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("Coordonnées hors limites")
+    return {'lat': round(lat, 6), 'lng': round(lng, 6)}
+
 # API pour gérer les alertes
 @app.route('/api/alerts', methods=['GET', 'POST'])
 def api_alerts():
     if request.method == 'GET':
         # Récupérer les paramètres de filtrage
         status_filter = request.args.get('status', 'all')
-        search_term = request.args.get('search', '').lower()
+        search_term = request.args.get('search', '')
+        before = request.args.get('before')
+        try:
+            limit = min(max(int(request.args.get('limit', ALERTS_PAGE_SIZE)), 1), ALERTS_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'status': 'error', 'message': 'Paramètre limit invalide'}), 400
         
-        # Filtrer les alertes
-        filtered_alerts = []
-        for alert_id, alert in alerts_db.items():
-            # Filtrer par statut
-            if status_filter != 'all' and alert.get('status') != status_filter:
-                continue
-                
-            # Filtrer par terme de recherche
-            if search_term:
-                search_in = f"{alert.get('location', '')} {alert.get('description', '')}".lower()
-                if search_term not in search_in:
-                    continue
-            
-            filtered_alerts.append(alert)
+        statuses = None if status_filter == 'all' else status_filter.split(',')
         
-        # Trier par date (les plus récentes en premier)
-        filtered_alerts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        # Requête indexée, les plus récentes en premier ; curseur de la page suivante en en-tête
+        try:
+            bbox, near = parse_geo_args(request.args)
+            if request.args.get('cluster'):
+                # Vue carte : regroupement par cellules selon le niveau de zoom
+                zoom, = parse_floats(request.args['cluster'], 1, 'cluster')
+                zoom = int(zoom)
+                return jsonify({'zoom': zoom,
+                                'clusters': alert_store.cluster(zoom, bbox=bbox, status=statuses)})
+            alerts, next_cursor = alert_store.list(
+                status=statuses,
+                search=search_term,
+                limit=limit,
+                before=before,
+                bbox=bbox,
+                near=near
+            )
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
         
-        return jsonify(filtered_alerts)
+        response = jsonify(alerts)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     
     elif request.method == 'POST':
         # Créer une nouvelle alerte
@@ -498,16 +1419,18 @@ def api_alerts():
             # Générer un ID unique
             alert_id = str(uuid.uuid4())
             
-            # Gérer le téléchargement de l'image
-            image_path = None
+            try:
+                coordinates = form_coordinates(data)
+            except ValueError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+            
+            # Image : écrite telle quelle (durable), traitée ensuite par le pool d'ingestion
+            upload_path = None
             if 'image' in files and files['image'].filename != '':
                 image = files['image']
                 if image and allowed_file(image.filename):
-                    filename = secure_filename(f"{alert_id}_{image.filename}")
-                    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'alerts'), exist_ok=True)
-                    image_path = os.path.join(app.config['UPLOAD_FOLDER'], 'alerts', filename)
-                    image.save(image_path)
-                    image_path = f"/static/uploads/alerts/{filename}"
+                    extension = image.filename.rsplit('.', 1)[1].lower()
+                    upload_path = image_ingestor.store_upload(alert_id, image.stream, extension)
             
             # Créer l'alerte
             alert = {
@@ -517,15 +1440,31 @@ def api_alerts():
                 'description': data.get('description', 'Aucune description fournie'),
                 'severity': data.get('severity', 'medium'),
                 'status': 'new',  # Nouvelle alerte
-                'image': image_path,
+                'image': None,  # Renseignée (avec la miniature) après traitement
                 'timestamp': datetime.datetime.now().isoformat(),
-                'coordinates': None  # À implémenter avec la géolocalisation
+                'coordinates': coordinates  # {'lat', 'lng'} si la position a été partagée
             }
             
-            # Sauvegarder l'alerte
-            alerts_db[alert_id] = alert
+            # Sauvegarder l'alerte ; sans elle, l'envoi n'aurait plus de propriétaire
+            try:
+                alert_store.create(alert)
+            except Exception:
+                if upload_path:
+                    image_ingestor.discard_upload(upload_path)
+                raise
+            # L'alerte est enregistrée : les suites confiées au processus de capture (rôle web)
+            # ne la font pas échouer, sinon le formulaire serait renvoyé et l'alerte dupliquée
+            capture_call("Statistiques d'alerte", alert_stats.record_created, alert)
             
-            # Ici, vous pourriez ajouter une notification en temps réel
+            # Notification en temps réel des pages ouvertes
+            capture_call("Notification d'alerte", event_bus.publish, 'alert_created', alert)
+            # Après alert_created : la mise à jour des images arrive sur une carte existante ;
+            # envoi non soumis : remis en file par recover() au redémarrage de la capture
+            if upload_path:
+                capture_call("Traitement de l'image", image_ingestor.submit, alert_id, upload_path)
+            # Alerte géolocalisée : rattachée à un incident en cours ou en ouvre un
+            if coordinates:
+                capture_call("Corrélation d'incident", incident_correlator.add_report, alert)
             
             return jsonify({'status': 'success', 'message': 'Alerte enregistrée avec succès', 'alert_id': alert_id})
             
@@ -535,19 +1474,174 @@ def api_alerts():
 @app.route('/api/alerts/<alert_id>', methods=['PUT'])
 def update_alert(alert_id):
     """Mettre à jour le statut d'une alerte"""
-    if alert_id not in alerts_db:
-        return jsonify({'status': 'error', 'message': 'Alerte non trouvée'}), 404
-    
     try:
         data = request.get_json()
         if 'status' in data and data['status'] in ['new', 'in_progress', 'resolved']:
-            alerts_db[alert_id]['status'] = data['status']
+            # Une seule écriture indexée ; pas d'ancien statut = alerte inconnue
+            old_status = alert_store.update_status(alert_id, data['status'])
+            if old_status is None:
+                return jsonify({'status': 'error', 'message': 'Alerte non trouvée'}), 404
+            capture_call("Statistiques d'alerte", alert_stats.record_status_change, old_status, data['status'])
+            capture_call("Notification d'alerte", event_bus.publish, 'alert_updated',
+                         {'id': alert_id, 'status': data['status'], 'old_status': old_status})
             return jsonify({'status': 'success', 'message': 'Statut mis à jour'})
         else:
             return jsonify({'status': 'error', 'message': 'Statut invalide'}), 400
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/alerts/<alert_id>/detection')
+def alert_detection(alert_id):
+    """Détail d'une alerte automatique : pistes suivies et historique de confiance"""
+    event = alert_store.get_detection_event(alert_id)
+    if event is None:
+        return jsonify({'status': 'error', 'message': 'Aucune détection associée à cette alerte'}), 404
+    return jsonify(event)
+
+@app.route('/api/incidents')
+def api_incidents():
+    """Incidents en cours (confiance décroissante) ; ?closed=1 ajoute les incidents récemment clôturés"""
+    include_closed = request.args.get('closed') in ('1', 'true')
+    return jsonify({'incidents': incident_correlator.list(include_closed)})
+
+@app.route('/api/incidents/<incident_id>')
+def api_incident(incident_id):
+    incident = incident_correlator.get(incident_id)
+    if incident is None:
+        return jsonify({'status': 'error', 'message': 'Incident non trouvé'}), 404
+    return jsonify(incident)
+
+def collect_runtime_metrics():
+    """Statistiques déjà tenues par les caméras et les services, lues à chaque collecte"""
+    with camera_manager.lock:
+        cameras = list(camera_manager.cameras.values())
+    
+    def per_camera(value):
+        return [({'camera': camera.camera_id}, value(camera)) for camera in cameras]
+    
+    yield ('forest_camera_up', 'gauge', "1 si la caméra reçoit des images",
+           per_camera(lambda c: int(c.status == 'running' and not c.stopped)))
+    yield ('forest_camera_frames_captured', 'counter', "Images reçues et décodées",
+           per_camera(lambda c: c.frame_index))
+    yield ('forest_camera_capture_fps', 'gauge', "Images reçues par seconde (moyenne glissante)",
+           per_camera(lambda c: c.capture_fps()))
+    yield ('forest_camera_frames_published', 'counter', "Images diffusées aux spectateurs",
+           per_camera(lambda c: c.frames_received))
+    yield ('forest_camera_frames_skipped', 'counter', "Images non analysées (fréquence de détection adaptative)",
+           per_camera(lambda c: c.detection_controller.frames_seen - c.detection_controller.frames_selected))
+    yield ('forest_camera_frame_cache_lookups', 'counter', "Images analysables cherchées dans le cache d'empreintes",
+           per_camera(lambda c: c.frame_cache.lookups))
+    yield ('forest_camera_frame_cache_hits', 'counter', "Inférences évitées (image identique ou quasi identique)",
+           [({'camera': camera.camera_id, 'kind': kind}, hits) for camera in cameras
+            for kind, hits in (('exact', camera.frame_cache.exact_hits),
+                               ('similar', camera.frame_cache.similar_hits))])
+    yield ('forest_camera_decodes_skipped', 'counter', "JPEG identiques au précédent, non redécodés",
+           per_camera(lambda c: c.frame_cache.decodes_skipped))
+    yield ('forest_camera_frames_dropped', 'counter', "Images jetées par les files du pipeline",
+           [({'camera': camera.camera_id, 'queue': name}, queue.dropped)
+            for camera in cameras for name, queue in camera.pipeline.queues.items()])
+    yield ('forest_camera_viewers', 'gauge', "Spectateurs connectés au flux",
+           per_camera(lambda c: c.broadcaster.viewers))
+    yield ('forest_camera_jpeg_encodes', 'counter', "Encodages JPEG (un par image, quel que soit le nombre de spectateurs)",
+           per_camera(lambda c: c.broadcaster.encodes))
+    yield ('forest_camera_connects', 'counter', "Connexions et reconnexions au flux de la caméra",
+           per_camera(lambda c: c.connects))
+    yield ('forest_camera_reconnects', 'counter', "Interruptions du flux suivies d'une tentative de reconnexion",
+           per_camera(lambda c: c.reconnects))
+    
+    yield ('forest_inference_batches', 'counter', "Lots envoyés au modèle", [({}, inference_scheduler.batches)])
+    yield ('forest_inference_frames', 'counter', "Images analysées par le modèle", [({}, inference_scheduler.frames)])
+    yield ('forest_inference_frames_replaced', 'counter', "Images remplacées par une plus récente avant l'inférence",
+           [({}, inference_scheduler.dropped)])
+    yield ('forest_inference_frame_cost_seconds', 'gauge', "Coût moyen d'inférence d'une image",
+           [({}, inference_scheduler.frame_cost)])
+    yield ('forest_model_ready', 'gauge', "1 si le modèle est chargé et préchauffé",
+           [({'backend': model_state['backend'] or ''}, int(shared_model is not None))])
+    
+    fire_events = fire_event_tracker.get_stats()
+    yield ('forest_fire_events_opened', 'counter', "Événements de feu confirmés (alertes automatiques)",
+           [({}, fire_events['events_opened'])])
+    yield ('forest_fire_events_open', 'gauge', "Événements de feu en cours", [({}, fire_events['open_events'])])
+    incidents = incident_correlator.get_stats()
+    yield ('forest_incidents_active', 'gauge', "Incidents en cours (détections et alertes corrélées)",
+           [({}, incidents['active_incidents'])])
+    yield ('forest_incidents_opened', 'counter', "Incidents ouverts", [({}, incidents['incidents_opened'])])
+    clips = clip_recorder.get_stats()
+    yield ('forest_clip_buffer_bytes', 'gauge', "Mémoire des tampons de pré-roll", [({}, clips['buffered_bytes'])])
+    yield ('forest_clips_written', 'counter', "Séquences vidéo écrites sur disque", [({}, clips['clips_written'])])
+    yield ('forest_clip_write_errors', 'counter', "Échecs d'écriture de séquences", [({}, clips['write_errors'])])
+    ingest = image_ingestor.get_stats()
+    yield ('forest_image_ingest_pending', 'gauge', "Photos d'alertes en attente de traitement",
+           [({}, ingest['pending'])])
+    yield ('forest_image_ingest_processed', 'counter', "Photos d'alertes traitées", [({}, ingest['processed'])])
+    yield ('forest_image_ingest_failed', 'counter', "Photos d'alertes illisibles", [({}, ingest['failed'])])
+    yield ('forest_event_stream_clients', 'gauge', "Clients connectés à /api/events", [({}, event_bus.subscribers)])
+    yield ('forest_alerts', 'gauge', "Alertes par statut",
+           [({'status': status}, count) for status, count in alert_stats.snapshot()['by_status'].items()])
+
+if SERVER_ROLE != 'web':
+    metrics_registry.add_collector(collect_runtime_metrics)
+
+# Métriques propres à chaque processus web (requêtes Flask, requêtes SQLite)
+web_metrics = (metric_request_seconds, metric_requests, metric_alert_query_seconds)
+
+@app.before_request
+def start_request_timer():
+    g.request_started_at = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started_at = g.get('request_started_at')
+    if started_at is not None:
+        # Modèle de route (et non l'URL) : nombre de séries borné
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        # pid lu à chaque requête : correct même si l'application est importée avant le fork
+        worker = str(os.getpid())
+        metric_request_seconds.labels(route, request.method, worker).observe(time.perf_counter() - started_at)
+        metric_requests.labels(route, request.method, str(response.status_code), worker).inc()
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métriques au format texte Prometheus"""
+    if SERVER_ROLE == 'web':
+        # Caméras et modèle (processus de capture) + requêtes de ce processus web ;
+        # capture injoignable : métriques du processus web seules, forest_capture_up à 0
+        try:
+            capture, capture_up = control_client.call('metrics'), 1
+        except CONTROL_ERRORS as e:
+            print(f"Métriques du processus de capture indisponibles: {e}")
+            capture, capture_up = '', 0
+        text = (capture + metrics_registry.render(web_metrics, collectors=False) +
+                "# HELP forest_capture_up 1 si le processus de capture répond\n"
+                "# TYPE forest_capture_up gauge\n"
+                f"forest_capture_up {capture_up}\n")
+        return Response(text, content_type=metrics.CONTENT_TYPE)
+    return Response(metrics_registry.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/healthz')
+def healthz():
+    """Vivacité : le serveur web répond"""
+    return jsonify({'status': 'ok', 'uptime': round(time.time() - started_at, 1)})
+
+@app.route('/readyz')
+def readyz():
+    """Disponibilité : 503 tant que le modèle se charge ou se préchauffe"""
+    if SERVER_ROLE == 'web':
+        try:
+            body = control_client.call('readiness')
+        except CONTROL_ERRORS as e:
+            body = {'status': 'starting', 'detection': 'unavailable', 'error': str(e)}
+    else:
+        body = readiness()
+    body['alerts'] = alert_store is not None
+    return jsonify(body), 200 if body['status'] == 'ready' and alert_store is not None else 503
+
+def readiness():
+    ready = shared_model is not None or model_state['status'] not in ('loading', 'warming_up')
+    return dict(model_state, status='ready' if ready else 'starting',
+                detection='ready' if shared_model is not None else model_state['status'])
+
 # Assurez-vous que les dossiers nécessaires existent
 def create_dirs():
     os.makedirs('static', exist_ok=True)
@@ -557,7 +1651,157 @@ def create_dirs():
     os.makedirs('static/uploads', exist_ok=True)
     os.makedirs('templates', exist_ok=True)
 
+# Mode production : commandes reçues des processus web (processus de capture)
+CONTROL_METHODS = {
+    'alert_stats': ('record_created', 'record_status_change', 'record_severity_change', 'snapshot'),
+    'clip_recorder': ('trigger', 'is_recording', 'get_stats'),
+    'image_ingestor': ('submit', 'get_stats'),
+    'incident_correlator': ('set_camera_position', 'camera_position', 'add_report', 'list', 'get', 'get_stats'),
+}
+
+def add_camera_command(source, camera_id, tiling):
+    camera = camera_manager.add(source, camera_id, tiling=tiling)
+    return camera.get_status() if camera is not None else None
+
+def configure_tiling_command(camera_id, config):
+    camera = camera_manager.get(camera_id)
+    if camera is None:
+        raise ValueError('Caméra non trouvée')
+    camera.configure_tiling(config)
+    return camera.get_status()
+
+def watch_command(camera_id):
+    frame_leases[camera_id] = time.time() + FRAME_LEASE_SECONDS
+
+CONTROL_COMMANDS = {
+    'cameras': camera_manager.statuses,
+    'add_camera': add_camera_command,
+    'remove_camera': camera_manager.remove,
+    'stop_all': camera_manager.stop_all,
+    'configure_tiling': configure_tiling_command,
+    'watch': watch_command,
+    'publish': event_bus.publish,
+    'runtime_status': runtime_status,
+    'readiness': readiness,
+    # Tout sauf les métriques tenues par chaque processus web
+    'metrics': lambda: metrics_registry.render([m for m in metrics_registry.metrics if m not in web_metrics]),
+}
+
+def handle_control(command, arguments):
+    service, _, method = command.partition('.')
+    if method:
+        if method not in CONTROL_METHODS.get(service, ()):
+            raise ValueError(f"Commande inconnue: {command}")
+        return getattr(globals()[service], method)(*arguments)
+    if command not in CONTROL_COMMANDS:
+        raise ValueError(f"Commande inconnue: {command}")
+    return CONTROL_COMMANDS[command](*arguments)
+
+control_client = None
+shared_event_log = None
+# Erreurs d'une commande vers le processus de capture : injoignable ou délai dépassé
+# (OSError, dont ConnectionError), réponse invalide ou commande échouée (ValueError)
+CONTROL_ERRORS = (OSError, ValueError)
+
+def capture_call(description, function, *arguments):
+    """Suite non essentielle d'une requête (exécutée par le processus de capture en rôle
+    web) : une panne est journalisée sans faire échouer la requête"""
+    try:
+        return function(*arguments)
+    except CONTROL_ERRORS as e:
+        print(f"{description} ignorée, processus de capture indisponible: {e}")
+        return None
+
+def start_capture_services():
+    """Processus de capture : journal d'événements partagé et serveur de commandes"""
+    global shared_event_log
+    if not CONTROL_AUTHKEY:
+        raise RuntimeError("CONTROL_AUTHKEY doit être défini en mode production")
+    # Ids croissants d'un redémarrage à l'autre : les processus web détectent la coupure
+    event_bus.last_id = int(time.time() * 1000)
+    shared_event_log = SharedEventLog(f"{SHARED_STATE_PREFIX}-events", create=True)
+    event_bus.listener = shared_event_log.append
+    ControlServer(CONTROL_ADDRESS, CONTROL_AUTHKEY, handle_control).start()
+    print(f"Processus de capture prêt (commandes sur {CONTROL_ADDRESS[0]}:{CONTROL_ADDRESS[1]})")
+
+def connect_to_capture():
+    """Processus web : caméras, statistiques et événements fournis par le processus de capture"""
+    global control_client, camera_manager, clip_recorder, image_ingestor, alert_stats, incident_correlator
+    control_client = ControlClient(CONTROL_ADDRESS, CONTROL_AUTHKEY)
+    camera_manager = RemoteCameraManager(control_client)
+    clip_recorder = RemoteService(control_client, 'clip_recorder', clip_recorder,
+                                  CONTROL_METHODS['clip_recorder'])
+    # Envois écrits sur disque ici, traités par le pool du processus de capture
+    image_ingestor = RemoteService(control_client, 'image_ingestor', image_ingestor,
+                                   CONTROL_METHODS['image_ingestor'])
+    alert_stats = RemoteService(control_client, 'alert_stats', alert_stats,
+                                CONTROL_METHODS['alert_stats'])
+    incident_correlator = RemoteService(control_client, 'incident_correlator', incident_correlator,
+                                        CONTROL_METHODS['incident_correlator'])
+    event_bus.forward = lambda event_type, data: control_client.call('publish', event_type, data)
+    SharedEventFollower(f"{SHARED_STATE_PREFIX}-events", event_bus).start()
+
+def run_capture_forever():
+    """Boucle principale du processus de capture (pas de serveur HTTP)"""
+    stop = threading.Event()
+    # Arrêt demandé par le processus principal : arrêter les caméras et libérer les segments
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        camera_manager.stop_all()
+        if shared_event_log is not None:
+            shared_event_log.close()
+
+app_initialized = False
+app_init_lock = threading.Lock()
+
+def create_app(warmup=True):
+    """Fabrique de l'application : ouvre la base, démarre les threads de fond et
+    lance le chargement du modèle en arrière-plan. Rapide : les pages et les API
+    d'alertes répondent avant que le modèle soit prêt (voir /readyz).
+    
+    En rôle `web` (SERVER_ROLE), seule la base est ouverte : caméras, modèle et
+    traitements de fond sont ceux du processus de capture.
+    """
+    global alert_store, app_initialized
+    with app_init_lock:
+        if app_initialized:
+            return app
+        create_dirs()
+        alert_store = AlertStore(ALERTS_DB_PATH)
+        alert_store.query_observer = lambda operation, seconds: \
+            metric_alert_query_seconds.labels(operation, str(os.getpid())).observe(seconds)
+        if SERVER_ROLE == 'web':
+            connect_to_capture()
+            app_initialized = True
+            return app
+        alert_stats.load(alert_store)
+        for camera_id, position in load_camera_configs(CAMERA_POSITIONS_PATH).items():
+            try:
+                incident_correlator.set_camera_position(camera_id, position)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[{camera_id}] Position de caméra ignorée: {e}")
+        inference_scheduler.start()
+        fire_event_tracker.start()
+        clip_recorder.start()
+        image_ingestor.start()
+        recovered = image_ingestor.recover()
+        if recovered:
+            print(f"{recovered} photo(s) d'alerte non traitée(s) remise(s) en file")
+        if SERVER_ROLE == 'capture':
+            start_capture_services()
+        app_initialized = True
+    if warmup:
+        start_model_loading()
+    return app
+
 if __name__ == '__main__':
-    create_dirs()
-    # Utiliser l'adresse IP spécifiée
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app()
+    # Serveur de développement (un seul processus) ; en production : production_server.py.
+    # Sans rechargeur : il relancerait create_app() dans un second processus (caméras ouvertes
+    # deux fois, envois en attente traités deux fois par recover())
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
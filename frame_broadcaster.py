@@ -0,0 +1,119 @@
+"""
+Diffusion d'un flux MJPEG à plusieurs spectateurs.
+
+La caméra publie ses images ; chaque image est encodée en JPEG une seule fois,
+à la première demande d'un spectateur, puis les mêmes octets sont servis à tous.
+Un spectateur lent saute directement à l'image la plus récente au lieu
+d'accumuler du retard.
+"""
+import threading
+import time
+
+import cv2
+
+from frame_pipeline import StageStats
+
+BOUNDARY = b'frame'
+
+
+def multipart_chunk(jpeg_bytes):
+    """Partie multipart/x-mixed-replace complète pour une image JPEG"""
+    return (b'--' + BOUNDARY + b'\r\n'
+            b'Content-Type: image/jpeg\r\n'
+            b'Content-Length: ' + str(len(jpeg_bytes)).encode() + b'\r\n\r\n' +
+            jpeg_bytes + b'\r\n')
+
+
+class FrameBroadcaster:
+    """Dernière image d'une caméra, versionnée et encodée une seule fois"""
+
+    def __init__(self, jpeg_quality=60):
+        self.encode_params = [
+            int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality,
+            int(cv2.IMWRITE_JPEG_OPTIMIZE), 1
+        ]
+        self.condition = threading.Condition()
+        self.encode_lock = threading.Lock()
+        self.frame = None
+        self.sequence = 0
+        # Cache de l'encodage de la dernière image
+        self.encoded_sequence = 0
+        self.encoded_chunk = None
+        self.encoded_jpeg = None
+        # Statistiques
+        self.viewers = 0
+        self.encodes = 0
+        self.encode_stats = StageStats()
+        # Appelé avec la durée de chaque encodage (métriques)
+        self.encode_observer = None
+        self.closed = False
+
+    def publish(self, frame):
+        """Publier une nouvelle image (ne doit plus être modifiée par l'appelant)"""
+        with self.condition:
+            self.frame = frame
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def close(self):
+        """Réveiller les spectateurs en attente (caméra arrêtée)"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def subscribe(self):
+        with self.condition:
+            self.viewers += 1
+
+    def unsubscribe(self):
+        with self.condition:
+            self.viewers = max(0, self.viewers - 1)
+
+    def wait_for_frame(self, last_sequence, timeout=1.0):
+        """Attendre une image plus récente que last_sequence.
+
+        Renvoie (séquence, partie multipart) ou (last_sequence, None) si aucune
+        nouvelle image n'est arrivée avant le délai.
+        """
+        with self.condition:
+            if self.sequence == last_sequence and not self.closed:
+                self.condition.wait(timeout)
+            if self.sequence == last_sequence or self.frame is None:
+                return last_sequence, None
+            sequence, frame = self.sequence, self.frame
+        return self.encode(sequence, frame)
+
+    def encode(self, sequence, frame):
+        """Encoder une image une seule fois, quel que soit le nombre de spectateurs.
+
+        Renvoie (séquence encodée, partie multipart).
+        """
+        with self.encode_lock:
+            if self.encoded_sequence >= sequence and self.encoded_chunk is not None:
+                # Déjà encodée (ou une plus récente) par un autre spectateur
+                return self.encoded_sequence, self.encoded_chunk
+            start = time.time()
+            success, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+            elapsed = time.time() - start
+            self.encode_stats.record(elapsed)
+            if self.encode_observer is not None:
+                self.encode_observer(elapsed)
+            if not success:
+                return sequence, None
+            self.encoded_sequence = sequence
+            self.encoded_jpeg = buffer.tobytes()
+            self.encoded_chunk = multipart_chunk(self.encoded_jpeg)
+            self.encodes += 1
+            return sequence, self.encoded_chunk
+
+    def latest_jpeg(self):
+        """(séquence, octets JPEG) de la dernière image, encodée une seule fois ; None si aucune"""
+        with self.condition:
+            sequence, frame = self.sequence, self.frame
+        if frame is None:
+            return None
+        self.encode(sequence, frame)
+        with self.encode_lock:
+            if self.encoded_jpeg is None:
+                return None
+            return self.encoded_sequence, self.encoded_jpeg
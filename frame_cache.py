@@ -0,0 +1,108 @@
+"""
+Cache des résultats d'inférence par empreinte d'image, par caméra.
+
+Beaucoup de sources MJPEG renvoient exactement le même JPEG quand le capteur
+se fige, et une scène immobile (la nuit) produit des images quasi identiques.
+Deux empreintes évitent de refaire le travail :
+- un hachage des octets JPEG : une image identique à la précédente n'est pas
+  redécodée, et son résultat d'inférence est retrouvé à coup sûr ;
+- un hachage perceptuel (dHash 64 bits) de l'image réduite : une image
+  quasi identique (distance de Hamming au plus `max_distance`) réutilise les
+  détections d'une image récente.
+
+Les résultats sont gardés dans un petit cache LRU et ne sont plus réutilisés
+au-delà de `max_age` secondes. Une petite fumée lointaine ne change presque
+rien au dHash : les détections imposées par l'intervalle maximal de détection
+(`similar=False`) n'acceptent qu'une image identique octet pour octet, et le
+serveur plafonne `max_age` à cet intervalle.
+"""
+import collections
+import hashlib
+
+import cv2
+import numpy as np
+
+from detection_controller import motion_signature
+
+
+def jpeg_digest(data):
+    """Empreinte des octets JPEG (accepte bytes ou memoryview)"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def perceptual_hash(frame):
+    """dHash 64 bits : sens du gradient horizontal d'une vignette 9x8 en niveaux de gris"""
+    small = motion_signature(frame, size=(72, 64))
+    thumb = cv2.resize(small, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(thumb[:, 1:] > thumb[:, :-1]).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FrameCache:
+    """LRU des derniers résultats d'une caméra, retrouvés par empreinte exacte ou perceptuelle"""
+
+    def __init__(self, capacity=8, max_distance=2, max_age=10.0):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.max_age = max_age
+        # hachage perceptuel -> (empreinte JPEG, valeur, heure d'enregistrement)
+        self.entries = collections.OrderedDict()
+        # Statistiques
+        self.lookups = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.decodes_skipped = 0
+        self.annotations_reused = 0
+
+    def lookup(self, digest, phash, now, similar=True):
+        """Valeur enregistrée pour une image identique (ou quasi identique si `similar`), ou None"""
+        if self.capacity <= 0:
+            return None
+        self.lookups += 1
+        for key in [k for k, entry in self.entries.items() if now - entry[2] > self.max_age]:
+            del self.entries[key]
+        best, best_distance = None, None
+        for key, (entry_digest, _, _) in self.entries.items():
+            if digest is not None and entry_digest == digest:
+                best, best_distance = key, 0
+                break
+            if not similar:
+                continue
+            distance = hamming(key, phash)
+            if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                best, best_distance = key, distance
+        if best is None:
+            return None
+        entry = self.entries[best]
+        self.entries.move_to_end(best)
+        if digest is not None and entry[0] == digest:
+            self.exact_hits += 1
+        else:
+            self.similar_hits += 1
+        return entry[1]
+
+    def store(self, digest, phash, value, now):
+        if self.capacity <= 0:
+            return
+        self.entries[phash] = (digest, value, now)
+        self.entries.move_to_end(phash)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        hits = self.exact_hits + self.similar_hits
+        return {
+            'entries': len(self.entries),
+            'lookups': self.lookups,
+            'exact_hits': self.exact_hits,
+            'similar_hits': self.similar_hits,
+            'hit_rate': round(hits / self.lookups, 3) if self.lookups else 0.0,
+            'decodes_skipped': self.decodes_skipped,
+            'annotations_reused': self.annotations_reused,
+        }
@@ -0,0 +1,200 @@
+"""
+Pipeline d'images par étapes reliées par des files bornées.
+
+Chaque étape tourne dans son propre thread et lit une file à capacité fixe ;
+quand une file est pleine, l'élément le plus ancien est jeté au profit du
+plus récent. Une étape lente ne retarde donc jamais les étapes en amont et la
+latence de bout en bout reste bornée. Chaque étape mesure sa latence et
+chaque file sa profondeur et ses pertes.
+"""
+import collections
+import threading
+import time
+
+
+class DropOldestQueue:
+    """File bornée qui jette l'élément le plus ancien quand elle est pleine"""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, int(maxsize))
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.put_count = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.put_count += 1
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Prochain élément, ou None si la file est fermée ou le délai écoulé"""
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.items.clear()
+            self.condition.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_stats(self):
+        return {'depth': len(self.items), 'maxsize': self.maxsize,
+                'received': self.put_count, 'dropped': self.dropped}
+
+
+class StageStats:
+    """Latence d'une étape : dernière, moyenne glissante, maximum et percentiles (en ms)"""
+
+    def __init__(self, smoothing=0.1, window=1000):
+        self.smoothing = smoothing
+        self.count = 0
+        self.last = 0.0
+        self.average = 0.0
+        self.max = 0.0
+        # Dernières mesures, pour les percentiles p50/p95/p99
+        self.samples = collections.deque(maxlen=window)
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.last = ms
+        self.average = ms if self.count == 1 else self.average + self.smoothing * (ms - self.average)
+        self.max = max(self.max, ms)
+        self.samples.append(ms)
+
+    def percentiles(self, points=(50, 95, 99)):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {f'p{point}_ms': 0.0 for point in points}
+        return {f'p{point}_ms': round(ordered[min(len(ordered) - 1, len(ordered) * point // 100)], 2)
+                for point in points}
+
+    def get_stats(self):
+        stats = {'count': self.count, 'last_ms': round(self.last, 2),
+                 'avg_ms': round(self.average, 2), 'max_ms': round(self.max, 2)}
+        stats.update(self.percentiles())
+        return stats
+
+
+class FramePacket:
+    """Image circulant dans le pipeline avec ses horodatages"""
+
+    __slots__ = ('index', 'frame', 'captured_at', 'detect', 'forced', 'digest')
+
+    def __init__(self, index, frame, captured_at=None, digest=None):
+        self.index = index
+        self.frame = frame
+        self.captured_at = captured_at if captured_at is not None else time.time()
+        self.detect = False
+        # Détection imposée par l'intervalle maximal (pas de résultat approché réutilisé)
+        self.forced = False
+        # Empreinte des octets JPEG d'origine (flux MJPEG), None pour les autres sources
+        self.digest = digest
+
+
+class PipelineStage:
+    """Thread qui applique `func` aux éléments de sa file d'entrée.
+
+    `outputs` est une liste de (file, prédicat) : le résultat est déposé dans
+    chaque file dont le prédicat est vrai (ou absent). Un résultat None n'est
+    transmis nulle part.
+    """
+
+    def __init__(self, name, func, input_queue, outputs=()):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.outputs = list(outputs)
+        self.stats = StageStats()
+        self.stopped = False
+        self.thread = None
+
+    def start(self, prefix=''):
+        self.thread = threading.Thread(target=self.run, name=f"{prefix}{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        while not self.stopped:
+            item = self.input_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            start = time.time()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"Erreur dans l'étape {self.name}: {e}")
+                continue
+            self.stats.record(time.time() - start)
+            if result is None:
+                continue
+            for queue, predicate in self.outputs:
+                if predicate is None or predicate(result):
+                    queue.put(result)
+
+
+class FramePipeline:
+    """Ensemble d'étapes et de files nommées pour une caméra"""
+
+    def __init__(self, name):
+        self.name = name
+        self.queues = {}
+        self.stages = []
+        # Étape d'entrée alimentée par le thread de capture (pas de thread dédié)
+        self.source_stats = StageStats()
+        self.end_to_end = StageStats()
+
+    def add_queue(self, name, maxsize=1):
+        self.queues[name] = DropOldestQueue(maxsize)
+        return self.queues[name]
+
+    def add_stage(self, name, func, input_name, outputs=()):
+        """Ajouter une étape ; outputs : noms de files ou couples (nom, prédicat)"""
+        routes = []
+        for output in outputs:
+            queue_name, predicate = output if isinstance(output, tuple) else (output, None)
+            routes.append((self.queues[queue_name], predicate))
+        stage = PipelineStage(name, func, self.queues[input_name], routes)
+        self.stages.append(stage)
+        return stage
+
+    def push(self, queue_name, item, source_seconds=None):
+        """Déposer un élément produit par la source (ex. image décodée)"""
+        if source_seconds is not None:
+            self.source_stats.record(source_seconds)
+        self.queues[queue_name].put(item)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start(prefix=f"{self.name}-")
+        return self
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for queue in self.queues.values():
+            queue.close()
+
+    def get_stats(self):
+        stats = {
+            'source': self.source_stats.get_stats(),
+            'end_to_end': self.end_to_end.get_stats(),
+            'stages': {stage.name: stage.stats.get_stats() for stage in self.stages},
+            'queues': {name: queue.get_stats() for name, queue in self.queues.items()},
+        }
+        return stats
@@ -0,0 +1,172 @@
+"""
+Traitement en arrière-plan des photos jointes aux alertes citoyennes.
+
+La requête se contente d'écrire le fichier reçu sur disque, par blocs, dans un
+dossier non publié (`fsync` puis renommage : l'envoi est durable dès la
+réponse). Un pool de threads se charge ensuite :
+- du décodage (orientation EXIF appliquée par OpenCV) ;
+- d'un réencodage JPEG sans métadonnées (les coordonnées GPS et le modèle
+  d'appareil de la photo d'origine ne sont jamais publiés) ;
+- d'une miniature pour la liste d'administration et d'une version web de
+  taille raisonnable ;
+- éventuellement d'une estimation de gravité par le modèle de détection.
+
+L'original est supprimé une fois traité. Au redémarrage, les envois restés
+dans le dossier d'entrée sont retraités (`recover`).
+"""
+import os
+import queue
+import shutil
+import threading
+import time
+
+import cv2
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_image(path):
+    """Décoder une image (JPEG, PNG, ou première image d'un GIF) ; None si illisible"""
+    frame = cv2.imread(path, cv2.IMREAD_COLOR)
+    if frame is None:
+        # OpenCV ne lit pas les GIF avec imread
+        capture = cv2.VideoCapture(path)
+        ok, frame = capture.read()
+        capture.release()
+        if not ok:
+            return None
+    return frame
+
+
+def fit_within(frame, size):
+    """Réduire (sans jamais agrandir) pour que le plus grand côté fasse au plus `size`"""
+    height, width = frame.shape[:2]
+    ratio = size / max(height, width)
+    if ratio >= 1:
+        return frame
+    return cv2.resize(frame, (round(width * ratio), round(height * ratio)), interpolation=cv2.INTER_AREA)
+
+
+def write_jpeg(path, frame, quality):
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Encodage JPEG impossible")
+    with open(path + '.tmp', 'wb') as f:
+        f.write(buffer.tobytes())
+    os.replace(path + '.tmp', path)
+
+
+class ImageIngestor:
+    """Écriture durable des envois et pool de traitement des images"""
+
+    def __init__(self, incoming_dir, output_dir, url_prefix, workers=2, scorer=None,
+                 on_processed=None, thumbnail_size=320, web_size=1280, quality=85):
+        self.incoming_dir = incoming_dir
+        self.output_dir = output_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        self.workers = max(1, int(workers))
+        # scorer(alert_id, image) -> confiance max de feu (ou None) ; appelé dans un worker
+        self.scorer = scorer
+        # on_processed(alert_id, {'image', 'thumbnail', 'score'})
+        self.on_processed = on_processed
+        self.thumbnail_size = thumbnail_size
+        self.web_size = web_size
+        self.quality = quality
+        self.queue = queue.Queue()
+        self.threads = []
+        # Statistiques
+        self.processed = 0
+        self.failed = 0
+        self.processing_time = 0.0
+
+    def start(self):
+        if not self.threads:
+            os.makedirs(self.incoming_dir, exist_ok=True)
+            os.makedirs(self.output_dir, exist_ok=True)
+            for index in range(self.workers):
+                thread = threading.Thread(target=self.run, name=f"image-ingest-{index}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        return self
+
+    def stop(self):
+        for _ in self.threads:
+            self.queue.put(None)
+
+    def store_upload(self, alert_id, stream, extension):
+        """Écrire l'envoi par blocs dans le dossier d'entrée ; renvoie son chemin"""
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        path = os.path.join(self.incoming_dir, f"{alert_id}.{extension}")
+        with open(path + '.tmp', 'wb') as f:
+            shutil.copyfileobj(stream, f, CHUNK_SIZE)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        return path
+
+    def discard_upload(self, path):
+        """Supprimer un envoi dont l'alerte n'a pas pu être enregistrée"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def submit(self, alert_id, path):
+        self.queue.put((alert_id, path))
+
+    def recover(self):
+        """Remettre en file les envois non traités avant un arrêt ; renvoie leur nombre"""
+        if not os.path.isdir(self.incoming_dir):
+            return 0
+        names = [name for name in os.listdir(self.incoming_dir) if not name.endswith('.tmp')]
+        for name in names:
+            self.submit(name.rsplit('.', 1)[0], os.path.join(self.incoming_dir, name))
+        return len(names)
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            alert_id, path = job
+            start = time.time()
+            try:
+                result = self.process(alert_id, path)
+            except Exception as e:
+                self.failed += 1
+                print(f"Erreur de traitement de l'image de l'alerte {alert_id}: {e}")
+                continue
+            self.processed += 1
+            self.processing_time += time.time() - start
+            if self.on_processed is not None:
+                try:
+                    self.on_processed(alert_id, result)
+                except Exception as e:
+                    print(f"Erreur de mise à jour de l'alerte {alert_id}: {e}")
+
+    def process(self, alert_id, path):
+        frame = read_image(path)
+        if frame is None:
+            os.remove(path)
+            raise ValueError("Image illisible")
+        web = fit_within(frame, self.web_size)
+        # Réencodage : aucune métadonnée EXIF n'est recopiée
+        write_jpeg(os.path.join(self.output_dir, f"{alert_id}.jpg"), web, self.quality)
+        write_jpeg(os.path.join(self.output_dir, f"{alert_id}_thumb.jpg"),
+                   fit_within(web, self.thumbnail_size), self.quality)
+        score = self.scorer(alert_id, web) if self.scorer is not None else None
+        os.remove(path)
+        return {
+            'image': f"{self.url_prefix}/{alert_id}.jpg",
+            'thumbnail': f"{self.url_prefix}/{alert_id}_thumb.jpg",
+            'score': score,
+        }
+
+    def get_stats(self):
+        return {
+            'workers': self.workers,
+            'pending': self.queue.qsize(),
+            'processed': self.processed,
+            'failed': self.failed,
+            'avg_processing_ms': round(1000 * self.processing_time / self.processed, 1) if self.processed else 0,
+        }
@@ -0,0 +1,423 @@
+"""
+Corrélation des détections des caméras et des alertes citoyennes en incidents.
+
+Une tour ne voit qu'une direction : chaque détection devient un relèvement
+(position et cap de la caméra, décalé de la position horizontale de la boîte
+dans le champ de vision). Une alerte citoyenne géolocalisée est un point. Un
+incident regroupe les observations cohérentes dans le temps et l'espace :
+- un point rejoint un incident s'il est proche de sa position estimée, ou
+  s'il tombe sur l'un de ses relèvements ;
+- un relèvement rejoint un incident s'il pointe vers sa position, s'il croise
+  le relèvement d'une autre caméra (triangulation), ou s'il prolonge celui de
+  la même caméra.
+
+La position est la moyenne des croisements de relèvements et des points
+signalés. La confiance combine les sources comme des indices indépendants ;
+la tendance (croissance, stabilité, décroissance) suit l'évolution de la
+surface des boîtes de détection vue par chaque caméra.
+
+Le traitement est incrémental : une observation n'est comparée qu'aux
+incidents actifs, les incidents sans nouvelle observation depuis
+`expire_after` secondes sont clôturés et ne sont plus jamais parcourus.
+"""
+import collections
+import math
+import threading
+import time
+import uuid
+
+EARTH_RADIUS_M = 6371008.8
+# Contribution d'une alerte citoyenne à la confiance, selon la gravité déclarée
+REPORT_WEIGHTS = {'low': 0.3, 'medium': 0.4, 'high': 0.5}
+# Croissance relative (par minute) au-delà de laquelle un feu est dit en extension
+TREND_THRESHOLD = 0.05
+
+
+def validate_position(position):
+    """Vérifier la position d'une caméra reçue par l'API ; lève ValueError"""
+    if not isinstance(position, dict):
+        raise ValueError("Position de caméra invalide")
+    lat, lng = float(position['lat']), float(position['lng'])
+    heading = float(position.get('heading', 0)) % 360
+    fov = float(position.get('fov', 60))
+    range_km = float(position.get('range_km', 15))
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("Coordonnées hors limites")
+    if not 1 <= fov <= 360:
+        raise ValueError("fov doit être compris entre 1 et 360 degrés")
+    if not 0 < range_km <= 100:
+        raise ValueError("range_km doit être compris entre 0 et 100")
+    return {'lat': lat, 'lng': lng, 'heading': heading, 'fov': fov, 'range_km': range_km}
+
+
+def to_local(origin, lat, lng):
+    """Coordonnées planes (est, nord) en mètres autour de `origin` (quelques dizaines de km)"""
+    x = math.radians(lng - origin[1]) * EARTH_RADIUS_M * math.cos(math.radians(origin[0]))
+    y = math.radians(lat - origin[0]) * EARTH_RADIUS_M
+    return x, y
+
+
+def from_local(origin, x, y):
+    lat = origin[0] + math.degrees(y / EARTH_RADIUS_M)
+    lng = origin[1] + math.degrees(x / (EARTH_RADIUS_M * math.cos(math.radians(origin[0]))))
+    return lat, lng
+
+
+def direction(bearing):
+    """Vecteur unitaire (est, nord) d'un cap en degrés (0 : nord, sens horaire)"""
+    return math.sin(math.radians(bearing)), math.cos(math.radians(bearing))
+
+
+def angle_between(a, b):
+    return abs((a - b + 180) % 360 - 180)
+
+
+class Bearing:
+    """Relèvement d'une caméra : demi-droite partant de la caméra, de portée limitée"""
+
+    def __init__(self, position, bearing):
+        self.origin = (position['lat'], position['lng'])
+        self.bearing = bearing
+        self.range = position['range_km'] * 1000
+
+    def offset(self, lat, lng):
+        """(distance le long du relèvement, écart perpendiculaire) d'un point, en mètres"""
+        x, y = to_local(self.origin, lat, lng)
+        dx, dy = direction(self.bearing)
+        return x * dx + y * dy, abs(x * dy - y * dx)
+
+    def crossing(self, other, min_angle):
+        """Point (lat, lng) où deux relèvements se croisent dans leur portée, ou None"""
+        if angle_between(self.bearing, other.bearing) < min_angle or \
+                angle_between(self.bearing, other.bearing) > 180 - min_angle:
+            return None
+        ox, oy = to_local(self.origin, *other.origin)
+        d1, d2 = direction(self.bearing), direction(other.bearing)
+        cross = d1[0] * d2[1] - d1[1] * d2[0]
+        t1 = (ox * d2[1] - oy * d2[0]) / cross
+        t2 = (ox * d1[1] - oy * d1[0]) / cross
+        if not (0 < t1 <= self.range and 0 < t2 <= other.range):
+            return None
+        return from_local(self.origin, t1 * d1[0], t1 * d1[1])
+
+
+class CameraTrack:
+    """Ce qu'une caméra voit d'un incident : dernier relèvement et surface des boîtes"""
+
+    def __init__(self, camera_id, samples=30):
+        self.camera_id = camera_id
+        self.bearing = None
+        self.confidence = 0.0
+        self.last_seen = None
+        self.alert_ids = set()
+        # (horodatage, surface de la boîte en fraction de l'image)
+        self.sizes = collections.deque(maxlen=samples)
+
+    def growth(self):
+        """Croissance relative par minute (moindres carrés), None si trop peu d'images"""
+        if len(self.sizes) < 3 or self.sizes[-1][0] - self.sizes[0][0] < 10:
+            return None
+        count = len(self.sizes)
+        mean_t = sum(t for t, _ in self.sizes) / count
+        mean_size = sum(s for _, s in self.sizes) / count
+        variance = sum((t - mean_t) ** 2 for t, _ in self.sizes)
+        if variance == 0 or mean_size == 0:
+            return None
+        slope = sum((t - mean_t) * (s - mean_size) for t, s in self.sizes) / variance
+        return 60 * slope / mean_size
+
+
+class Incident:
+    """Un feu présumé, vu par une ou plusieurs caméras et/ou signalé par des citoyens"""
+
+    def __init__(self, now):
+        self.id = str(uuid.uuid4())
+        self.opened_at = now
+        self.last_seen = now
+        self.closed_at = None
+        self.cameras = {}
+        # alert_id -> (lat, lng)
+        self.reports = {}
+        # Sommes courantes des points signalés et produit de leurs probabilités
+        # d'erreur : position et confiance en O(1) à chaque alerte
+        self.report_sum = [0.0, 0.0]
+        self.report_miss = 1.0
+        self.location = None
+        self.location_source = None
+        self.crossings = 0
+        self.confidence = 0.0
+        self.trend = 'unknown'
+        self.growth = None
+
+    def bearings(self):
+        return [(camera_id, track.bearing) for camera_id, track in self.cameras.items()
+                if track.bearing is not None]
+
+    def refresh(self, min_angle):
+        """Recalculer position, confiance et tendance (coût : nombre de sources de l'incident)"""
+        points = []
+        bearings = [bearing for _, bearing in self.bearings()]
+        for index, first in enumerate(bearings):
+            for second in bearings[index + 1:]:
+                point = first.crossing(second, min_angle)
+                if point is not None:
+                    points.append(point)
+        self.crossings = len(points)
+        if self.reports:
+            points.append((self.report_sum[0] / len(self.reports), self.report_sum[1] / len(self.reports)))
+        if points:
+            self.location = (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+            self.location_source = '+'.join(
+                source for source, present in (('triangulation', self.crossings), ('reports', self.reports))
+                if present)
+        else:
+            self.location = self.location_source = None
+
+        # Sources indépendantes : 1 - produit des probabilités d'erreur
+        miss = self.report_miss
+        for track in self.cameras.values():
+            miss *= 1 - track.confidence
+        self.confidence = 1 - miss
+
+        growths = [(g, len(track.sizes)) for track in self.cameras.values()
+                   for g in [track.growth()] if g is not None]
+        if growths:
+            self.growth = sum(g * n for g, n in growths) / sum(n for _, n in growths)
+            self.trend = ('growing' if self.growth > TREND_THRESHOLD else
+                          'shrinking' if self.growth < -TREND_THRESHOLD else 'stable')
+        else:
+            self.growth, self.trend = None, 'unknown'
+
+    def signature(self):
+        """Ce qui mérite une notification : sources, position (~100 m), confiance, tendance"""
+        location = (round(self.location[0], 3), round(self.location[1], 3)) if self.location else None
+        return (len(self.cameras), len(self.reports), location, round(self.confidence, 1), self.trend)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': 'active' if self.closed_at is None else 'closed',
+            'opened_at': self.opened_at,
+            'last_seen': self.last_seen,
+            'closed_at': self.closed_at,
+            'location': {'lat': round(self.location[0], 6), 'lng': round(self.location[1], 6)}
+            if self.location else None,
+            'location_source': self.location_source,
+            'confidence': round(self.confidence, 3),
+            'trend': self.trend,
+            'growth_per_min': round(self.growth, 3) if self.growth is not None else None,
+            'cameras': [{
+                'camera_id': camera_id,
+                'origin': {'lat': track.bearing.origin[0], 'lng': track.bearing.origin[1]},
+                'bearing': round(track.bearing.bearing, 1),
+                'confidence': round(track.confidence, 3),
+                'last_seen': track.last_seen,
+                'alert_ids': sorted(track.alert_ids),
+            } for camera_id, track in self.cameras.items()],
+            'reports': sorted(self.reports),
+        }
+
+
+class IncidentCorrelator:
+    """Regroupement incrémental des détections et des alertes en incidents"""
+
+    def __init__(self, on_change=None, match_radius=2000.0, angle_tolerance=5.0,
+                 min_crossing_angle=10.0, expire_after=1800.0, closed_history=100):
+        # on_change(type, incident) : 'incident_opened', 'incident_updated' ou 'incident_closed'
+        self.on_change = on_change
+        self.match_radius = match_radius
+        self.angle_tolerance = angle_tolerance
+        self.min_crossing_angle = min_crossing_angle
+        self.expire_after = expire_after
+        self.lock = threading.Lock()
+        # camera_id -> position validée (lat, lng, heading, fov, range_km)
+        self.positions = {}
+        self.active = {}
+        self.closed = collections.deque(maxlen=closed_history)
+        # Rattachement direct des observations suivantes d'un même événement ou d'une même alerte
+        self.by_source = {}
+        # Statistiques
+        self.observations = 0
+        self.ignored = 0
+        self.incidents_opened = 0
+
+    def set_camera_position(self, camera_id, position):
+        """Position et orientation d'une caméra (None : la retirer)"""
+        with self.lock:
+            if position is None:
+                self.positions.pop(camera_id, None)
+            else:
+                self.positions[camera_id] = validate_position(position)
+
+    def camera_position(self, camera_id):
+        with self.lock:
+            return self.positions.get(camera_id)
+
+    def observe_detection(self, event):
+        """Événement de détection (ouverture ou mise à jour) : id, camera_id, bbox, frame_size"""
+        now = event.get('last_seen') or time.time()
+        with self.lock:
+            position = self.positions.get(event['camera_id'])
+            if position is None or not event.get('frame_size'):
+                # Sans position ni largeur d'image, pas de relèvement possible
+                self.ignored += 1
+                return None
+            width, height = event['frame_size']
+            x1, y1, x2, y2 = event['bbox']
+            offset = ((x1 + x2) / 2 / width - 0.5) * min(position['fov'], 359.9)
+            bearing = Bearing(position, (position['heading'] + offset) % 360)
+            confidence = event.get('confidence', event.get('max_confidence', 0.0))
+
+            changes = self.expire(now)
+            incident = self.by_source.get(event['id']) or self.match_bearing(event['camera_id'], bearing)
+            opened = incident is None
+            if opened:
+                incident = self.open_incident(now)
+            before = incident.signature()
+            track = incident.cameras.get(event['camera_id'])
+            if track is None:
+                track = incident.cameras[event['camera_id']] = CameraTrack(event['camera_id'])
+            track.bearing = bearing
+            track.confidence = max(track.confidence, confidence)
+            track.last_seen = now
+            track.alert_ids.add(event['id'])
+            track.sizes.append((now, max(0.0, (x2 - x1) * (y2 - y1)) / (width * height)))
+            self.by_source[event['id']] = incident
+            changes.append(self.commit(incident, now, opened, before))
+        return self.notify(changes, incident)
+
+    def add_report(self, alert):
+        """Alerte citoyenne : rattachée à un incident si elle est géolocalisée"""
+        coordinates = alert.get('coordinates')
+        if not coordinates:
+            return None
+        lat, lng = coordinates['lat'], coordinates['lng']
+        now = time.time()
+        with self.lock:
+            changes = self.expire(now)
+            incident = self.match_point(lat, lng)
+            opened = incident is None
+            if opened:
+                incident = self.open_incident(now)
+            before = incident.signature()
+            if alert['id'] not in incident.reports:
+                incident.reports[alert['id']] = (lat, lng)
+                incident.report_sum[0] += lat
+                incident.report_sum[1] += lng
+                incident.report_miss *= 1 - REPORT_WEIGHTS.get(alert.get('severity'), 0.4)
+            self.by_source[alert['id']] = incident
+            changes.append(self.commit(incident, now, opened, before))
+        return self.notify(changes, incident)
+
+    def open_incident(self, now):
+        incident = Incident(now)
+        self.active[incident.id] = incident
+        self.incidents_opened += 1
+        return incident
+
+    def commit(self, incident, now, opened, before):
+        self.observations += 1
+        incident.last_seen = max(incident.last_seen, now)
+        incident.refresh(self.min_crossing_angle)
+        if opened:
+            return 'incident_opened', incident.to_dict()
+        if incident.signature() != before:
+            return 'incident_updated', incident.to_dict()
+        return None
+
+    def notify(self, changes, incident):
+        if self.on_change is not None:
+            for change in changes:
+                if change is not None:
+                    self.on_change(*change)
+        return incident.id
+
+    def within(self, bearing, lat, lng):
+        along, across = bearing.offset(lat, lng)
+        tolerance = max(self.match_radius / 4, along * math.tan(math.radians(self.angle_tolerance)))
+        return 0 < along <= bearing.range + self.match_radius and across <= tolerance
+
+    def match_point(self, lat, lng):
+        """Incident actif le plus proche du point (position estimée, ou relèvement)"""
+        best, best_distance = None, None
+        for incident in self.active.values():
+            if incident.location is not None:
+                x, y = to_local(incident.location, lat, lng)
+                distance = math.hypot(x, y)
+                if distance > self.match_radius:
+                    continue
+            else:
+                offsets = [bearing.offset(lat, lng) for _, bearing in incident.bearings()
+                           if self.within(bearing, lat, lng)]
+                if not offsets:
+                    continue
+                distance = min(across for _, across in offsets)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = incident, distance
+        return best
+
+    def match_bearing(self, camera_id, bearing):
+        """Incident actif compatible avec un nouveau relèvement, du plus au moins précis"""
+        best, best_score = None, None
+        for incident in self.active.values():
+            if incident.location is not None:
+                if not self.within(bearing, *incident.location):
+                    continue
+                score = bearing.offset(*incident.location)[1]
+            else:
+                score = None
+                for other_camera, other in incident.bearings():
+                    if other_camera == camera_id:
+                        # Même caméra : même direction à la tolérance près
+                        if angle_between(other.bearing, bearing.bearing) <= self.angle_tolerance:
+                            score = self.match_radius
+                    elif bearing.crossing(other, self.min_crossing_angle) is not None:
+                        score = self.match_radius / 2
+                if score is None:
+                    continue
+            if best_score is None or score < best_score:
+                best, best_score = incident, score
+        return best
+
+    def expire(self, now):
+        """Clôturer les incidents sans observation depuis `expire_after` (sous le verrou)"""
+        changes = []
+        for incident in [i for i in self.active.values() if now - i.last_seen > self.expire_after]:
+            del self.active[incident.id]
+            incident.closed_at = incident.last_seen + self.expire_after
+            for source in list(incident.reports) + [alert_id for track in incident.cameras.values()
+                                                     for alert_id in track.alert_ids]:
+                if self.by_source.get(source) is incident:
+                    del self.by_source[source]
+            self.closed.append(incident)
+            changes.append(('incident_closed', incident.to_dict()))
+        return changes
+
+    def list(self, include_closed=False):
+        """Incidents actifs (puis récemment clôturés), par confiance décroissante"""
+        with self.lock:
+            changes = self.expire(time.time())
+            incidents = sorted(self.active.values(), key=lambda i: i.confidence, reverse=True)
+            if include_closed:
+                incidents += reversed(self.closed)
+            result = [incident.to_dict() for incident in incidents]
+        if self.on_change is not None:
+            for change in changes:
+                self.on_change(*change)
+        return result
+
+    def get(self, incident_id):
+        with self.lock:
+            incident = self.active.get(incident_id) or next(
+                (i for i in self.closed if i.id == incident_id), None)
+            return incident.to_dict() if incident is not None else None
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'cameras_positioned': len(self.positions),
+                'active_incidents': len(self.active),
+                'incidents_opened': self.incidents_opened,
+                'observations': self.observations,
+                'ignored_detections': self.ignored,
+            }
@@ -0,0 +1,268 @@
+"""
+Moteurs d'inférence interchangeables pour le modèle de détection d'incendies.
+
+Tous exposent la même interface que `ultralytics.YOLO` pour l'ordonnanceur
+(`predict(source=[images], conf=..., imgsz=...)` -> liste de `Results`) :
+le suivi ByteTrack, l'annotation et l'extraction d'événements ne dépendent
+donc pas du moteur choisi.
+
+- `torch` : modèle PyTorch d'origine (GPU si disponible) ;
+- `onnx` : export ONNX exécuté par ONNX Runtime sur CPU ;
+- `openvino` : export OpenVINO (processeurs Intel).
+
+Les exports (et leur variante INT8) sont mis en cache dans `cache_dir`, sous
+une clé dérivée du hachage du fichier `.pt` : un nouveau modèle entraîné est
+réexporté automatiquement, un redémarrage réutilise l'export existant.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+
+def file_hash(path, length=16):
+    """Empreinte SHA-256 (tronquée) du fichier du modèle"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+def export_path(model_path, backend, int8, imgsz, cache_dir):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    suffix = '-int8' if int8 else ''
+    name = f"{stem}-{file_hash(model_path)}-{imgsz}{suffix}"
+    return os.path.join(cache_dir, name + ('.onnx' if backend == 'onnx' else '_openvino_model'))
+
+
+def export_model(model_path, backend, int8=False, imgsz=640, cache_dir='.model_cache', int8_data=None):
+    """Exporter (une seule fois par version du modèle) vers ONNX ou OpenVINO.
+
+    Renvoie le chemin de l'export en cache. Lève ValueError pour OpenVINO INT8
+    sans jeu de calibration (`int8_data`).
+    """
+    if backend == 'openvino' and int8 and not int8_data:
+        raise ValueError("OpenVINO INT8 nécessite un jeu de calibration (INFERENCE_INT8_DATA)")
+    target = export_path(model_path, backend, int8, imgsz, cache_dir)
+    if os.path.exists(target):
+        return target
+    os.makedirs(cache_dir, exist_ok=True)
+
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    print(f"Export du modèle {model_path} ({backend}{', INT8' if int8 else ''}) vers {target}...")
+    if backend == 'onnx':
+        # Lot et taille dynamiques : l'ordonnanceur regroupe plusieurs caméras
+        exported = model.export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            # L'export FP32 intermédiaire (écrit à côté du .pt) ne reste pas sur le disque
+            intermediate = target + '.fp32.onnx'
+            shutil.move(exported, intermediate)
+            try:
+                # Quantification dynamique des poids : pas de jeu de calibration nécessaire
+                quantize_dynamic(intermediate, target + '.tmp', weight_type=QuantType.QUInt8)
+                os.replace(target + '.tmp', target)
+            finally:
+                for path in (intermediate, target + '.tmp'):
+                    if os.path.exists(path):
+                        os.remove(path)
+        else:
+            shutil.move(exported, target)
+    elif backend == 'openvino':
+        options = {'format': 'openvino', 'imgsz': imgsz, 'int8': int8}
+        if int8:
+            # Images représentatives pour la calibration INT8 (jeu de données YOLO)
+            options['data'] = int8_data
+        exported = model.export(**options)
+        shutil.move(str(exported).rstrip('/\\'), target)
+    else:
+        raise ValueError(f"Pas d'export pour le moteur {backend}")
+
+    # Noms des classes à côté de l'export (le moteur d'exécution ne les connaît pas)
+    with open(target + '.json', 'w') as f:
+        json.dump({'names': model.names, 'imgsz': imgsz, 'source': os.path.abspath(model_path)}, f)
+    return target
+
+
+def letterbox(frame, size):
+    """Redimensionner en conservant les proportions dans un carré size x size"""
+    height, width = frame.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = round(width * ratio), round(height * ratio)
+    if (new_width, new_height) != (width, height):
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    left, top = (size - new_width) // 2, (size - new_height) // 2
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = frame
+    return canvas, ratio, (left, top)
+
+
+def non_max_suppression(prediction, conf, iou, max_det=300):
+    """Sortie YOLOv8 (4 + classes, ancres) -> détections [x1, y1, x2, y2, conf, classe]"""
+    prediction = prediction.T
+    scores = prediction[:, 4:]
+    classes = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(scores)), classes]
+    keep = confidences >= conf
+    if not keep.any():
+        return np.zeros((0, 6), dtype=np.float32)
+    boxes, confidences, classes = prediction[keep, :4], confidences[keep], classes[keep]
+    # (cx, cy, w, h) -> (x1, y1, w, h) pour OpenCV, décalées par classe (NMS par classe)
+    xywh = boxes.copy()
+    xywh[:, :2] -= xywh[:, 2:] / 2
+    shifted = xywh.copy()
+    shifted[:, :2] += classes[:, None] * 4096.0
+    indices = cv2.dnn.NMSBoxes(shifted.tolist(), confidences.tolist(), conf, iou)
+    indices = np.array(indices).reshape(-1)[:max_det]
+    xyxy = np.hstack([xywh[indices, :2], xywh[indices, :2] + xywh[indices, 2:4]])
+    return np.hstack([xyxy, confidences[indices, None], classes[indices, None]]).astype(np.float32)
+
+
+def make_result(frame, names, detections):
+    """`Results` ultralytics à partir de détections [x1, y1, x2, y2, conf, classe]"""
+    import torch
+    from ultralytics.engine.results import Results
+
+    return Results(orig_img=frame, path='', names=names, boxes=torch.from_numpy(detections))
+
+
+def result_to_array(result):
+    """Détections d'un `Results` en tableau [x1, y1, x2, y2, conf, classe]"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    return np.hstack([boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy()[:, None],
+                      boxes.cls.cpu().numpy()[:, None]]).astype(np.float32)
+
+
+class TorchBackend:
+    """Modèle ultralytics d'origine (PyTorch)"""
+
+    name = 'torch'
+
+    def __init__(self, model_path, intra_threads=0, inter_threads=0):
+        import torch
+        from ultralytics import YOLO
+
+        if intra_threads:
+            torch.set_num_threads(intra_threads)
+        if inter_threads:
+            try:
+                torch.set_num_interop_threads(inter_threads)
+            except RuntimeError as e:
+                print(f"Threads inter-opérations non modifiables: {e}")
+        self.cuda = torch.cuda.is_available()
+        self.device = '0' if self.cuda else 'cpu'
+        self.model = YOLO(model_path)
+        self.model.fuse()  # Fusionner les couches pour la vitesse
+        self.names = self.model.names
+
+    def predict(self, source, verbose=False, **kwargs):
+        # Demi-précision uniquement sur GPU (sans effet sur CPU)
+        kwargs.setdefault('half', self.cuda)
+        return self.model.predict(source=source, verbose=verbose, device=self.device, **kwargs)
+
+
+class ExportedBackend:
+    """Base des moteurs exportés : prétraitement, NMS et `Results` ultralytics"""
+
+    name = None
+    # Taille d'entrée modifiable à l'exécution (export à taille dynamique)
+    dynamic_size = False
+
+    def __init__(self, path):
+        with open(path + '.json') as f:
+            metadata = json.load(f)
+        self.names = {int(key): value for key, value in metadata['names'].items()}
+        self.imgsz = metadata['imgsz']
+
+    def run(self, batch):
+        """Tableau (lot, 3, imgsz, imgsz) float32 -> sortie brute (lot, 4 + classes, ancres)"""
+        raise NotImplementedError
+
+    def predict(self, source, verbose=False, conf=0.25, iou=0.7, imgsz=None, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        size = imgsz or self.imgsz
+        if size != self.imgsz and not (self.dynamic_size and size % 32 == 0):
+            raise ValueError(f"imgsz={size} incompatible avec l'export {self.name} en {self.imgsz} px")
+        boxed = [letterbox(frame, size) for frame in frames]
+        # BGR -> RGB, HWC -> CHW, [0, 1]
+        batch = np.stack([canvas for canvas, _, _ in boxed])[..., ::-1].transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+        output = self.run(batch)
+
+        results = []
+        for frame, (_, ratio, (left, top)), prediction in zip(frames, boxed, output):
+            detections = non_max_suppression(prediction, conf, iou)
+            # Coordonnées de l'image carrée -> coordonnées de l'image d'origine
+            detections[:, [0, 2]] = ((detections[:, [0, 2]] - left) / ratio).clip(0, frame.shape[1])
+            detections[:, [1, 3]] = ((detections[:, [1, 3]] - top) / ratio).clip(0, frame.shape[0])
+            results.append(make_result(frame, self.names, detections))
+        return results
+
+
+class OnnxRuntimeBackend(ExportedBackend):
+    name = 'onnx'
+    # Exporté avec dynamic=True : toute taille multiple du pas du modèle (32)
+    dynamic_size = True
+
+    def __init__(self, path, intra_threads=0, inter_threads=0):
+        super().__init__(path)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_threads:
+            options.intra_op_num_threads = intra_threads
+        if inter_threads:
+            options.inter_op_num_threads = inter_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOBackend(ExportedBackend):
+    name = 'openvino'
+
+    def __init__(self, path, intra_threads=0, inter_threads=0):
+        super().__init__(path)
+        from openvino.runtime import Core
+
+        core = Core()
+        model = core.read_model(next(os.path.join(path, name) for name in os.listdir(path)
+                                     if name.endswith('.xml')))
+        # Lot dynamique : une requête par lot de l'ordonnanceur
+        model.reshape([-1, 3, self.imgsz, self.imgsz])
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if intra_threads:
+            config['INFERENCE_NUM_THREADS'] = str(intra_threads)
+        if inter_threads:
+            config['NUM_STREAMS'] = str(inter_threads)
+        self.compiled = core.compile_model(model, 'CPU', config)
+
+    def run(self, batch):
+        return self.compiled(batch)[self.compiled.output(0)]
+
+
+def load_backend(model_path, backend='torch', int8=False, imgsz=640, intra_threads=0,
+                 inter_threads=0, cache_dir='.model_cache', int8_data=None):
+    """Charger le modèle avec le moteur demandé (export automatique si nécessaire)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Moteur inconnu: {backend} (choix: {', '.join(BACKENDS)})")
+    if backend == 'torch':
+        return TorchBackend(model_path, intra_threads, inter_threads)
+    path = export_model(model_path, backend, int8, imgsz, cache_dir, int8_data)
+    backend_class = OnnxRuntimeBackend if backend == 'onnx' else OpenVINOBackend
+    return backend_class(path, intra_threads, inter_threads)
@@ -0,0 +1,183 @@
+"""
+Ordonnanceur d'inférence YOLO partagé entre les caméras.
+
+Chaque caméra dépose sa dernière image ; un unique thread regroupe les images
+de toutes les sources actives en un lot, exécute une seule passe du modèle et
+renvoie à chaque caméra son propre résultat (avec un tracker par caméra pour
+conserver des identifiants de suivi cohérents).
+"""
+import threading
+import time
+
+
+def create_tracker(frame_rate=30):
+    """Créer un tracker ByteTrack ultralytics indépendant (un par caméra)"""
+    try:
+        from ultralytics.trackers.track import TRACKER_MAP
+        from ultralytics.utils import IterableSimpleNamespace, yaml_load
+        from ultralytics.utils.checks import check_yaml
+
+        cfg = IterableSimpleNamespace(**yaml_load(check_yaml('bytetrack.yaml')))
+        return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=frame_rate)
+    except Exception as e:
+        print(f"Tracker indisponible, détection sans suivi: {e}")
+        return None
+
+
+def apply_tracker(tracker, result, frame):
+    """Associer les détections d'un résultat aux pistes du tracker (comme persist=True)"""
+    import torch
+
+    det = result.boxes.cpu().numpy()
+    if len(det) == 0:
+        return result
+    tracks = tracker.update(det, frame)
+    if len(tracks) == 0:
+        return result
+    idx = tracks[:, -1].astype(int)
+    result = result[idx]
+    result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+    return result
+
+
+class InferenceScheduler:
+    """Regroupe les images de plusieurs caméras en lots pour une seule passe YOLO"""
+
+    def __init__(self, model_getter, batch_size=8, max_wait=0.02, **predict_kwargs):
+        self.model_getter = model_getter
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max(0.0, float(max_wait))
+        self.predict_kwargs = predict_kwargs
+        # Dernière image en attente par caméra : camera_id -> (frame, callback, heure de dépôt)
+        self.pending = {}
+        self.trackers = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+        # Statistiques
+        self.batches = 0
+        self.frames = 0
+        self.dropped = 0
+        self.total_inference_time = 0.0
+        # Coût moyen (glissant) d'une image dans un lot, en secondes
+        self.frame_cost = 0.0
+        self.started_at = time.time()
+
+    def start(self):
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopped = False
+                self.thread = threading.Thread(target=self.run, name="inference-scheduler", daemon=True)
+                self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def submit(self, camera_id, frame, callback, track=True):
+        """Déposer la dernière image d'une caméra ; remplace une image non encore traitée.
+
+        `track=False` : pas de suivi (ex. tuiles `camera/indice`, suivies après fusion).
+        """
+        with self.condition:
+            previous = self.pending.get(camera_id)
+            if previous is not None:
+                self.dropped += 1
+            # Conserver l'heure de la première image en attente pour respecter le délai max
+            submitted_at = previous[2] if previous is not None else time.time()
+            self.pending[camera_id] = (frame, callback, submitted_at, track)
+            self.condition.notify()
+
+    def forget(self, camera_id):
+        """Oublier une caméra arrêtée (images en attente, tuiles comprises, et état de suivi)"""
+        with self.condition:
+            for key in [key for key in self.pending if key == camera_id or key.startswith(camera_id + '/')]:
+                del self.pending[key]
+            self.trackers.pop(camera_id, None)
+
+    def track(self, camera_id, result, frame):
+        """Appliquer le tracker de la caméra à un résultat (ex. fusion des tuiles)"""
+        try:
+            if camera_id not in self.trackers:
+                self.trackers[camera_id] = create_tracker()
+            tracker = self.trackers[camera_id]
+            if tracker is not None:
+                result = apply_tracker(tracker, result, frame)
+        except Exception as e:
+            print(f"[{camera_id}] Erreur de suivi: {e}")
+        return result
+
+    def next_batch(self):
+        """Attendre qu'un lot soit plein ou que le délai max de la plus ancienne image soit écoulé"""
+        with self.condition:
+            while not self.stopped:
+                if self.pending:
+                    oldest = min(item[2] for item in self.pending.values())
+                    remaining = oldest + self.max_wait - time.time()
+                    if len(self.pending) >= self.batch_size or remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                else:
+                    self.condition.wait()
+            if self.stopped:
+                return []
+            # Les images les plus anciennes d'abord
+            ordered = sorted(self.pending.items(), key=lambda item: item[1][2])[:self.batch_size]
+            for camera_id, _ in ordered:
+                del self.pending[camera_id]
+            return [(camera_id, frame, callback, track)
+                    for camera_id, (frame, callback, _, track) in ordered]
+
+    def run(self):
+        while not self.stopped:
+            batch = self.next_batch()
+            if not batch:
+                continue
+
+            model = self.model_getter()
+            if model is None:
+                # Pas de modèle : renvoyer des résultats vides pour ne pas bloquer les caméras
+                for camera_id, frame, callback, _ in batch:
+                    callback(None)
+                continue
+
+            frames = [frame for _, frame, _, _ in batch]
+            start = time.time()
+            try:
+                # Une seule passe du modèle pour toutes les caméras du lot
+                results = model.predict(source=frames, verbose=False, **self.predict_kwargs)
+            except Exception as e:
+                print(f"Erreur d'inférence groupée: {e}")
+                for camera_id, frame, callback, _ in batch:
+                    callback(None)
+                continue
+            elapsed = time.time() - start
+            self.total_inference_time += elapsed
+            cost = elapsed / len(batch)
+            self.frame_cost = cost if self.batches == 0 else self.frame_cost + 0.1 * (cost - self.frame_cost)
+            self.batches += 1
+            self.frames += len(batch)
+
+            for (camera_id, frame, callback, track), result in zip(batch, results):
+                if track:
+                    result = self.track(camera_id, result, frame)
+                try:
+                    callback(result)
+                except Exception as e:
+                    print(f"[{camera_id}] Erreur de traitement du résultat: {e}")
+
+    def get_stats(self):
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return {
+            'batch_size': self.batch_size,
+            'max_wait': self.max_wait,
+            'batches': self.batches,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'avg_batch_size': round(self.frames / self.batches, 2) if self.batches else 0,
+            'frame_cost_ms': round(1000 * self.frame_cost, 1),
+            'avg_batch_time_ms': round(1000 * self.total_inference_time / self.batches, 1) if self.batches else 0,
+            'detections_per_sec': round(self.frames / elapsed, 2),
+        }
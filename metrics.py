@@ -0,0 +1,190 @@
+"""
+Métriques au format texte Prometheus, sans dépendance externe.
+
+Deux sortes de métriques :
+- compteurs, jauges et histogrammes mis à jour dans le code (un `observe`
+  coûte une recherche dichotomique et quelques additions sous un verrou non
+  contesté : assez peu pour rester actif en production) ;
+- collecteurs appelés uniquement à la lecture de `/metrics`, qui exposent des
+  statistiques déjà tenues ailleurs (caméras, ordonnanceur...) sans aucun
+  coût sur le chemin critique.
+"""
+import bisect
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class CounterValue:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield name + '_total', labels, self.value
+
+
+class GaugeValue(CounterValue):
+    def set(self, value):
+        self.value = value
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class HistogramValue:
+    def __init__(self, buckets):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labels):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            yield name + '_bucket', dict(labels, le=format_value(float(bound))), cumulative
+        yield name + '_sum', labels, total
+        yield name + '_count', labels, cumulative
+
+
+class Metric:
+    """Métrique avec étiquettes ; `labels(...)` renvoie (et mémorise) la série"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), **options):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.options = options
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        key = values or tuple(kwargs[name] for name in self.labelnames)
+        series = self.series.get(key)
+        if series is None:
+            with self.lock:
+                series = self.series.setdefault(key, self.new_value())
+        return series
+
+    def remove(self, *values):
+        with self.lock:
+            self.series.pop(values, None)
+
+    def collect(self):
+        with self.lock:
+            items = list(self.series.items())
+        for key, series in items:
+            yield from series.samples(self.name, dict(zip(self.labelnames, key)))
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def new_value(self):
+        return CounterValue()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def new_value(self):
+        return GaugeValue()
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def new_value(self):
+        return HistogramValue(tuple(self.options.get('buckets', LATENCY_BUCKETS)))
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """`collector()` renvoie des (nom, type, aide, [(étiquettes, valeur)]) à la lecture"""
+        self.collectors.append(collector)
+
+    def render(self, metrics=None, collectors=True):
+        """Texte Prometheus ; `metrics` limite la sortie à certaines métriques"""
+        lines = []
+        for metric in self.metrics if metrics is None else metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.collect():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for collector in self.collectors if collectors else ():
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Erreur de collecte des métriques: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                sample_name = name + '_total' if kind == 'counter' else name
+                for labels, value in samples:
+                    lines.append(f"{sample_name}{format_labels(labels)} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,164 @@
+"""
+Analyseur incrémental de flux MJPEG (multipart/x-mixed-replace).
+
+Les octets reçus sont écrits dans un tampon `bytearray` réutilisé ; les
+recherches de marqueurs reprennent là où la précédente s'est arrêtée et les
+images JPEG sont rendues sous forme de `memoryview` sur ce tampon, sans copie.
+Quand le serveur envoie un en-tête Content-Length, la trame est découpée
+directement par sa longueur sans parcourir son contenu.
+"""
+
+SOI = b'\xff\xd8'  # Début d'une image JPEG
+EOI = b'\xff\xd9'  # Fin d'une image JPEG
+HEADER_END = b'\r\n\r\n'
+
+
+class MJPEGStreamParser:
+    """Découpe un flux MJPEG en images JPEG.
+
+    Les vues renvoyées par `feed` pointent dans le tampon interne : elles ne
+    sont valides que jusqu'au prochain appel à `feed` (les décoder ou les
+    copier avant).
+    """
+
+    def __init__(self, boundary=None, buffer_size=512 * 1024, max_frame_size=16 * 1024 * 1024):
+        self.set_boundary(boundary)
+        self.max_frame_size = max_frame_size
+        self.buf = bytearray(buffer_size)
+        self.view = memoryview(self.buf)
+        self.reset()
+        # Statistiques
+        self.frames = 0
+        self.bytes_received = 0
+        self.resyncs = 0
+
+    @staticmethod
+    def boundary_from_content_type(content_type):
+        """Extraire la frontière multipart d'un en-tête Content-Type (ou None)"""
+        if not content_type:
+            return None
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'boundary' and value:
+                return value.strip('"')
+        return None
+
+    def set_boundary(self, boundary):
+        """Frontière multipart d'une nouvelle connexion (ou None)"""
+        if isinstance(boundary, str):
+            boundary = boundary.encode('latin-1')
+        self.boundary = boundary
+
+    def reset(self):
+        """Oublier les données en attente (ex. après une reconnexion)"""
+        self.start = 0           # Début des données non consommées
+        self.end = 0             # Fin des données écrites
+        self.scan = 0            # Reprise de la recherche de marqueurs
+        self.frame_start = -1    # Position du SOI de la trame en cours
+        self.part_length = None  # None : en-têtes à lire, -1 : pas de Content-Length
+
+    def feed(self, chunk):
+        """Ajouter des octets reçus et produire les images JPEG complètes"""
+        self._write(chunk)
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return
+            self.frames += 1
+            yield frame
+
+    def _write(self, chunk):
+        size = len(chunk)
+        self.bytes_received += size
+        if self.end + size > len(self.buf):
+            self._compact(size)
+        self.view[self.end:self.end + size] = chunk
+        self.end += size
+
+    def _compact(self, incoming):
+        """Ramener les données non consommées en tête du tampon (ou l'agrandir)"""
+        pending = self.end - self.start
+        if pending + incoming > self.max_frame_size:
+            # Trame trop grande ou flux corrompu : repartir de zéro
+            self.resyncs += 1
+            self.reset()
+            pending = 0
+
+        needed = pending + incoming
+        shift = self.start
+        if needed > len(self.buf):
+            size = len(self.buf)
+            while size < needed:
+                size *= 2
+            # Nouveau tampon : les vues déjà rendues restent sur l'ancien
+            buf = bytearray(size)
+            buf[:pending] = self.view[self.start:self.end]
+            self.buf = buf
+            self.view = memoryview(buf)
+        elif pending and shift:
+            self.view[:pending] = self.view[self.start:self.end]
+
+        self.start = 0
+        self.end = pending
+        self.scan = max(0, self.scan - shift)
+        if self.frame_start >= 0:
+            self.frame_start -= shift
+
+    def _content_length(self, start, end):
+        headers = bytes(self.view[start:end]).lower()
+        index = headers.find(b'content-length:')
+        if index < 0:
+            return -1
+        value = headers[index + 15:].split(b'\r\n', 1)[0].strip()
+        try:
+            return int(value)
+        except ValueError:
+            return -1
+
+    def _is_jpeg(self, frame_start, frame_end):
+        """Vérifier qu'une partie délimitée par Content-Length commence par un SOI"""
+        return (frame_end - frame_start >= 4
+                and self.buf[frame_start] == 0xFF and self.buf[frame_start + 1] == 0xD8)
+
+    def _next_frame(self):
+        buf = self.buf
+        while self.frame_start < 0:
+            if self.boundary is not None and self.part_length is None:
+                # En-têtes de la partie multipart : Content-Length éventuel
+                header_end = buf.find(HEADER_END, self.scan, self.end)
+                if header_end < 0:
+                    self.scan = max(self.start, self.end - 3)
+                    return None
+                self.part_length = self._content_length(self.start, header_end)
+                self.start = self.scan = header_end + 4
+
+            if self.part_length is not None and self.part_length >= 0:
+                if self.end - self.start < self.part_length:
+                    return None
+                frame_start = self.start
+                frame_end = frame_start + self.part_length
+                self.start = self.scan = frame_end
+                self.part_length = None
+                if self._is_jpeg(frame_start, frame_end):
+                    return self.view[frame_start:frame_end]
+                # Longueur incohérente : ignorer la partie
+                self.resyncs += 1
+                continue
+
+            # Pas de Content-Length : repérer la trame par ses marqueurs
+            soi = buf.find(SOI, self.scan, self.end)
+            if soi < 0:
+                self.scan = max(self.start, self.end - 1)
+                return None
+            self.start = self.frame_start = soi
+            self.scan = soi + 2
+
+        eoi = buf.find(EOI, self.scan, self.end)
+        if eoi < 0:
+            self.scan = max(self.frame_start + 2, self.end - 1)
+            return None
+        frame = self.view[self.frame_start:eoi + 2]
+        self.start = self.scan = eoi + 2
+        self.frame_start = -1
+        self.part_length = None
+        return frame
@@ -0,0 +1,129 @@
+"""
+Lancement en production : un processus de capture et d'inférence, plusieurs
+processus web (gunicorn).
+
+    python production_server.py
+
+Le processus de capture (SERVER_ROLE=capture) lit les caméras, exécute le
+modèle, crée les alertes automatiques, enregistre les séquences et traite les
+photos ; il ne sert aucune requête HTTP. Les processus web (SERVER_ROLE=web)
+servent les pages, le MJPEG, les SSE et les API d'alertes à partir des images
+et des événements publiés en mémoire partagée (voir shared_state.py) : le
+débit web se répartit sur les cœurs sans toucher à l'inférence.
+
+Le processus de capture est relancé automatiquement s'il s'arrête ; les
+processus web se reconnectent seuls.
+"""
+import atexit
+import importlib.util
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+
+from shared_state import ControlClient
+
+GUNICORN_AVAILABLE = importlib.util.find_spec('gunicorn') is not None
+
+WEB_BIND = os.environ.get("WEB_BIND", "0.0.0.0:5000")
+# Par défaut la moitié des cœurs : l'autre moitié reste à l'inférence
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", max(2, (os.cpu_count() or 2) // 2)))
+# Chaque flux MJPEG ou SSE occupe un thread de son processus web
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 32))
+WEB_WORKER_CLASS = os.environ.get("WEB_WORKER_CLASS", "gthread")  # gthread, ou gevent (asynchrone)
+
+
+def run_capture():
+    """Point d'entrée du processus de capture"""
+    os.environ['SERVER_ROLE'] = 'capture'
+    import forest_protection_server as server
+
+    server.create_app()
+    server.run_capture_forever()
+
+
+def wait_for_capture(address, authkey, timeout=60.0):
+    """Attendre que le processus de capture accepte les commandes"""
+    client = ControlClient(address, authkey)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            client.call('readiness')
+            return True
+        except (ConnectionError, ValueError):
+            time.sleep(0.5)
+    return False
+
+
+capture_process = None
+main_pid = os.getpid()
+
+
+def supervise_capture():
+    """Lancer le processus de capture et le relancer s'il s'arrête"""
+    global capture_process
+    delay = 1.0
+    while True:
+        # Processus indépendant (pas multiprocessing) : les processus web, forkés par
+        # gunicorn, n'en héritent pas et ne peuvent pas l'arrêter en se terminant
+        capture_process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--capture'])
+        started_at = time.time()
+        code = capture_process.wait()
+        # Plantage au démarrage : attendre de plus en plus longtemps (30 s max)
+        delay = 1.0 if time.time() - started_at > 60 else min(delay * 2, 30.0)
+        print(f"Processus de capture arrêté (code {code}), relance dans {delay:.0f} s")
+        time.sleep(delay)
+
+
+@atexit.register
+def stop_capture():
+    # Les handlers atexit sont hérités par les processus web : seul le principal arrête la capture
+    if os.getpid() == main_pid and capture_process is not None and capture_process.poll() is None:
+        capture_process.terminate()
+
+
+def main():
+    if not GUNICORN_AVAILABLE:
+        print("gunicorn n'est pas installé (pip install gunicorn) : "
+              "utiliser `python forest_protection_server.py` en développement.")
+        sys.exit(1)
+
+    from gunicorn.app.base import BaseApplication
+
+    # Clé partagée par le processus de capture et les processus web
+    os.environ.setdefault('CONTROL_AUTHKEY', secrets.token_hex(16))
+    address = ('127.0.0.1', int(os.environ.get("CONTROL_PORT", 5001)))
+
+    threading.Thread(target=supervise_capture, name='capture-supervisor', daemon=True).start()
+    if not wait_for_capture(address, os.environ['CONTROL_AUTHKEY'].encode()):
+        print("Le processus de capture ne répond pas ; démarrage des processus web quand même")
+
+    os.environ['SERVER_ROLE'] = 'web'
+
+    class WebApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', WEB_BIND)
+            self.cfg.set('workers', WEB_WORKERS)
+            self.cfg.set('worker_class', WEB_WORKER_CLASS)
+            self.cfg.set('threads', WEB_THREADS)
+            # Les flux MJPEG et SSE ouverts ne retardent pas un arrêt de plus de 10 s
+            self.cfg.set('graceful_timeout', 10)
+
+        def load(self):
+            # Importé dans chaque processus web, après le fork (SERVER_ROLE=web)
+            import forest_protection_server as server
+
+            return server.create_app()
+
+    print(f"Serveur de production sur {WEB_BIND} : {WEB_WORKERS} processus web "
+          f"({WEB_WORKER_CLASS}, {WEB_THREADS} threads)")
+    WebApplication().run()
+
+
+if __name__ == '__main__':
+    if '--capture' in sys.argv:
+        run_capture()
+    else:
+        main()
@@ -0,0 +1,206 @@
+"""
+Détection par tuiles dans des régions d'intérêt (ROI), pour les fumées
+lointaines sur les caméras haute résolution.
+
+Au lieu de réduire toute l'image à 640 px (un panache lointain ne fait plus
+que quelques pixels), l'image est découpée en tuiles qui se chevauchent, à
+la résolution native :
+- seules les tuiles qui recouvrent les zones définies par l'opérateur sont
+  analysées (pas le ciel ni le sol immobile) ;
+- une tuile sans changement depuis sa dernière analyse est sautée, ses
+  détections précédentes sont conservées (rafraîchissement forcé au bout de
+  `refresh_interval` secondes) ;
+- les détections des tuiles sont ramenées dans le repère de l'image et
+  fusionnées par NMS (les objets à cheval sur deux tuiles).
+
+Les zones sont des polygones en coordonnées normalisées ([0, 1]), donc
+indépendantes de la résolution de la caméra.
+"""
+import cv2
+import numpy as np
+
+from detection_controller import motion_signature
+
+MASK_SCALE = 8  # Masque des zones calculé à 1/8 de la résolution
+
+
+def tile_starts(length, tile, step):
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, step))
+    # Dernière tuile alignée sur le bord de l'image
+    return starts + [length - tile]
+
+
+def tile_grid(width, height, tile_size=640, overlap=0.2):
+    """Tuiles (x1, y1, x2, y2) qui se chevauchent et couvrent toute l'image"""
+    step = max(1, int(tile_size * (1 - overlap)))
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in tile_starts(height, tile_size, step)
+            for x in tile_starts(width, tile_size, step)]
+
+
+def roi_mask(width, height, polygons):
+    """Masque basse résolution des zones d'intérêt (None : toute l'image)"""
+    if not polygons:
+        return None
+    small = (max(1, width // MASK_SCALE), max(1, height // MASK_SCALE))
+    mask = np.zeros((small[1], small[0]), dtype=np.uint8)
+    for polygon in polygons:
+        points = np.array([[x * small[0], y * small[1]] for x, y in polygon], dtype=np.int32)
+        cv2.fillPoly(mask, [points], 1)
+    return mask
+
+
+def non_max_suppression(detections, iou=0.5):
+    """NMS par classe sur des détections [x1, y1, x2, y2, conf, classe]"""
+    if len(detections) == 0:
+        return detections
+    xywh = detections[:, :4].copy()
+    xywh[:, 2:] -= xywh[:, :2]
+    # Décalage par classe : deux classes différentes ne se suppriment pas
+    xywh[:, :2] += detections[:, 5:6] * 8192.0
+    keep = cv2.dnn.NMSBoxes(xywh.tolist(), detections[:, 4].tolist(), 0.0, iou)
+    return detections[np.array(keep, dtype=int).reshape(-1)]
+
+
+def validate_config(config):
+    """Vérifier une configuration de tuilage reçue par l'API ; lève ValueError"""
+    if not isinstance(config, dict):
+        raise ValueError("Configuration de tuilage invalide")
+    validated = {}
+    try:
+        tile_size = int(config.get('tile_size', 640))
+        overlap = float(config.get('overlap', 0.2))
+        # Facultatifs : à défaut, valeurs par défaut du serveur
+        for field in ('change_threshold', 'refresh_interval'):
+            if config.get(field) is not None:
+                validated[field] = float(config[field])
+    except (TypeError, ValueError):
+        raise ValueError("tile_size, overlap, change_threshold et refresh_interval doivent être des nombres")
+    if not 128 <= tile_size <= 4096:
+        raise ValueError("tile_size doit être compris entre 128 et 4096")
+    if not 0 <= overlap <= 0.5:
+        raise ValueError("overlap doit être compris entre 0 et 0.5")
+    if not 0 <= validated.get('change_threshold', 0) <= 1:
+        raise ValueError("change_threshold doit être compris entre 0 et 1")
+    if not 0 < validated.get('refresh_interval', 1) <= 3600:
+        raise ValueError("refresh_interval doit être compris entre 0 et 3600 secondes")
+    roi = config.get('roi') or []
+    if not isinstance(roi, list):
+        raise ValueError("roi doit être une liste de polygones")
+    for polygon in roi:
+        if not isinstance(polygon, list) or len(polygon) < 3 or not all(
+                isinstance(point, (list, tuple)) and len(point) == 2 and
+                all(isinstance(v, (int, float)) and not isinstance(v, bool) and 0 <= v <= 1 for v in point)
+                for point in polygon):
+            raise ValueError("Chaque zone doit être un polygone d'au moins 3 points en coordonnées [0, 1]")
+    return dict(config, tile_size=tile_size, overlap=overlap, roi=roi, **validated)
+
+
+class TiledDetector:
+    """Choix des tuiles à analyser et fusion de leurs détections, pour une caméra"""
+
+    def __init__(self, tile_size=640, overlap=0.2, roi=None, change_threshold=0.02,
+                 refresh_interval=10.0, min_roi_fraction=0.02, iou=0.5):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.roi = roi or []
+        self.change_threshold = change_threshold
+        self.refresh_interval = refresh_interval
+        self.min_roi_fraction = min_roi_fraction
+        self.iou = iou
+        self.shape = None
+        self.tiles = []
+        self.mask = None
+        # Par tuile : signature de la dernière analyse, heure et détections (repère image)
+        self.signatures = {}
+        # Signature des tuiles planifiées, retenue seulement quand leur résultat arrive
+        self.pending = {}
+        self.last_run = {}
+        self.detections = {}
+        # Statistiques
+        self.passes = 0
+        self.tiles_run = 0
+        self.tiles_skipped = 0
+
+    def get_config(self):
+        return {'tile_size': self.tile_size, 'overlap': self.overlap, 'roi': self.roi,
+                'change_threshold': self.change_threshold, 'refresh_interval': self.refresh_interval}
+
+    def build(self, width, height):
+        """Tuiles retenues pour cette résolution (recalculées si elle change)"""
+        self.shape = (width, height)
+        self.mask = roi_mask(width, height, self.roi)
+        self.tiles = []
+        for tile in tile_grid(width, height, self.tile_size, self.overlap):
+            if self.mask is not None:
+                x1, y1, x2, y2 = (v // MASK_SCALE for v in tile)
+                if self.mask[y1:y2 + 1, x1:x2 + 1].mean() < self.min_roi_fraction:
+                    continue
+            self.tiles.append(tile)
+        self.signatures.clear()
+        self.pending.clear()
+        self.last_run.clear()
+        self.detections.clear()
+
+    def plan(self, frame, now):
+        """Tuiles à analyser pour cette image : [(indice, image de la tuile)]"""
+        height, width = frame.shape[:2]
+        if self.shape != (width, height):
+            self.build(width, height)
+        self.passes += 1
+        selected = []
+        for index, (x1, y1, x2, y2) in enumerate(self.tiles):
+            crop = frame[y1:y2, x1:x2]
+            signature = motion_signature(crop, size=(32, 32))
+            reference = self.signatures.get(index)
+            stale = now - self.last_run.get(index, float('-inf')) >= self.refresh_interval
+            if reference is not None and not stale and reference.shape == signature.shape:
+                change = float(np.abs(signature - reference).mean()) / 255.0
+                if change < self.change_threshold:
+                    self.tiles_skipped += 1
+                    continue
+            self.pending[index] = signature
+            selected.append((index, np.ascontiguousarray(crop)))
+        self.tiles_run += len(selected)
+        return selected
+
+    def update(self, index, detections, now):
+        """Détections [x1, y1, x2, y2, conf, classe] d'une tuile, dans le repère de la tuile"""
+        x1, y1 = self.tiles[index][:2]
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 6).copy()
+        detections[:, [0, 2]] += x1
+        detections[:, [1, 3]] += y1
+        self.detections[index] = detections
+        self.last_run[index] = now
+        # Tuile analysée : elle ne sera plus sautée que par rapport à cette image-là ;
+        # une inférence échouée ou expirée laisse la tuile à réanalyser
+        if index in self.pending:
+            self.signatures[index] = self.pending.pop(index)
+
+    def in_roi(self, detections):
+        if self.mask is None or len(detections) == 0:
+            return detections
+        centers_x = ((detections[:, 0] + detections[:, 2]) / 2 // MASK_SCALE).astype(int)
+        centers_y = ((detections[:, 1] + detections[:, 3]) / 2 // MASK_SCALE).astype(int)
+        centers_x = centers_x.clip(0, self.mask.shape[1] - 1)
+        centers_y = centers_y.clip(0, self.mask.shape[0] - 1)
+        return detections[self.mask[centers_y, centers_x] > 0]
+
+    def merged(self):
+        """Détections de toutes les tuiles, hors masque exclues, fusionnées par NMS"""
+        if not self.detections:
+            return np.zeros((0, 6), dtype=np.float32)
+        detections = np.concatenate(list(self.detections.values()))
+        return non_max_suppression(self.in_roi(detections), self.iou)
+
+    def get_stats(self):
+        return {
+            'tiles': len(self.tiles),
+            'resolution': list(self.shape) if self.shape else None,
+            'passes': self.passes,
+            'tiles_run': self.tiles_run,
+            'tiles_skipped': self.tiles_skipped,
+            'tiles_per_pass': round(self.tiles_run / self.passes, 2) if self.passes else 0,
+        }
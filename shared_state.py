@@ -0,0 +1,407 @@
+"""
+État partagé entre le processus de capture et les processus web (mode production).
+
+Un seul processus capture les flux, exécute le modèle et écrit les alertes
+automatiques ; plusieurs processus web servent les pages, le MJPEG, les SSE et
+les API. Entre eux :
+- les images JPEG (déjà encodées) de chaque caméra, dans un segment de mémoire
+  partagée par caméra (`SeqlockSlot`) ;
+- les événements SSE, dans un journal circulaire en mémoire partagée
+  (`SharedEventLog`), avec les mêmes identifiants dans tous les processus web
+  (`Last-Event-ID` reste valable d'un processus à l'autre) ;
+- les commandes (démarrer une caméra, déclencher une séquence, statistiques...)
+  par une connexion locale authentifiée (`ControlServer` / `ControlClient`).
+
+Le processus de capture est l'unique écrivain des segments : aucun verrou
+entre processus, un lecteur lent ne peut pas ralentir la capture. Un lecteur
+recommence simplement sa copie si l'écrivain a modifié la zone entre-temps.
+"""
+import json
+import pickle
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+
+# Version (impaire pendant une écriture), longueur des données, horodatage
+SLOT_HEADER = struct.Struct('<QId')
+# Dernier identifiant écrit dans le journal d'événements, nombre et taille des cases
+LOG_HEADER = struct.Struct('<QII')
+# Identifiant de l'événement, longueur du JSON
+RECORD_HEADER = struct.Struct('<QI')
+
+
+def create_segment(name, size):
+    """Créer un segment (en remplaçant celui d'un processus précédent arrêté brutalement)"""
+    try:
+        stale = shared_memory.SharedMemory(name=name)
+        stale.close()
+        stale.unlink()
+    except FileNotFoundError:
+        pass
+    return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+
+def attach_segment(name):
+    """Ouvrir un segment existant sans le confier au `resource_tracker` du processus
+    (sinon il serait supprimé à la sortie de chaque processus web)"""
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    except Exception:
+        pass
+    return segment
+
+
+class SeqlockSlot:
+    """Dernière valeur (octets) publiée par un écrivain, lue par plusieurs processus"""
+
+    def __init__(self, name, capacity=0, create=False):
+        self.name = name
+        self.owner = create
+        if create:
+            self.segment = create_segment(name, SLOT_HEADER.size + capacity)
+            SLOT_HEADER.pack_into(self.segment.buf, 0, 0, 0, 0.0)
+        else:
+            self.segment = attach_segment(name)
+        # Taille vue par un lecteur arrondie à la page : seul l'écrivain utilise la capacité
+        self.capacity = capacity if create else self.segment.size - SLOT_HEADER.size
+        self.version = 0
+        self.oversized = 0
+
+    def write(self, data, timestamp=None):
+        """Publier `data` ; False (valeur ignorée) si elle dépasse la capacité du segment"""
+        if len(data) > self.capacity:
+            self.oversized += 1
+            return False
+        buffer = self.segment.buf
+        self.version += 1
+        SLOT_HEADER.pack_into(buffer, 0, 2 * self.version - 1, 0, 0.0)
+        buffer[SLOT_HEADER.size:SLOT_HEADER.size + len(data)] = data
+        SLOT_HEADER.pack_into(buffer, 0, 2 * self.version, len(data),
+                              timestamp if timestamp is not None else time.time())
+        return True
+
+    def read(self, last_version=0, retries=10):
+        """(version, octets, horodatage) si une valeur plus récente que `last_version`
+        est disponible, sinon None"""
+        buffer = self.segment.buf
+        for _ in range(retries):
+            version, length, timestamp = SLOT_HEADER.unpack_from(buffer, 0)
+            if version == 0 or version == last_version:
+                return None
+            if version % 2:
+                # Écriture en cours
+                time.sleep(0)
+                continue
+            data = bytes(buffer[SLOT_HEADER.size:SLOT_HEADER.size + length])
+            if SLOT_HEADER.unpack_from(buffer, 0)[0] == version:
+                return version, data, timestamp
+        return None
+
+    def close(self):
+        self.segment.close()
+        if self.owner:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedEventLog:
+    """Journal circulaire des derniers événements SSE, écrit par le processus de capture"""
+
+    def __init__(self, name, slots=1024, slot_size=16 * 1024, create=False):
+        self.name = name
+        self.owner = create
+        if create:
+            self.segment = create_segment(name, LOG_HEADER.size + slots * slot_size)
+            LOG_HEADER.pack_into(self.segment.buf, 0, 0, slots, slot_size)
+        else:
+            self.segment = attach_segment(name)
+        _, self.slots, self.slot_size = LOG_HEADER.unpack_from(self.segment.buf, 0)
+        self.truncated = 0
+
+    def offset(self, event_id):
+        return LOG_HEADER.size + (event_id % self.slots) * self.slot_size
+
+    def last_id(self):
+        return LOG_HEADER.unpack_from(self.segment.buf, 0)[0]
+
+    def set_last_id(self, event_id):
+        struct.pack_into('<Q', self.segment.buf, 0, event_id)
+
+    def append(self, event_id, event_type, data):
+        payload = json.dumps([event_type, data]).encode()
+        if RECORD_HEADER.size + len(payload) > self.slot_size:
+            # Événement trop gros pour une case : les clients rechargeront l'état
+            self.truncated += 1
+            payload = json.dumps(['resync', {}]).encode()
+        buffer = self.segment.buf
+        offset = self.offset(event_id)
+        # Identifiant nul pendant l'écriture : la case est ignorée par les lecteurs
+        RECORD_HEADER.pack_into(buffer, offset, 0, 0)
+        start = offset + RECORD_HEADER.size
+        buffer[start:start + len(payload)] = payload
+        RECORD_HEADER.pack_into(buffer, offset, event_id, len(payload))
+        self.set_last_id(event_id)
+
+    def read_after(self, cursor):
+        """Événements d'id > cursor encore dans le journal : [(id, type, données)].
+
+        Un lecteur trop en retard repart du plus ancien événement disponible
+        (les ids renvoyés ne suivent alors plus `cursor`).
+        """
+        last = self.last_id()
+        if last <= cursor:
+            return []
+        buffer = self.segment.buf
+        events = []
+        for event_id in range(max(cursor + 1, last - self.slots + 1), last + 1):
+            offset = self.offset(event_id)
+            record_id, length = RECORD_HEADER.unpack_from(buffer, offset)
+            if record_id != event_id:
+                # Case réécrite (ou en cours d'écriture) : événement perdu
+                continue
+            start = offset + RECORD_HEADER.size
+            payload = bytes(buffer[start:start + length])
+            if RECORD_HEADER.unpack_from(buffer, offset)[0] != event_id:
+                continue
+            event_type, data = json.loads(payload)
+            events.append((event_id, event_type, data))
+        return events
+
+    def close(self):
+        self.segment.close()
+        if self.owner:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedEventFollower:
+    """Thread d'un processus web : recopie le journal partagé dans son bus d'événements.
+
+    Le journal est rouvert après `reopen_after` secondes sans événement : un
+    processus de capture redémarré recrée son segment sous le même nom.
+    """
+
+    def __init__(self, name, event_bus, poll_interval=0.05, reopen_after=5.0):
+        self.name = name
+        self.event_bus = event_bus
+        self.poll_interval = poll_interval
+        self.reopen_after = reopen_after
+        self.log = None
+        self.last_event_at = 0.0
+        self.stopped = False
+
+    def start(self):
+        threading.Thread(target=self.run, name='shared-events', daemon=True).start()
+        return self
+
+    def run(self):
+        while not self.stopped:
+            now = time.time()
+            if self.log is not None and now - self.last_event_at > self.reopen_after:
+                self.log.close()
+                self.log = None
+            try:
+                if self.log is None:
+                    self.log = SharedEventLog(self.name)
+                    self.last_event_at = now
+                for event_id, event_type, data in self.log.read_after(self.event_bus.last_id):
+                    self.event_bus.ingest(event_id, event_type, data)
+                    self.last_event_at = now
+            except FileNotFoundError:
+                # Processus de capture pas encore démarré
+                pass
+            except Exception as e:
+                print(f"Erreur de lecture des événements partagés: {e}")
+            time.sleep(self.poll_interval)
+
+
+class FrameExporter:
+    """Thread du processus de capture : copie les images encodées d'une caméra dans son
+    segment, uniquement tant qu'un processus web a des spectateurs pour elle"""
+
+    def __init__(self, broadcaster, slot, is_watched):
+        self.broadcaster = broadcaster
+        self.slot = slot
+        self.is_watched = is_watched
+        self.stopped = False
+        self.exported = 0
+
+    def start(self, name):
+        threading.Thread(target=self.run, name=name, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        sequence = 0
+        while not self.stopped and not self.broadcaster.closed:
+            if not self.is_watched():
+                time.sleep(0.2)
+                continue
+            # Même encodage que pour les spectateurs locaux (une seule fois par image)
+            sequence, chunk = self.broadcaster.wait_for_frame(sequence, timeout=1.0)
+            if chunk is not None and self.slot.write(chunk):
+                self.exported += 1
+        self.slot.close()
+
+
+class RemoteBroadcaster:
+    """Lecture, côté web, des images d'une caméra du processus de capture.
+
+    Même interface que `FrameBroadcaster` pour le générateur MJPEG. Les
+    spectateurs sont signalés au processus de capture par un bail renouvelé
+    (un processus web arrêté brutalement ne laisse pas de spectateur fantôme).
+    """
+
+    def __init__(self, slot_name, renew_lease, poll_interval=0.01, lease_interval=5.0):
+        self.slot_name = slot_name
+        self.renew_lease = renew_lease
+        self.poll_interval = poll_interval
+        self.lease_interval = lease_interval
+        self.slot = None
+        self.viewers = 0
+        self.lease_renewed_at = 0.0
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        with self.lock:
+            self.viewers += 1
+
+    def unsubscribe(self):
+        with self.lock:
+            self.viewers = max(0, self.viewers - 1)
+
+    def keep_alive(self):
+        now = time.time()
+        if now - self.lease_renewed_at >= self.lease_interval:
+            self.lease_renewed_at = now
+            try:
+                self.renew_lease()
+            except Exception as e:
+                print(f"Bail spectateur non renouvelé: {e}")
+
+    def wait_for_frame(self, last_sequence, timeout=1.0):
+        """(version, partie multipart) plus récente que last_sequence, ou (last_sequence, None)"""
+        self.keep_alive()
+        deadline = time.time() + timeout
+        while True:
+            if self.slot is None:
+                try:
+                    self.slot = SeqlockSlot(self.slot_name)
+                except FileNotFoundError:
+                    # Segment pas encore créé (caméra en démarrage)
+                    pass
+            if self.slot is not None:
+                latest = self.slot.read(last_sequence)
+                if latest is not None:
+                    return latest[0], latest[1]
+            if time.time() >= deadline:
+                return last_sequence, None
+            time.sleep(self.poll_interval)
+
+    def close(self):
+        if self.slot is not None:
+            self.slot.close()
+            self.slot = None
+
+
+class ControlServer:
+    """Commandes des processus web vers le processus de capture (connexion locale authentifiée).
+
+    `handler(commande, arguments)` renvoie une valeur sérialisable (pickle) ;
+    une exception est renvoyée au client sous forme de message.
+    """
+
+    def __init__(self, address, authkey, handler):
+        self.address = address
+        self.authkey = authkey
+        self.handler = handler
+        self.listener = None
+
+    def start(self):
+        self.listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self.accept, name='control-server', daemon=True).start()
+        return self
+
+    def accept(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except Exception as e:
+                print(f"Connexion de contrôle refusée: {e}")
+                continue
+            threading.Thread(target=self.serve, args=(connection,), name='control-connection', daemon=True).start()
+
+    def serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    command, arguments = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ('ok', self.handler(command, arguments))
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}" if not isinstance(e, ValueError) else str(e))
+                connection.send(reply)
+
+
+class ControlClient:
+    """Client des commandes (une connexion par thread, rouverte après une erreur)"""
+
+    def __init__(self, address, authkey, timeout=10.0):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = Client(self.address, authkey=self.authkey)
+            self.local.connection = connection
+        return connection
+
+    def call(self, command, *arguments):
+        """Exécuter une commande ; ValueError si elle échoue côté capture,
+        ConnectionError si le processus de capture est injoignable"""
+        for attempt in range(2):
+            try:
+                connection = self.connection()
+                connection.send((command, arguments))
+                if not connection.poll(self.timeout):
+                    raise TimeoutError(f"Pas de réponse à la commande {command}")
+                status, value = connection.recv()
+                break
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                # Connexion coupée ou réponse tronquée : reconnexion puis une seconde tentative
+                self.local.connection = None
+                if attempt:
+                    raise ConnectionError(f"Processus de capture injoignable: {e}") from e
+        if status == 'error':
+            raise ValueError(value)
+        return value
+
+
+class RemoteService:
+    """Objet du processus de capture vu d'un processus web : les méthodes listées sont
+    exécutées par commande, les autres attributs sont lus sur l'objet local (configuration)"""
+
+    def __init__(self, client, name, local, methods):
+        self._client = client
+        self._name = name
+        self._local = local
+        self._methods = set(methods)
+
+    def __getattr__(self, attribute):
+        if attribute in self._methods:
+            return lambda *arguments: self._client.call(f"{self._name}.{attribute}", *arguments)
+        return getattr(self._local, attribute)
@@ -11,6 +11,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Vérifier l'état initial du streaming
     checkStreamStatus();
     
+    // Recevoir les détections et changements d'état poussés par le serveur (SSE)
+    connectEvents();
+    
     // Initialiser les gestionnaires d'événements
     document.getElementById('start-stream').addEventListener('click', startStream);
     document.getElementById('stop-stream').addEventListener('click', stopStream);
@@ -29,6 +32,26 @@ function checkStreamStatus() {
         });
 }
 
+// Abonnement aux événements du serveur
+function connectEvents() {
+    if (!window.EventSource) return;
+    
+    const events = new EventSource('/api/events?types=detection,camera_started,camera_stopped');
+    
+    events.addEventListener('detection', function(event) {
+        if (isStreaming) {
+            recordDetection(JSON.parse(event.data));
+        }
+    });
+    
+    // L'état du flux ne change qu'à réception d'un événement (plus de vérification périodique)
+    events.addEventListener('camera_started', checkStreamStatus);
+    events.addEventListener('camera_stopped', checkStreamStatus);
+    
+    // Reconnexion après une coupure : resynchroniser l'état
+    events.addEventListener('resync', checkStreamStatus);
+}
+
 // Démarrer le flux vidéo
 function startStream() {
     const cameraSource = document.getElementById('camera-source').value.trim();
@@ -126,15 +149,8 @@ function startMonitoringTimer() {
     updateMonitoringTime();
     document.getElementById('alert-count').textContent = '0';
     
-    // Mise à jour toutes les secondes
-    monitoringTimer = setInterval(() => {
-        updateMonitoringTime();
-        
-        // Simulation d'alertes aléatoires pour la démo
-        if (Math.random() < 0.05 && isStreaming) {
-            simulateAlert();
-        }
-    }, 1000);
+    // Mise à jour de l'horloge toutes les secondes
+    monitoringTimer = setInterval(updateMonitoringTime, 1000);
 }
 
 // Arrêter le compteur de temps de surveillance
@@ -166,13 +182,14 @@ function updateMonitoringTime() {
     document.getElementById('monitoring-time').textContent = timeString;
 }
 
-// Simuler une alerte d'incendie (à des fins de démonstration)
-function simulateAlert() {
+// Enregistrer une détection d'incendie reçue du serveur
+function recordDetection(data) {
     alertCount++;
     document.getElementById('alert-count').textContent = alertCount;
     
-    // Calculer le niveau de risque (à des fins de démo)
-    const riskLevel = Math.min(alertCount * 10, 100);
+    // Niveau de risque : confiance maximale de la détection
+    const confidence = Math.max(...data.detections.map(d => d.confidence));
+    const riskLevel = Math.round(Math.min(confidence * 100, 100));
     const riskBar = document.getElementById('risk-level');
     
     riskBar.style.width = riskLevel + '%';
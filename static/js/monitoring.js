@@ -5,6 +5,7 @@ let monitoringTime = 0;
 let monitoringInterval = null;
 let alertCount = 0;
 let riskLevel = 0;
+let lastDetectionMessage = 0;
 
 document.addEventListener('DOMContentLoaded', function() {
     // Éléments de l'interface
@@ -20,6 +21,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const lastUpdate = document.getElementById('last-update');
 
     // Démarrer automatiquement le flux vidéo
+    // Caméra affichée : celle que cette page démarre et arrête (id 'default' côté serveur)
+    let displayedCameraId = 'default';
+
     function initVideoFeed() {
         if (videoFeed) {
             // Forcer le rechargement du flux
@@ -29,7 +33,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (videoPlaceholder) videoPlaceholder.style.display = 'none';
                 videoFeed.style.display = 'block';
                 startMonitoringTime();
-                simulateAlerts();
                 updateStreamStatus(true);
             };
             videoFeed.onerror = function() {
@@ -57,6 +60,9 @@ document.addEventListener('DOMContentLoaded', function() {
         // Démarrer automatiquement le flux
         initVideoFeed();
         
+        // Recevoir les détections poussées par le serveur (SSE)
+        connectEvents();
+        
         // Événement pour redémarrer le flux
         startButton.addEventListener('click', function() {
             const source = cameraSource.value;
@@ -81,6 +87,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.status === 'success' || data.status === 'already_running') {
+                if (data.camera_id) displayedCameraId = data.camera_id;
                 // Afficher le flux vidéo
                 if (videoPlaceholder) videoPlaceholder.style.display = 'none';
                 if (videoFeed) {
@@ -99,9 +106,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Démarrer le compteur de temps
                 startMonitoringTime();
                 
-                // Simuler des alertes périodiques
-                simulateAlerts();
-                
                 showMessage('success', 'Flux vidéo démarré avec succès');
             } else {
                 showMessage('danger', 'Erreur: ' + data.message);
@@ -176,7 +180,12 @@ document.addEventListener('DOMContentLoaded', function() {
         monitoringInterval = setInterval(() => {
             monitoringTime++;
             updateTimeDisplay();
-            updateLastUpdate();
+            
+            // Le risque redescend progressivement sans nouvelle détection
+            if (riskLevel > 0) {
+                riskLevel = Math.max(0, riskLevel - 1);
+                updateRiskLevel();
+            }
         }, 1000);
     }
 
@@ -202,36 +211,59 @@ document.addEventListener('DOMContentLoaded', function() {
             String(seconds).padStart(2, '0');
     }
 
-    // Fonction pour simuler des alertes périodiques
-    function simulateAlerts() {
-        // Simuler une alerte toutes les 20-60 secondes
-        setTimeout(() => {
-            if (monitoringInterval) {  // Vérifier si le monitoring est actif
-                alertCount++;
-                if (alertCountDisplay) alertCountDisplay.textContent = alertCount;
-                
-                // Augmenter le niveau de risque
-                riskLevel = Math.min(100, riskLevel + Math.random() * 20);
-                if (riskLevelBar) {
-                    riskLevelBar.style.width = riskLevel + '%';
-                    
-                    // Changer la couleur en fonction du niveau
-                    if (riskLevel < 30) {
-                        riskLevelBar.className = 'progress-bar bg-success';
-                    } else if (riskLevel < 70) {
-                        riskLevelBar.className = 'progress-bar bg-warning';
-                    } else {
-                        riskLevelBar.className = 'progress-bar bg-danger';
-                    }
-                }
-                
-                // Afficher une notification
-                showMessage('warning', 'Alerte: Détection potentielle d\'incendie');
-                
-                // Continuer la simulation
-                simulateAlerts();
-            }
-        }, Math.random() * 40000 + 20000);  // Entre 20 et 60 secondes
+    // Abonnement aux événements du serveur (détections YOLO, caméras)
+    function connectEvents() {
+        if (!window.EventSource) return;
+        
+        const events = new EventSource('/api/events?types=detection,camera_stopped');
+        
+        events.addEventListener('detection', function(event) {
+            const data = JSON.parse(event.data);
+            // Compteur et niveau de risque : ceux du flux affiché seulement
+            if (data.camera_id !== displayedCameraId) return;
+            handleDetection(data);
+        });
+        
+        events.addEventListener('camera_stopped', function(event) {
+            // L'arrêt d'une autre caméra ne concerne pas le flux affiché
+            if (JSON.parse(event.data).id !== displayedCameraId) return;
+            updateStreamStatus(false);
+        });
+    }
+    
+    // Mettre à jour les indicateurs à partir d'une détection
+    function handleDetection(data) {
+        alertCount++;
+        if (alertCountDisplay) alertCountDisplay.textContent = alertCount;
+        
+        // Le niveau de risque suit la confiance maximale de la détection
+        const confidence = Math.max(...data.detections.map(d => d.confidence));
+        riskLevel = Math.min(100, Math.max(riskLevel, confidence * 100));
+        updateRiskLevel();
+        updateLastUpdate();
+        
+        // Une notification au plus toutes les 10 secondes
+        const now = Date.now();
+        if (now - lastDetectionMessage > 10000) {
+            lastDetectionMessage = now;
+            const labels = [...new Set(data.detections.map(d => d.label))].join(', ');
+            showMessage('warning', `Alerte: Détection potentielle d'incendie (${labels}) - caméra ${data.camera_id}`);
+        }
+    }
+    
+    // Mettre à jour la barre de niveau de risque
+    function updateRiskLevel() {
+        if (!riskLevelBar) return;
+        riskLevelBar.style.width = riskLevel + '%';
+        
+        // Changer la couleur en fonction du niveau
+        if (riskLevel < 30) {
+            riskLevelBar.className = 'progress-bar bg-success';
+        } else if (riskLevel < 70) {
+            riskLevelBar.className = 'progress-bar bg-warning';
+        } else {
+            riskLevelBar.className = 'progress-bar bg-danger';
+        }
     }
 
     // Fonction pour mettre à jour l'horodatage de dernière mise à jour
@@ -0,0 +1,84 @@
+"""
+Outils de supervision des flux caméra : reconnexion avec attente exponentielle
+et gigue, session HTTP partagée (connexions réutilisées) et ouverture des
+sources OpenCV avec délais d'ouverture et de lecture.
+
+La boucle de supervision elle-même est dans `VideoCamera.update` : seule la
+connexion à la source est refaite, le pipeline et le modèle restent chauds.
+"""
+import random
+import threading
+
+import cv2
+
+
+class StreamStalled(Exception):
+    """Aucune image reçue depuis trop longtemps alors que la connexion est ouverte"""
+
+
+class Backoff:
+    """Délais de reconnexion croissants (x2), plafonnés, avec gigue aléatoire.
+
+    La gigue évite que toutes les caméras d'un même site, coupées ensemble, se
+    reconnectent au même instant.
+    """
+
+    def __init__(self, initial=0.5, maximum=30.0, multiplier=2.0, jitter=0.3):
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.attempts = 0
+
+    def next_delay(self):
+        delay = min(self.maximum, self.initial * self.multiplier ** self.attempts)
+        self.attempts += 1
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def reset(self):
+        self.attempts = 0
+
+
+http_session = None
+http_session_lock = threading.Lock()
+
+
+def get_http_session(pool_size=32):
+    """Session `requests` partagée par les caméras HTTP (pool de connexions)"""
+    global http_session
+    with http_session_lock:
+        if http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            http_session = session
+        return http_session
+
+
+def open_capture(source, open_timeout=5.0, read_timeout=5.0):
+    """Ouvrir une caméra locale (index) ou un flux RTSP / fichier.
+
+    Pour les flux, les délais FFmpeg évitent qu'un `read()` reste bloqué
+    indéfiniment quand la caméra ne répond plus.
+    """
+    source = str(source)
+    if source.isdigit():
+        capture = cv2.VideoCapture(int(source))
+    else:
+        capture = cv2.VideoCapture(source, cv2.CAP_FFMPEG, [
+            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(open_timeout * 1000),
+            cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(read_timeout * 1000),
+        ])
+        if not capture.isOpened():
+            # Sources non gérées par FFmpeg : backend par défaut
+            capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        capture.release()
+        raise ValueError(f"Impossible d'ouvrir la source vidéo: {source}")
+    # Ne garder qu'une image en attente dans le tampon du pilote (latence minimale)
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return capture
@@ -0,0 +1,43 @@
+import datetime
+
+from alert_stats import AlertStats
+
+NOW = datetime.datetime(2026, 6, 1, 12, 30)
+
+
+def alert(ago, status='new', severity='medium'):
+    return {'timestamp': (NOW - ago).isoformat(), 'status': status, 'severity': severity}
+
+
+def test_windows_count_recent_alerts():
+    stats = AlertStats()
+    stats.record_created(alert(datetime.timedelta(minutes=5)))
+    stats.record_created(alert(datetime.timedelta(hours=3), severity='high'))
+    stats.record_created(alert(datetime.timedelta(days=2)))
+    stats.record_created(alert(datetime.timedelta(days=10)))
+    snapshot = stats.snapshot(NOW)
+    assert snapshot['total'] == 4
+    assert snapshot['windows'] == {'1h': 1, '24h': 2, '7d': 3}
+    assert snapshot['by_severity'] == {'medium': 3, 'high': 1}
+
+
+def test_status_and_severity_changes_move_counters():
+    stats = AlertStats()
+    stats.record_created(alert(datetime.timedelta(minutes=1)))
+    stats.record_status_change('new', 'resolved')
+    stats.record_severity_change('medium', 'high')
+    snapshot = stats.snapshot(NOW)
+    assert snapshot['by_status'] == {'resolved': 1}
+    assert snapshot['by_severity'] == {'high': 1}
+
+
+def test_out_of_order_buckets_are_pruned():
+    stats = AlertStats()
+    # Alerte automatique datée du début de l'événement, enregistrée après une plus récente
+    stats.record_created(alert(datetime.timedelta(minutes=1)))
+    stats.record_created(alert(datetime.timedelta(minutes=50)))
+    stats.snapshot(NOW + datetime.timedelta(minutes=30))
+    assert list(stats.minute_buckets) == [(NOW - datetime.timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M')]
+    later = stats.snapshot(NOW + datetime.timedelta(days=8))
+    assert not stats.minute_buckets and not stats.hour_buckets
+    assert later['windows'] == {'1h': 0, '24h': 0, '7d': 0}
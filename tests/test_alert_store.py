@@ -0,0 +1,138 @@
+import pytest
+
+from alert_store import AlertStore
+
+
+def make_alert(index, **fields):
+    alert = {
+        'id': f'alert-{index}',
+        'name': 'Anonyme',
+        'location': f'Forêt domaniale {index}',
+        'description': 'Fumée au-dessus des pins',
+        'severity': 'medium',
+        'status': 'new',
+        'image': None,
+        'timestamp': f'2026-06-01T12:{index:02d}:00',
+        'coordinates': None,
+    }
+    alert.update(fields)
+    return alert
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AlertStore(str(tmp_path / 'alerts.db'))
+    yield store
+    store.close()
+
+
+def test_create_and_get(store):
+    store.create(make_alert(1, coordinates={'lat': 43.5, 'lng': 5.4}))
+    alert = store.get('alert-1')
+    assert alert['location'] == 'Forêt domaniale 1'
+    assert alert['coordinates'] == {'lat': 43.5, 'lng': 5.4}
+    assert store.get('inconnue') is None
+
+
+def test_list_is_newest_first_with_cursor_paging(store):
+    for index in range(7):
+        store.create(make_alert(index))
+    pages, before = [], None
+    while True:
+        alerts, before = store.list(limit=3, before=before)
+        pages.append([alert['id'] for alert in alerts])
+        if before is None:
+            break
+    assert pages == [['alert-6', 'alert-5', 'alert-4'], ['alert-3', 'alert-2', 'alert-1'], ['alert-0']]
+
+
+def test_invalid_cursor_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.list(before='abc')
+
+
+def test_search_location_and_description(store):
+    store.create(make_alert(1, location='Massif des Maures'))
+    store.create(make_alert(2, location='Gorges du Verdon', description='Flammes visibles'))
+    store.create(make_alert(3, location='Massif de l\'Esterel'))
+    assert [a['id'] for a in store.list(search='Massif')[0]] == ['alert-3', 'alert-1']
+    assert [a['id'] for a in store.list(search='Flammes')[0]] == ['alert-2']
+    # Recherche paginée : le curseur suit l'ordre de l'index plein texte
+    alerts, before = store.list(search='Massif', limit=1)
+    assert [a['id'] for a in alerts] == ['alert-3']
+    assert [a['id'] for a in store.list(search='Massif', limit=1, before=before)[0]] == ['alert-1']
+
+
+def test_status_update_and_filter(store):
+    for index in range(3):
+        store.create(make_alert(index))
+    assert store.update_status('alert-1', 'resolved') == 'new'
+    assert store.update_status('inconnue', 'resolved') is None
+    assert [a['id'] for a in store.list(status='resolved')[0]] == ['alert-1']
+    assert [a['id'] for a in store.list(status=['new'])[0]] == ['alert-2', 'alert-0']
+    assert store.count(status='new') == 2
+    assert store.count_by_status_severity() == [('new', 'medium', 2), ('resolved', 'medium', 1)]
+
+
+def test_update_rejects_status_and_unknown_fields(store):
+    store.create(make_alert(1))
+    assert store.update('alert-1', image='/static/uploads/a.jpg', thumbnail='/static/uploads/a_thumb.jpg')
+    assert store.get('alert-1')['thumbnail'] == '/static/uploads/a_thumb.jpg'
+    with pytest.raises(ValueError):
+        store.update('alert-1', status='resolved')
+    assert not store.update('inconnue', image=None)
+
+
+def geo_store(store):
+    # Marseille, Aix-en-Provence, Toulon ; une alerte sans position
+    for index, (lat, lng) in enumerate([(43.2965, 5.3698), (43.5297, 5.4474), (43.1242, 5.9280)]):
+        store.create(make_alert(index, coordinates={'lat': lat, 'lng': lng},
+                                severity='high' if index == 2 else 'medium'))
+    store.create(make_alert(3))
+    return store
+
+
+def test_bbox_query(store):
+    geo_store(store)
+    alerts, _ = store.list(bbox=(5.0, 43.2, 5.6, 43.6))
+    assert [a['id'] for a in alerts] == ['alert-1', 'alert-0']
+
+
+def test_near_query_adds_distance(store):
+    geo_store(store)
+    alerts, _ = store.list(near=(43.2965, 5.3698, 30000))
+    assert [a['id'] for a in alerts] == ['alert-1', 'alert-0']
+    assert alerts[1]['distance_km'] == 0.0
+    assert 25 < alerts[0]['distance_km'] < 30
+    # Rayon et rectangle combinés
+    assert store.list(near=(43.2965, 5.3698, 30000), bbox=(5.4, 43.4, 5.5, 43.6))[0][0]['id'] == 'alert-1'
+
+
+def test_geo_query_with_search_and_status(store):
+    geo_store(store)
+    store.update_status('alert-0', 'resolved')
+    assert [a['id'] for a in store.list(near=(43.2965, 5.3698, 30000), status='new')[0]] == ['alert-1']
+    assert [a['id'] for a in store.list(bbox=(5.0, 43.0, 6.0, 44.0), search='domaniale 2')[0]] == ['alert-2']
+
+
+def test_cluster_groups_by_zoom(store):
+    geo_store(store)
+    assert [cell['count'] for cell in store.cluster(zoom=2)] == [3]
+    cells = store.cluster(zoom=12)
+    assert sorted(cell['count'] for cell in cells) == [1, 1, 1]
+    assert {cell['alert_id'] for cell in cells} == {'alert-0', 'alert-1', 'alert-2'}
+    with pytest.raises(ValueError):
+        store.cluster(zoom=30)
+
+
+def test_out_of_range_coordinates_are_rejected(store):
+    with pytest.raises(ValueError):
+        store.create(make_alert(1, coordinates={'lat': 95, 'lng': 5}))
+
+
+def test_geo_queries_without_rtree(store):
+    geo_store(store)
+    # Repli sans index R-tree : mêmes résultats par filtre exact
+    store.geo_enabled = False
+    assert [a['id'] for a in store.list(bbox=(5.0, 43.2, 5.6, 43.6))[0]] == ['alert-1', 'alert-0']
+    assert [a['id'] for a in store.list(near=(43.2965, 5.3698, 30000))[0]] == ['alert-1', 'alert-0']
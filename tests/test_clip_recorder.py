@@ -0,0 +1,69 @@
+import itertools
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from clip_recorder import ClipRecorder, FrameRingBuffer, Recording, read_mjpeg_clip
+
+
+def test_ring_buffer_is_bounded_in_duration_and_bytes():
+    ring = FrameRingBuffer(duration=2.0, max_bytes=30)
+    for second in range(5):
+        ring.append(float(second), b'x' * 5)
+    assert [timestamp for timestamp, _ in ring.snapshot()] == [2.0, 3.0, 4.0]
+    ring.append(5.0, b'y' * 25)
+    assert [timestamp for timestamp, _ in ring.snapshot()] == [4.0, 5.0]
+    assert ring.bytes == 30 and ring.evicted == 4
+
+
+def test_recording_stops_growing_at_its_memory_cap():
+    recording = Recording('clip', 'cam', [(0.0, b'a' * 6)], ends_at=10.0, max_bytes=10, reason='manual')
+    recording.append(1.0, b'b' * 6)
+    recording.append(2.0, b'c' * 4)
+    assert [jpeg for _, jpeg in recording.frames] == [b'a' * 6, b'c' * 4]
+
+
+def test_mjpeg_clip_round_trip(tmp_path):
+    recorder = ClipRecorder(str(tmp_path))
+    frames = [(100.0 + index / 5, b'\xff\xd8' + bytes([index]) * 10 + b'\xff\xd9') for index in range(4)]
+    recorder.write(Recording('clip-1', 'cam', list(frames), 0.0, 1 << 20, 'manual'))
+    assert read_mjpeg_clip(recorder.path('clip-1')) == frames
+    assert not (tmp_path / 'clip-1.mjpeg.tmp').exists()
+
+
+def test_trigger_records_pre_and_post_roll(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), fps=50.0, pre_roll=0.2, post_roll=0.2)
+    sequences = itertools.count(1)
+
+    def latest_jpeg():
+        sequence = next(sequences)
+        return sequence, b'jpeg%d' % sequence
+
+    recorder.add_camera('cam', latest_jpeg)
+    assert not recorder.trigger('inconnue', 'clip-0')
+    recorder.start()
+    try:
+        time.sleep(0.3)
+        assert recorder.trigger('cam', 'clip-1', 'detection')
+        assert recorder.is_recording('clip-1')
+        deadline = time.time() + 5.0
+        while recorder.get_stats()['clips_written'] < 1 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        recorder.stop()
+    frames = read_mjpeg_clip(recorder.path('clip-1'))
+    # Images d'avant le déclenchement (pré-roll) et d'après (post-roll)
+    assert frames[-1][0] - frames[0][0] >= 0.3
+    assert len({jpeg for _, jpeg in frames}) == len(frames)
+
+
+def test_removed_camera_flushes_its_recordings(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), post_roll=60.0)
+    recorder.add_camera('cam', lambda: None)
+    recorder.trigger('cam', 'clip-1')
+    recorder.remove_camera('cam')
+    assert not recorder.is_recording('clip-1')
+    assert recorder.write_queue.get_nowait().clip_id == 'clip-1'
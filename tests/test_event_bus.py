@@ -0,0 +1,81 @@
+from event_bus import EventBus, Throttle
+
+
+def make_bus(events, history_size=1000):
+    bus = EventBus(history_size=history_size, keepalive=0.01)
+    for index in range(events):
+        bus.publish('alert_created', {'id': index + 1})
+    return bus
+
+
+def test_events_after_replays_missed_events():
+    bus = make_bus(5)
+    assert [event_id for event_id, _, _ in bus.events_after(2)] == [3, 4, 5]
+    assert bus.events_after(5) == []
+
+
+def test_stream_replays_from_last_event_id():
+    bus = make_bus(3)
+    stream = bus.stream(last_event_id=1)
+    assert next(stream) == "retry: 3000\n\n"
+    replay = next(stream)
+    assert replay.startswith('id: 2\nevent: alert_created\ndata: {"id": 2}\n\n')
+    assert 'id: 3\n' in replay
+    assert next(stream) == ": keepalive\n\n"
+    stream.close()
+    assert bus.subscribers == 0
+
+
+def test_stream_filters_types():
+    bus = make_bus(1)
+    bus.publish('detection', {'camera_id': 'a'})
+    stream = bus.stream(last_event_id=0, types={'detection'})
+    next(stream)
+    assert next(stream) == 'id: 2\nevent: detection\ndata: {"camera_id": "a"}\n\n'
+    stream.close()
+
+
+def test_client_behind_the_history_gets_resync():
+    bus = make_bus(5, history_size=3)
+    assert bus.events_after(0) is None
+    stream = bus.stream(last_event_id=0)
+    next(stream)
+    assert next(stream) == 'id: 5\nevent: resync\ndata: {}\n\n'
+    stream.close()
+
+
+def test_unknown_last_event_id_resyncs_after_restart():
+    bus = make_bus(2)
+    stream = bus.stream(last_event_id=50)
+    next(stream)
+    assert next(stream) == 'id: 2\nevent: resync\ndata: {}\n\n'
+    stream.close()
+
+
+def test_ingest_keeps_original_ids_and_clears_history_on_gap():
+    bus = EventBus()
+    bus.ingest(100, 'alert_created', {'id': 'a'})
+    bus.ingest(101, 'alert_updated', {'id': 'a'})
+    bus.ingest(101, 'alert_updated', {'id': 'a'})
+    assert [event_id for event_id, _, _ in bus.events_after(99)] == [100, 101]
+    # Événements 102-104 perdus : un client à 101 doit recharger son état
+    bus.ingest(105, 'alert_created', {'id': 'b'})
+    assert bus.events_after(101) is None
+    assert [event_id for event_id, _, _ in bus.events_after(104)] == [105]
+
+
+def test_forward_delegates_publication():
+    bus = EventBus()
+    forwarded = []
+    bus.forward = lambda event_type, data: forwarded.append((event_type, data))
+    assert bus.publish('detection', {'camera_id': 'a'}) is None
+    assert forwarded == [('detection', {'camera_id': 'a'})]
+    assert bus.last_id == 0
+
+
+def test_throttle_per_key():
+    throttle = Throttle(min_interval=1.0)
+    assert throttle.allow('a', now=10.0)
+    assert not throttle.allow('a', now=10.5)
+    assert throttle.allow('b', now=10.5)
+    assert throttle.allow('a', now=11.0)
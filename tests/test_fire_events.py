@@ -0,0 +1,111 @@
+import pytest
+
+from fire_events import FireEventTracker
+
+
+def fire(confidence=0.9, bbox=(100, 100, 150, 150), track_id=None):
+    return {'label': 'fire', 'confidence': confidence, 'bbox': list(bbox), 'track_id': track_id}
+
+
+def actions(tracker):
+    """(type, événement) transmis au thread d'écriture (sans le démarrer)"""
+    result = []
+    while not tracker.actions.empty():
+        kind, event, _ = tracker.actions.get_nowait()
+        result.append((kind, event))
+    return result
+
+
+def opened(tracker):
+    return [event for kind, event in actions(tracker) if kind == 'open']
+
+
+def test_cache_hits_do_not_satisfy_the_debounce():
+    tracker = FireEventTracker(window=5, min_hits=3)
+    tracker.observe('cam', None, [fire()], 0.0)
+    for step in range(1, 10):
+        tracker.observe('cam', None, [fire()], float(step), reused=True)
+    assert opened(tracker) == []
+    assert tracker.get_stats()['frames_reused'] == 9
+
+
+def test_cache_hits_keep_an_open_event_alive():
+    tracker = FireEventTracker(window=3, min_hits=2, close_after=5.0)
+    for step in range(2):
+        tracker.observe('cam', None, [fire()], float(step))
+    assert len(opened(tracker)) == 1
+    for step in range(2, 20):
+        tracker.observe('cam', None, [fire()], float(step), reused=True)
+    assert tracker.get_stats()['open_events'] == 1
+
+
+def test_debounce_needs_min_hits_in_window():
+    tracker = FireEventTracker(window=5, min_hits=3)
+    # Détections intermittentes : 2 sur 5 seulement
+    for step, detected in enumerate([True, False, False, True, False, False]):
+        tracker.observe('cam', None, [fire()] if detected else [], float(step))
+    assert opened(tracker) == []
+    tracker.observe('cam', None, [fire()], 6.0)
+    tracker.observe('cam', None, [fire()], 7.0)
+    events = opened(tracker)
+    assert len(events) == 1 and events[0]['camera_id'] == 'cam'
+
+
+def test_low_confidence_and_other_labels_are_ignored():
+    tracker = FireEventTracker(window=3, min_hits=2, labels=['fire', 'smoke'])
+    for step in range(5):
+        tracker.observe('cam', None, [fire(confidence=0.3), dict(fire(), label='person')], float(step))
+    assert opened(tracker) == []
+
+
+def test_one_event_per_fire_until_it_closes():
+    tracker = FireEventTracker(window=3, min_hits=2, close_after=10.0)
+    for step in range(20):
+        # Même piste, boîte qui grandit : un seul événement
+        tracker.observe('cam', None, [fire(bbox=(100, 100, 150 + step, 150 + step), track_id=7)], float(step))
+    tracker.observe('cam', None, [], 40.0)
+    kinds = [kind for kind, _ in actions(tracker)]
+    assert kinds == ['open', 'close']
+    stats = tracker.get_stats()
+    assert stats['events_opened'] == 1 and stats['events_closed'] == 1 and stats['open_events'] == 0
+
+
+def test_closed_event_reports_history_and_end_time():
+    tracker = FireEventTracker(window=2, min_hits=2, close_after=5.0)
+    for step in range(4):
+        tracker.observe('cam', None, [fire(confidence=0.7 + step / 10)], float(step))
+    tracker.observe('cam', None, [], 20.0)
+    closed = [event for kind, event in actions(tracker) if kind == 'close'][0]
+    assert closed['ended_at'] == 3.0 + 5.0
+    assert closed['max_confidence'] == 1.0
+    assert [confidence for _, confidence in closed['history']] == pytest.approx([0.8, 0.9, 1.0])
+
+
+def test_separate_fires_open_separate_events():
+    tracker = FireEventTracker(window=2, min_hits=2)
+    for step in range(2):
+        tracker.observe('cam', None, [fire(bbox=(0, 0, 50, 50))], float(step))
+    for step in range(2, 4):
+        tracker.observe('cam', None, [fire(bbox=(0, 0, 50, 50)), fire(bbox=(500, 400, 560, 460))], float(step))
+    assert len(opened(tracker)) == 2
+
+
+def test_forget_closes_camera_events():
+    tracker = FireEventTracker(window=2, min_hits=2)
+    for step in range(2):
+        tracker.observe('cam', None, [fire()], float(step))
+    tracker.forget('cam')
+    kinds = [kind for kind, _ in actions(tracker)]
+    assert kinds == ['open', 'close']
+    assert 'cam' not in tracker.hits
+
+
+def test_writer_thread_runs_handlers():
+    opened_events, closed_events = [], []
+    tracker = FireEventTracker(on_open=lambda event, frame: opened_events.append(event['id']),
+                               on_close=lambda event: closed_events.append(event['id']),
+                               window=2, min_hits=2).start()
+    for step in range(2):
+        tracker.observe('cam', None, [fire()], float(step))
+    tracker.stop()
+    assert opened_events == closed_events and len(opened_events) == 1
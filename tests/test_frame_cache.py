@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from detection_controller import AdaptiveDetectionController
+from frame_cache import FrameCache, hamming, jpeg_digest, perceptual_hash
+
+
+def night_frame(smoke=False):
+    frame = np.full((480, 640, 3), 20, dtype=np.uint8)
+    if smoke:
+        # Petit panache lointain : presque invisible au dHash 9x8
+        frame[200:204, 400:404] = 90
+    return frame
+
+
+def run_detection(cache, controller, frame, digest, now, infer):
+    """Même décision que VideoCamera.preprocess / VideoCamera.infer"""
+    if not controller.should_detect(frame, now):
+        return None
+    phash = perceptual_hash(frame)
+    cached = cache.lookup(digest, phash, now, similar=not controller.forced)
+    if cached is not None:
+        return cached
+    result = infer(frame)
+    cache.store(digest, phash, result, now)
+    return result
+
+
+def test_forced_sample_always_runs_inference():
+    controller = AdaptiveDetectionController(min_interval=0.1, max_interval=2.0)
+    cache = FrameCache(capacity=8, max_distance=2, max_age=2.0)
+    calls = []
+
+    def infer(frame):
+        calls.append(frame)
+        return 'smoke' if frame[200, 400, 0] > 50 else 'nothing'
+
+    clean = night_frame()
+    assert run_detection(cache, controller, clean, jpeg_digest(clean.tobytes()), 0.0, infer) == 'nothing'
+
+    # Scène immobile : la détection suivante n'a lieu qu'au titre de l'intervalle maximal
+    smoky = night_frame(smoke=True)
+    assert hamming(perceptual_hash(smoky), perceptual_hash(clean)) <= 2
+    assert run_detection(cache, controller, smoky, jpeg_digest(smoky.tobytes()), 1.0, infer) is None
+    result = run_detection(cache, controller, smoky, jpeg_digest(smoky.tobytes()), 2.0, infer)
+    assert controller.forced
+    assert result == 'smoke'
+    assert len(calls) == 2
+
+
+def test_forced_sample_reuses_exact_digest_only():
+    cache = FrameCache(capacity=8, max_distance=2, max_age=2.0)
+    cache.store(b'a', 0b1111, 'cached', 0.0)
+    assert cache.lookup(b'b', 0b1110, 1.0, similar=False) is None
+    assert cache.lookup(b'a', 0b0000, 1.0, similar=False) == 'cached'
+    assert cache.lookup(b'b', 0b1110, 1.0) == 'cached'
+
+
+def test_entries_expire_after_max_age():
+    cache = FrameCache(capacity=8, max_distance=2, max_age=2.0)
+    cache.store(b'a', 0, 'cached', 0.0)
+    assert cache.lookup(b'a', 0, 2.5) is None
@@ -0,0 +1,69 @@
+import threading
+
+from frame_pipeline import DropOldestQueue, FramePipeline, StageStats
+
+
+def test_full_queue_drops_the_oldest_item():
+    queue = DropOldestQueue(maxsize=2)
+    for item in range(5):
+        queue.put(item)
+    assert [queue.get(timeout=0), queue.get(timeout=0)] == [3, 4]
+    assert queue.get_stats() == {'depth': 0, 'maxsize': 2, 'received': 5, 'dropped': 3}
+
+
+def test_closed_queue_returns_none():
+    queue = DropOldestQueue()
+    queue.put('image')
+    queue.close()
+    assert queue.get(timeout=1.0) is None
+
+
+def test_stage_percentiles():
+    stats = StageStats()
+    for ms in range(1, 101):
+        stats.record(ms / 1000)
+    result = stats.get_stats()
+    assert result['count'] == 100 and result['max_ms'] == 100.0
+    assert (result['p50_ms'], result['p95_ms'], result['p99_ms']) == (51.0, 96.0, 100.0)
+
+
+def test_pipeline_routes_results_by_predicate():
+    pipeline = FramePipeline('test')
+    for name in ('input', 'even', 'odd'):
+        pipeline.add_queue(name, maxsize=10)
+    done = threading.Event()
+    received = []
+
+    def collect(item):
+        received.append(item)
+        if len(received) == 4:
+            done.set()
+
+    pipeline.add_stage('split', lambda item: item, 'input',
+                       [('even', lambda item: item % 2 == 0), ('odd', lambda item: item % 2 == 1)])
+    pipeline.add_stage('collect', collect, 'even')
+    pipeline.start()
+    try:
+        for item in range(8):
+            pipeline.push('input', item, source_seconds=0.001)
+        assert done.wait(timeout=5.0)
+    finally:
+        pipeline.stop()
+    assert received == [0, 2, 4, 6]
+    stats = pipeline.get_stats()
+    assert stats['source']['count'] == 8
+    assert stats['queues']['odd']['received'] == 4
+
+
+def test_stage_errors_do_not_stop_the_thread():
+    pipeline = FramePipeline('test')
+    pipeline.add_queue('input', maxsize=10)
+    pipeline.add_queue('output', maxsize=10)
+    pipeline.add_stage('invert', lambda item: 1 / item, 'input', ['output'])
+    pipeline.start()
+    try:
+        pipeline.push('input', 0)
+        pipeline.push('input', 4)
+        assert pipeline.queues['output'].get(timeout=5.0) == 0.25
+    finally:
+        pipeline.stop()
@@ -0,0 +1,118 @@
+import math
+import time
+
+import pytest
+
+from incidents import IncidentCorrelator, to_local, validate_position
+
+FIRE = (43.50, 5.50)
+TOWERS = {'nord': (43.56, 5.48), 'ouest': (43.49, 5.41), 'est': (43.45, 5.62)}
+
+
+def heading_to(origin, target):
+    x, y = to_local(origin, *target)
+    return math.degrees(math.atan2(x, y)) % 360
+
+
+def distance(a, b):
+    return math.hypot(*to_local(a, *b))
+
+
+def correlator(**options):
+    changes = []
+    correlator = IncidentCorrelator(on_change=lambda kind, incident: changes.append(kind), **options)
+    for camera_id, origin in TOWERS.items():
+        correlator.set_camera_position(camera_id, {'lat': origin[0], 'lng': origin[1], 'fov': 60,
+                                                   'heading': heading_to(origin, FIRE)})
+    return correlator, changes
+
+
+def detection(camera_id, event_id=None, now=None, x=500, size=40, confidence=0.8):
+    # Boîte centrée en x : relèvement égal au cap de la caméra (vers FIRE)
+    return {'id': event_id or f'event-{camera_id}', 'camera_id': camera_id, 'frame_size': (1000, 500),
+            'bbox': [x - size / 2, 200, x + size / 2, 200 + size], 'confidence': confidence,
+            'last_seen': now or time.time()}
+
+
+def report(alert_id, lat, lng, severity='high'):
+    return {'id': alert_id, 'coordinates': {'lat': lat, 'lng': lng}, 'severity': severity}
+
+
+def test_two_cameras_triangulate_the_fire():
+    incidents, changes = correlator()
+    first = incidents.observe_detection(detection('nord', confidence=0.8))
+    second = incidents.observe_detection(detection('ouest', confidence=0.7))
+    assert first == second
+    incident = incidents.get(first)
+    assert incident['location_source'] == 'triangulation'
+    assert distance(FIRE, (incident['location']['lat'], incident['location']['lng'])) < 50
+    assert incident['confidence'] == pytest.approx(1 - 0.2 * 0.3)
+    assert changes == ['incident_opened', 'incident_updated']
+
+
+def test_single_camera_has_a_bearing_but_no_location():
+    incidents, _ = correlator()
+    incident = incidents.get(incidents.observe_detection(detection('nord')))
+    assert incident['location'] is None
+    assert incident['cameras'][0]['bearing'] == pytest.approx(heading_to(TOWERS['nord'], FIRE), abs=0.1)
+
+
+def test_report_on_a_bearing_joins_the_incident():
+    incidents, _ = correlator()
+    incident_id = incidents.observe_detection(detection('nord'))
+    assert incidents.add_report(report('citizen-1', FIRE[0] + 0.002, FIRE[1])) == incident_id
+    incident = incidents.get(incident_id)
+    assert incident['reports'] == ['citizen-1']
+    assert incident['location_source'] == 'reports'
+
+
+def test_report_far_away_opens_another_incident():
+    incidents, _ = correlator()
+    incident_id = incidents.observe_detection(detection('nord'))
+    incidents.observe_detection(detection('ouest'))
+    assert incidents.add_report(report('citizen-1', 43.30, 5.20)) != incident_id
+    assert incidents.get_stats()['active_incidents'] == 2
+
+
+def test_same_camera_other_direction_is_another_incident():
+    incidents, _ = correlator()
+    first = incidents.observe_detection(detection('nord', 'event-1'))
+    # Même événement : même incident ; autre bord de l'image (30° plus loin) : autre feu
+    assert incidents.observe_detection(detection('nord', 'event-1', x=510)) == first
+    assert incidents.observe_detection(detection('nord', 'event-2', x=990)) != first
+
+
+def test_camera_without_position_is_ignored():
+    incidents, _ = correlator()
+    assert incidents.observe_detection(detection('inconnue')) is None
+    assert incidents.get_stats()['ignored_detections'] == 1
+
+
+def test_incident_expires_without_observations():
+    incidents, changes = correlator(expire_after=60.0)
+    now = time.time()
+    incident_id = incidents.observe_detection(detection('nord', now=now - 120))
+    incidents.observe_detection(detection('est', 'event-other', now=now))
+    assert changes[-2:] == ['incident_closed', 'incident_opened']
+    closed = incidents.get(incident_id)
+    assert closed['status'] == 'closed' and closed['closed_at'] == pytest.approx(now - 60)
+
+
+def test_growing_boxes_give_a_growing_trend():
+    incidents, _ = correlator()
+    now = time.time() - 60
+    for step in range(7):
+        incident_id = incidents.observe_detection(detection('nord', now=now + step * 10, size=20 + step * 10))
+    incident = incidents.get(incident_id)
+    assert incident['trend'] == 'growing' and incident['growth_per_min'] > 0
+
+
+@pytest.mark.parametrize('position', [
+    [43.5, 5.5],
+    {'lat': 95, 'lng': 5.5},
+    {'lat': 43.5, 'lng': 5.5, 'fov': 0},
+    {'lat': 43.5, 'lng': 5.5, 'range_km': 500},
+])
+def test_invalid_camera_positions(position):
+    with pytest.raises(ValueError):
+        validate_position(position)
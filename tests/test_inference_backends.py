@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from inference_backends import ExportedBackend, OnnxRuntimeBackend, export_model
+
+
+def exported_backend(tmp_path, backend_class, imgsz=640):
+    path = str(tmp_path / 'model')
+    with open(path + '.json', 'w') as f:
+        json.dump({'names': {'0': 'fire'}, 'imgsz': imgsz}, f)
+    backend = backend_class.__new__(backend_class)
+    ExportedBackend.__init__(backend, path)
+    backend.run = lambda batch: np.zeros((len(batch), 5, 0), dtype=np.float32)
+    return backend
+
+
+def test_openvino_int8_without_calibration_data_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        export_model(str(tmp_path / 'last.pt'), 'openvino', int8=True, cache_dir=str(tmp_path))
+
+
+def test_fixed_size_export_rejects_other_imgsz(tmp_path):
+    backend = exported_backend(tmp_path, ExportedBackend)
+    with pytest.raises(ValueError):
+        backend.predict([np.zeros((480, 640, 3), dtype=np.uint8)], imgsz=320)
+
+
+def test_dynamic_export_rejects_size_off_model_stride(tmp_path):
+    backend = exported_backend(tmp_path, OnnxRuntimeBackend)
+    with pytest.raises(ValueError):
+        backend.predict([np.zeros((480, 640, 3), dtype=np.uint8)], imgsz=500)
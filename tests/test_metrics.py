@@ -0,0 +1,56 @@
+from metrics import Registry
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    requests = registry.counter('forest_requests', 'Requêtes', ['route'])
+    requests.labels('/api/alerts').inc()
+    requests.labels('/api/alerts').inc(2)
+    registry.gauge('forest_viewers', 'Spectateurs').set(3)
+    text = registry.render()
+    assert '# TYPE forest_requests counter\n' in text
+    assert 'forest_requests_total{route="/api/alerts"} 3\n' in text
+    assert 'forest_viewers 3\n' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('forest_latency_seconds', 'Latence', ['camera'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.labels('cam').observe(value)
+    text = registry.render()
+    assert 'forest_latency_seconds_bucket{camera="cam",le="0.1"} 1\n' in text
+    assert 'forest_latency_seconds_bucket{camera="cam",le="1"} 3\n' in text
+    assert 'forest_latency_seconds_bucket{camera="cam",le="+Inf"} 4\n' in text
+    assert 'forest_latency_seconds_sum{camera="cam"} 6.05\n' in text
+    assert 'forest_latency_seconds_count{camera="cam"} 4\n' in text
+
+
+def test_removed_series_are_not_rendered():
+    registry = Registry()
+    decode = registry.histogram('forest_decode_seconds', 'Décodage', ['camera'])
+    decode.labels('a').observe(0.01)
+    decode.labels('b').observe(0.01)
+    decode.remove('a')
+    text = registry.render()
+    assert 'camera="a"' not in text and 'camera="b"' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter('forest_errors', 'Erreurs', ['reason']).labels('say "hi"\n').inc()
+    assert 'forest_errors_total{reason="say \\"hi\\"\\n"} 1\n' in registry.render()
+
+
+def test_collectors_and_filtered_render():
+    registry = Registry()
+    own = registry.counter('forest_web_requests', 'Requêtes web')
+    own.inc()
+    registry.add_collector(lambda: [('forest_frames', 'counter', 'Images', [({'camera': 'a'}, 10)])])
+    registry.add_collector(lambda: 1 / 0)
+    text = registry.render()
+    assert 'forest_frames_total{camera="a"} 10\n' in text
+    # Sortie limitée (processus web) : ni les autres métriques ni les collecteurs
+    assert registry.render([own], collectors=False) == (
+        '# HELP forest_web_requests Requêtes web\n# TYPE forest_web_requests counter\n'
+        'forest_web_requests_total 1\n')
@@ -0,0 +1,77 @@
+import pytest
+
+from mjpeg_parser import MJPEGStreamParser
+
+
+def jpeg(index, size=100):
+    # Octets d'EOI au milieu de la charge utile : seul Content-Length les traverse
+    payload = bytes([index % 256]) * (size // 2) + b'\xff\xd9' + bytes([index % 256]) * (size // 2)
+    return b'\xff\xd8' + payload + b'\xff\xd9'
+
+
+def part(frame, boundary=b'frame', length=True):
+    headers = b'Content-Type: image/jpeg\r\n'
+    if length:
+        headers += b'Content-Length: %d\r\n' % len(frame)
+    return b'--' + boundary + b'\r\n' + headers + b'\r\n' + frame + b'\r\n'
+
+
+def parse(parser, data, chunk_size):
+    frames = []
+    for offset in range(0, len(data), chunk_size):
+        frames.extend(bytes(frame) for frame in parser.feed(data[offset:offset + chunk_size]))
+    return frames
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 8192])
+def test_content_length_parts(chunk_size):
+    frames = [jpeg(index) for index in range(5)]
+    parser = MJPEGStreamParser('frame', buffer_size=64)
+    assert parse(parser, b''.join(part(frame) for frame in frames), chunk_size) == frames
+    assert parser.frames == 5
+
+
+@pytest.mark.parametrize('chunk_size', [1, 13, 8192])
+def test_boundary_without_content_length(chunk_size):
+    frames = [b'\xff\xd8' + bytes([index]) * 50 + b'\xff\xd9' for index in range(4)]
+    parser = MJPEGStreamParser('frame', buffer_size=64)
+    data = b''.join(part(frame, length=False) for frame in frames)
+    assert parse(parser, data, chunk_size) == frames
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 8192])
+def test_raw_jpeg_concatenation(chunk_size):
+    frames = [b'\xff\xd8' + bytes([index + 1]) * 30 + b'\xff\xd9' for index in range(3)]
+    parser = MJPEGStreamParser()
+    assert parse(parser, b'garbage' + b''.join(frames), chunk_size) == frames
+
+
+def test_truncated_part_is_not_returned():
+    parser = MJPEGStreamParser('frame')
+    data = part(jpeg(1))
+    assert parse(parser, data[:-20], 8192) == []
+    # Reconnexion : la trame tronquée est oubliée, la suivante est lue entière
+    parser.reset()
+    assert parse(parser, part(jpeg(2)), 8192) == [jpeg(2)]
+
+
+def test_part_not_starting_with_soi_is_skipped():
+    parser = MJPEGStreamParser('frame')
+    data = part(b'not a jpeg image') + part(jpeg(3))
+    assert parse(parser, data, 8192) == [jpeg(3)]
+    assert parser.resyncs == 1
+
+
+def test_oversized_frame_resyncs():
+    parser = MJPEGStreamParser(buffer_size=64, max_frame_size=256)
+    # SOI sans EOI : la trame dépasse la taille maximale, le tampon repart de zéro
+    assert parse(parser, b'\xff\xd8' + b'\x00' * 1000, 100) == []
+    assert parser.resyncs >= 1
+    frame = b'\xff\xd8' + b'\x01' * 20 + b'\xff\xd9'
+    assert parse(parser, frame, 8192) == [frame]
+
+
+def test_boundary_from_content_type():
+    content_type = 'multipart/x-mixed-replace; boundary="frame"'
+    assert MJPEGStreamParser.boundary_from_content_type(content_type) == 'frame'
+    assert MJPEGStreamParser.boundary_from_content_type('image/jpeg') is None
@@ -0,0 +1,66 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from roi_tiling import TiledDetector, validate_config
+
+
+@pytest.mark.parametrize('config', [
+    'tuiles',
+    {'tile_size': 'grand'},
+    {'tile_size': 64},
+    {'overlap': None},
+    {'overlap': 0.8},
+    {'change_threshold': 'x'},
+    {'change_threshold': -0.1},
+    {'change_threshold': 2},
+    {'refresh_interval': 'x'},
+    {'refresh_interval': -1},
+    {'refresh_interval': 0},
+    {'roi': 'zone'},
+    {'roi': {'a': 1}},
+    {'roi': [[0.1, 0.2, 0.3]]},
+    {'roi': [[[0, 0], [1, 0]]]},
+    {'roi': [[[0, 0], [1, 0], [1.5, 1]]]},
+    {'roi': [[[0, 0], [1, 0], [True, 1]]]},
+    {'roi': [[[0, 0], [1, 0], ['a', 1]]]},
+])
+def test_invalid_config_raises_value_error(config):
+    with pytest.raises(ValueError):
+        validate_config(config)
+
+
+def test_valid_config_is_coerced():
+    config = validate_config({'tile_size': '512', 'overlap': '0.1', 'change_threshold': '0.05',
+                              'refresh_interval': 30, 'roi': [[[0, 0], [1, 0], [0.5, 1]]]})
+    assert config['tile_size'] == 512
+    assert config['overlap'] == 0.1
+    assert config['change_threshold'] == 0.05
+    assert config['refresh_interval'] == 30.0
+
+
+def test_optional_fields_keep_server_defaults():
+    config = validate_config({})
+    assert 'change_threshold' not in config
+    assert 'refresh_interval' not in config
+    assert config['roi'] == []
+
+
+def still_frame():
+    return np.full((480, 640, 3), 40, dtype=np.uint8)
+
+
+def test_unchanged_tile_is_skipped_after_its_result_arrives():
+    tiler = TiledDetector(tile_size=640, overlap=0.0)
+    tiles = tiler.plan(still_frame(), now=0.0)
+    assert [index for index, _ in tiles] == [0]
+    tiler.update(0, [], now=0.0)
+    assert tiler.plan(still_frame(), now=1.0) == []
+
+
+def test_tile_without_result_is_planned_again():
+    tiler = TiledDetector(tile_size=640, overlap=0.0)
+    assert len(tiler.plan(still_frame(), now=0.0)) == 1
+    # Inférence échouée ou expirée : pas d'update(), la tuile n'est pas considérée comme vue
+    assert len(tiler.plan(still_frame(), now=1.0)) == 1